@@ -1,35 +1,43 @@
+import os
 import sys
 import threading
 import webbrowser
 from ssl import SSLContext
-from typing import Optional, List
+from typing import Optional, List, TYPE_CHECKING
 import asyncio
-import time
 
 from pystray import Icon, Menu, MenuItem
 
 from yamusicrpc import __version__
-from yamusicrpc.data import DISCORD_CLIENT_ID
-from yamusicrpc.exceptions import DiscordProcessNotFoundError, AdminRightsRequiredError
-from yamusicrpc.models import TrackInfo
-from yamusicrpc.yandex import YandexTokenReceiver, YandexClient, YandexListener
-from yamusicrpc.discord import DiscordIPCClient
-
-from application.data import APP_NAME
+from yamusicrpc.cache import TrackCache, SqliteTrackStore
+from yamusicrpc.data import DISCORD_CLIENT_ID, TRACK_STORE_WARM_UP_SIZE, PREFETCH_DEPTH
+from yamusicrpc.exceptions import DiscordProcessNotFoundError, AdminRightsRequiredError, DiscordIPCError
+from yamusicrpc.models import TrackInfo, TrackEvent
+from yamusicrpc.yandex import YandexClient, YandexListener, QueuePrefetcher
+from yamusicrpc.discord import AsyncDiscordIPCClient, ActivityScheduler
+from yamusicrpc.presence_pipeline import handle_track_change
+from yamusicrpc.metrics import MetricsServer, OpenTelemetryTracer, set_tracer
+
+from application.data import APP_NAME, METRICS_PORT_ENV, TRACING_ENV
 from application.state import AppState, StateManager
 from application.utils import AsyncTaskManager, ImageLoader, AutostartManager, CertManager
 
+if TYPE_CHECKING:
+    from yamusicrpc.yandex import YandexTokenReceiver
+
 
 class YaMusicRPCApp:
     icon: Optional[Icon] = None
 
     state: AppState = AppState()
-    discord_client: Optional[DiscordIPCClient] = None
+    discord_client: Optional[AsyncDiscordIPCClient] = None
     yandex_client: Optional[YandexClient] = None
-    receiver: Optional[YandexTokenReceiver] = None
+    track_cache: Optional[TrackCache] = None
+    receiver: Optional["YandexTokenReceiver"] = None
     listener: Optional[YandexListener] = None
     player: AsyncTaskManager
     ssl: Optional[SSLContext] = None
+    metrics_server: Optional[MetricsServer] = None
 
     # State
     is_discord_connected: bool = False
@@ -42,8 +50,7 @@ class YaMusicRPCApp:
     is_running: bool = False
 
     def __init__(self, use_ssl: bool = False):
-        self.discord_client = DiscordIPCClient(DISCORD_CLIENT_ID)
-        self.player = AsyncTaskManager()
+        self.discord_client = AsyncDiscordIPCClient(DISCORD_CLIENT_ID)
         if use_ssl:
             self.ssl = CertManager.get_ssl_context()
 
@@ -51,6 +58,9 @@ class YaMusicRPCApp:
         self.loop = asyncio.new_event_loop()
         threading.Thread(target=self._run_loop, daemon=True).start()
 
+        # Player uses the same loop, so connections (Discord, Yandex) are shared
+        self.player = AsyncTaskManager(self.loop)
+
     # LOOP FOR PARALLEL WORK WITHOUT FREEZING INTERFACE
     def _run_loop(self):
         asyncio.set_event_loop(self.loop)
@@ -66,6 +76,9 @@ class YaMusicRPCApp:
     async def init_async(self) -> None:
         # Load state
         self.state = StateManager.load_state()
+        self.track_cache = await asyncio.to_thread(self.load_track_cache)
+        await self.start_metrics_server()
+        self.enable_tracing()
 
         # While loading
         self.icon.menu = Menu(
@@ -105,24 +118,68 @@ class YaMusicRPCApp:
 
         self.update_menu()
 
+    async def start_metrics_server(self) -> None:
+        """
+        Serve metrics in Prometheus format, if port is set in environment
+        """
+        port: Optional[str] = os.environ.get(METRICS_PORT_ENV)
+        if not port:
+            return
+
+        try:
+            self.metrics_server = MetricsServer(port=int(port))
+            await self.metrics_server.start()
+        except (ValueError, OSError) as e:
+            print(f"[YaMusicRPC] Failed to start metrics server: {e}")
+            self.metrics_server = None
+
+    @staticmethod
+    def enable_tracing() -> None:
+        """
+        Export spans of presence updates to OpenTelemetry, if it is enabled in environment
+        """
+        if os.environ.get(TRACING_ENV, "").lower() != "otel":
+            return
+
+        try:
+            set_tracer(OpenTelemetryTracer())
+            print("[YaMusicRPC] Tracing is enabled (OpenTelemetry)")
+        except ImportError as e:
+            print(f"[YaMusicRPC] Failed to enable tracing: {e}")
+
+    @staticmethod
+    def load_track_cache() -> TrackCache:
+        """
+        Create track metadata cache backed by file (with warm-load of the hottest tracks)
+        """
+        try:
+            store = SqliteTrackStore(StateManager.get_cache_path())
+        except Exception as e:
+            print(f"[YaMusicRPC] Failed to open track cache file: {e}")
+            return TrackCache()
+
+        track_cache = TrackCache(store=store)
+        count = track_cache.warm_up(TRACK_STORE_WARM_UP_SIZE)
+        print(f"[YaMusicRPC] Track cache was loaded: {count} tracks")
+        return track_cache
+
     # === Connections ===
     async def check_discord_async(self):
         """
         Try connecting to discord and update state (discord_username)
         """
         try:
-            info: dict = await asyncio.to_thread(self.discord_client.connect)
+            info: dict = await self.discord_client.connect()
             username = info.get("data", {}).get("user", {}).get("username", None)
             if username:
                 self.is_discord_connected = True
                 self.discord_username = username
                 print(f"[YaMusicRPC] Connected to Discord: @{username}")
 
-            # CLose socket (we don't need to keep it active)
-            self.discord_client.close()
+            # Connection is kept alive (and restored after Discord restart) to be reused by player
 
         except DiscordProcessNotFoundError:
-            print(f"[YaMusicRPC] Discord process not found")
+            print("[YaMusicRPC] Discord process not found")
             self.is_discord_connected = False
 
     async def check_yandex_async(self):
@@ -131,7 +188,9 @@ class YaMusicRPCApp:
         (We are counting that we already have token)
         """
         if self.state.yandex_token:
-            self.yandex_client = YandexClient(self.state.yandex_token, self.ssl)
+            if self.yandex_client:
+                await self.yandex_client.close()
+            self.yandex_client = YandexClient(self.state.yandex_token, self.ssl, track_cache=self.track_cache)
 
             username: str = await self.yandex_client.get_username()
 
@@ -140,34 +199,47 @@ class YaMusicRPCApp:
                 self.yandex_username = username
                 print(f"[YaMusicRPC] Connected to Yandex: @{username}")
 
-                self.listener = YandexListener(self.state.yandex_token, self.ssl)
+                self.listener = YandexListener(self.state.yandex_token, self.ssl, queue_depth=PREFETCH_DEPTH)
 
     # === Main func to sharing activity ===
     async def play(self, stop_event: asyncio.Event):
-        async with self.listener as l:
-            # Using overload to not wait next message
-            async for track in l.listen_with_event(stop_event, check_after=5):
-                if stop_event.is_set():
-                    break
-
-                start_time: int = int(time.time()) - track.progress
-                end_time: int = start_time + track.duration
-                await self.yandex_client.fill_track_info(track)
-                self.current_track_info = track
-                self.update_menu()
-
-                try:
-                    self.discord_client.set_yandex_music_activity(
-                        title=track.title,
-                        artists=track.artists,
-                        start=start_time,
-                        end=end_time,
-                        url=track.get_track_url(),
-                        image_url=track.cover_url,
-                    )
-                except DiscordProcessNotFoundError:
-                    self.stop_player()
-                    break
+        try:
+            # Reuses connection opened by `check_discord_async`
+            await self.discord_client.connect()
+        except DiscordProcessNotFoundError:
+            print("[YaMusicRPC] Discord process not found")
+            self.stop_player()
+            return
+
+        prefetcher = QueuePrefetcher(self.yandex_client, depth=PREFETCH_DEPTH)
+        scheduler = ActivityScheduler(self.discord_client, on_error=self._on_discord_error)
+
+        try:
+            async with self.listener as l:
+                # Using overload to not wait next message (and skip states without changes)
+                async for change in l.listen_changes(stop_event):
+                    if stop_event.is_set():
+                        change.span.end()
+                        break
+
+                    # Errors of sending are reported to `_on_discord_error`, not raised here
+                    await handle_track_change(self.yandex_client, prefetcher, scheduler, change)
+                    self.current_track_info = change.track
+                    if TrackEvent.TRACK_CHANGED in change:
+                        self.update_menu()
+        finally:
+            await prefetcher.close()
+            await scheduler.close()
+            # Connection stays open, only activity is cleared
+            try:
+                await self.discord_client.set_activity(None)
+            except (DiscordProcessNotFoundError, DiscordIPCError, asyncio.TimeoutError) as e:
+                print(f"[YaMusicRPC] Failed to clear activity: {e!r}")
+
+    def _on_discord_error(self, error: Exception):
+        print(f"[YaMusicRPC] Failed to send activity: {error}")
+        if isinstance(error, DiscordProcessNotFoundError):
+            self.stop_player()
 
     def is_ready(self) -> bool:
         return bool(self.is_discord_connected) and bool(self.is_yandex_connected)
@@ -175,7 +247,6 @@ class YaMusicRPCApp:
     # === Player ===
     def start_player(self):
         if not self.player.is_running():
-            self.discord_client.connect()
             self.player.start(self.play)
             self.is_running = True
             self.update_menu()
@@ -185,7 +256,6 @@ class YaMusicRPCApp:
             self.player.stop()
 
         self.is_running = False
-        self.discord_client.close()
         self.update_menu()
 
     # === Button actions (handlers) ===
@@ -196,7 +266,8 @@ class YaMusicRPCApp:
         """
         Try to log in yandex to get token
         """
-        # Pre-action
+        # Pre-action (Flask and requests are imported only for login, not on every start)
+        from yamusicrpc.yandex import YandexTokenReceiver
         self.receiver = YandexTokenReceiver(local_port=5051)
         self.is_yandex_authorization = True
         self.update_menu()
@@ -233,6 +304,11 @@ class YaMusicRPCApp:
         self.stop_player()
         self.listener = None
 
+        # Release pooled connections
+        if self.yandex_client:
+            asyncio.run_coroutine_threadsafe(self.yandex_client.close(), self.loop)
+            self.yandex_client = None
+
     def _on_reconnect_discord(self):
         asyncio.run_coroutine_threadsafe(self._on_reconnect_discord_async(), self.loop)
 
@@ -270,6 +346,8 @@ class YaMusicRPCApp:
 
         # Save state (not necessary, but yes)
         StateManager.save_state(self.state)
+        if self.track_cache:
+            self.track_cache.close()
 
         self.icon.stop()
         sys.exit(0)
@@ -2,4 +2,11 @@ APP_NAME = "YaMusicRPC"
 
 # Configs
 CONFIG_NAME = "config.json"  # json
+CACHE_NAME = "tracks.sqlite3"  # sqlite (track metadata cache)
 STATE_KEY = APP_NAME  # ringkey
+
+# Metrics (Prometheus endpoint is started only if port is set in environment)
+METRICS_PORT_ENV = "YAMUSICRPC_METRICS_PORT"
+
+# Tracing (spans are exported to OpenTelemetry only if it is enabled in environment, e.g. `otel`)
+TRACING_ENV = "YAMUSICRPC_TRACING"
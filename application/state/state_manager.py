@@ -6,7 +6,7 @@ from typing import Optional
 import keyring
 
 from . import AppState
-from ..data import APP_NAME, CONFIG_NAME, STATE_KEY
+from ..data import APP_NAME, CONFIG_NAME, CACHE_NAME, STATE_KEY
 
 
 class StateManager:
@@ -25,6 +25,10 @@ class StateManager:
         os.makedirs(folder, exist_ok=True)
         return os.path.join(folder, CONFIG_NAME)
 
+    @classmethod
+    def get_cache_path(cls):
+        return os.path.join(os.path.dirname(cls.get_config_path()), CACHE_NAME)
+
     @classmethod
     def save_token(cls, token: str):
         try:
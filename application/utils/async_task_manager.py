@@ -1,12 +1,22 @@
 import asyncio
 import threading
+from typing import Optional
 
 class AsyncTaskManager:
-    def __init__(self):
-        self.loop = asyncio.new_event_loop()
-        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """
+        :param loop: Running loop to schedule task in (e.g. to share connections with other coroutines).
+        If not set, own loop is created and run in separate thread.
+        """
         self.task = None
         self.stop_event = None
+        if loop is not None:
+            self.loop = loop
+            self.thread = None
+            return
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
         self.thread.start()
 
     def start(self, coro_func):
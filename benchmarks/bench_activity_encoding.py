@@ -0,0 +1,107 @@
+"""
+Per-call CPU time of SET_ACTIVITY frame encoding: building activity dict + `json.dumps` + concatenation
+with header (current path of `set_activity`) vs pre-serialized template + scatter-gather write
+(path of `set_yandex_music_activity`).
+
+Run from project root:
+    python3 -m benchmarks.bench_activity_encoding
+"""
+import argparse
+import os
+import socket
+import struct
+import threading
+import time
+from typing import List, Tuple, Callable, Optional
+
+from yamusicrpc.discord.discord_ipc_client import DiscordIPCClient, YANDEX_MUSIC_ACTIVITY_TEMPLATE, YANDEX_LOGO_ASSET
+
+_HEADER = struct.Struct('<II')
+
+Track = Tuple[str, str, int, int, str, str]
+
+
+def make_tracks(count: int) -> List[Track]:
+    tracks: List[Track] = []
+    for i in range(count):
+        title = f"Track {i}" if i % 2 else f"Песня номер {i}"
+        tracks.append((
+            title, f"Artist {i}, Исполнитель {i % 7}", 1_700_000_000 + i, 1_700_000_200 + i,
+            f"https://music.yandex.ru/album/{i}/track/{i * 10}",
+            f"https://avatars.yandex.net/get-music-content/{i}/cover/200x200",
+        ))
+    return tracks
+
+
+def encode_dict(track: Track, nonce: str) -> Tuple[bytes, ...]:
+    title, artists, start, end, url, image_url = track
+    payload = {
+        "cmd": "SET_ACTIVITY",
+        "args": {
+            "pid": os.getpid(),
+            "activity": DiscordIPCClient.build_yandex_music_activity(title, artists, start, end, url, image_url),
+        },
+        "nonce": nonce,
+    }
+    return (DiscordIPCClient._encode(DiscordIPCClient.OP_FRAME, payload),)
+
+
+def encode_template(track: Track, nonce: str) -> Tuple[bytes, ...]:
+    title, artists, start, end, url, image_url = track
+    body = YANDEX_MUSIC_ACTIVITY_TEMPLATE.render(
+        pid=os.getpid(), nonce=nonce,
+        title=title, artists=artists, start=start, end=end, url=url,
+        image_url=image_url or YANDEX_LOGO_ASSET,
+    )
+    return _HEADER.pack(DiscordIPCClient.OP_FRAME, len(body)), body
+
+
+def measure(encode: Callable[[Track, str], Tuple[bytes, ...]], tracks: List[Track], iterations: int,
+            sock: Optional[socket.socket] = None) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        chunks = encode(tracks[i % len(tracks)], str(i))
+        if sock is not None:
+            if len(chunks) == 1:
+                sock.sendall(chunks[0])
+            else:
+                sock.sendmsg(chunks)
+    return (time.perf_counter() - start) / iterations
+
+
+def drain(sock: socket.socket) -> None:
+    while sock.recv(1 << 16):
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100_000)
+    parser.add_argument("--tracks", type=int, default=100)
+    args = parser.parse_args()
+
+    tracks = make_tracks(args.tracks)
+    # Check, that both paths produce the same frame
+    assert b''.join(encode_dict(tracks[0], "0")) == b''.join(encode_template(tracks[0], "0"))
+
+    writer, reader = socket.socketpair()
+    threading.Thread(target=drain, args=(reader,), daemon=True).start()
+
+    print(f"{'path':>9} {'encode us':>10} {'speedup':>8} {'encode+send us':>15} {'speedup':>8}")
+    baseline_encode: float = 0.0
+    baseline_send: float = 0.0
+    for name, encode in (("dict", encode_dict), ("template", encode_template)):
+        per_encode = measure(encode, tracks, args.iterations)
+        per_send = measure(encode, tracks, args.iterations, writer)
+        baseline_encode = baseline_encode or per_encode
+        baseline_send = baseline_send or per_send
+        print(
+            f"{name:>9} {per_encode * 1e6:>10.2f} {baseline_encode / per_encode:>7.1f}x "
+            f"{per_send * 1e6:>15.2f} {baseline_send / per_send:>7.1f}x"
+        )
+
+    writer.close()
+
+
+if __name__ == "__main__":
+    main()
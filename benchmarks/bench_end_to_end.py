@@ -0,0 +1,205 @@
+"""
+End-to-end benchmark of `ActivityManager` (`YandexListener` -> `YandexClient` -> `AsyncDiscordIPCClient`)
+against local stand-ins of Ynison, Yandex API and Discord IPC (see `stand_ins`), without network access.
+
+Synthetic session is played three times:
+1. throughput - frames are pushed as fast as possible: frames/s, HTTP calls per played track;
+2. latency - frames are pushed every `--interval` seconds with `RecordingTracer`:
+   p50/p99 from received frame to Discord ack (and by stage), p50/p99 of socket queueing;
+3. allocations - with `tracemalloc`: peak of memory allocated while handling one frame and retained memory.
+
+Discord rate limits are disabled by default (to measure the pipeline itself), `--rate-limit` enables them.
+
+Run from project root (Unix only, Discord stand-in listens on Unix socket):
+    python3 -m benchmarks.bench_end_to_end
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import time
+import tracemalloc
+from typing import List, Optional, Callable, Dict, Tuple
+
+from yamusicrpc import ActivityManager
+from yamusicrpc.data import DISCORD_CLIENT_ID, PREFETCH_DEPTH
+from yamusicrpc.discord import AsyncDiscordIPCClient, ActivityScheduler
+from yamusicrpc.metrics import RecordingTracer, set_tracer
+from yamusicrpc.yandex import YandexListener, YandexClient
+
+from .stand_ins import YnisonStandIn, YandexApiStandIn, DiscordStandIn, get_played_track_ids, percentiles
+from .ynison_frames import make_session
+
+STAGES = (
+    "ynison.decode", "ynison.from_ynison", "yandex.fill_track_info",
+    "discord.encode", "discord.write", "discord.ack",
+)
+
+
+class PassResult:
+    frames: int
+    elapsed: float
+    # Time from sending of frame by Ynison stand-in to its receiving by listener
+    queueing: List[float]
+    track_requests: int
+    requested_track_ids: int
+    activities: int
+
+    def __init__(self) -> None:
+        self.frames = 0
+        self.elapsed = 0.0
+        self.queueing = []
+        self.track_requests = 0
+        self.requested_track_ids = 0
+        self.activities = 0
+
+
+async def run_pass(
+        frames: List[str],
+        interval: float,
+        api_latency: float,
+        rate_limit: bool,
+        frame_hook: Optional[Callable[[str], None]] = None,
+) -> PassResult:
+    result = PassResult()
+    received_at: List[float] = []
+
+    def on_frame(data: str) -> None:
+        received_at.append(time.monotonic())
+        if frame_hook is not None:
+            frame_hook(data)
+
+    async with YnisonStandIn(frames, interval) as ynison, \
+            YandexApiStandIn(api_latency) as api, \
+            DiscordStandIn() as discord:
+        discord_ipc_client = AsyncDiscordIPCClient(DISCORD_CLIENT_ID, discord.path)
+        scheduler = (
+            ActivityScheduler(discord_ipc_client)
+            if rate_limit
+            else ActivityScheduler(discord_ipc_client, rate=1_000_000, per=1, min_interval=0)
+        )
+        client = YandexClient("benchmark", api_url=api.url, login_url=api.url)
+        manager = ActivityManager(
+            discord_ipc_client=discord_ipc_client,
+            yandex_listener=YandexListener(
+                "benchmark", queue_depth=PREFETCH_DEPTH, frame_hook=on_frame,
+                redirector_url=ynison.redirector_url, state_scheme="ws",
+            ),
+            yandex_client=client,
+            activity_scheduler=scheduler,
+        )
+        assert await client.get_username() == "Benchmark"
+
+        # Logs of every frame would take more time than the pipeline itself
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            task: asyncio.Task = asyncio.create_task(manager.start())
+            await ynison.wait_finished()
+            while len(received_at) < len(frames) and not task.done():
+                await asyncio.sleep(0.01)
+            await discord.wait_idle(idle=0.2, timeout=30 if not rate_limit else 120)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await discord_ipc_client.close()
+            await client.close()
+
+        result.frames = len(received_at)
+        result.elapsed = received_at[-1] - received_at[0] if received_at else 0.0
+        result.queueing = [received - sent for received, sent in zip(received_at, ynison.sent_at)]
+        result.track_requests = api.track_requests
+        result.requested_track_ids = api.requested_track_ids
+        result.activities = discord.activity_count
+    return result
+
+
+async def measure_latency(frames: List[str], args: argparse.Namespace) -> Tuple[PassResult, Dict[str, List[float]]]:
+    """
+    :return: Result of pass and durations of acknowledged updates by stage (`presence_update` - the whole one).
+    """
+    tracer = RecordingTracer(max_spans=len(frames) * 10)
+    set_tracer(tracer)
+    try:
+        result: PassResult = await run_pass(frames, args.interval, args.api_latency, args.rate_limit)
+    finally:
+        set_tracer(None)
+
+    # Updates, which were skipped, replaced by newer ones or not finished, are not counted
+    acked = {
+        id(span) for span in tracer.spans
+        if span.name == "presence_update" and not span.attributes.keys() & {"skipped", "coalesced"}
+        and span.exception is None
+    }
+    durations: Dict[str, List[float]] = {}
+    for span in tracer.spans:
+        root = span if span.parent is None else span.parent
+        if id(root) in acked:
+            durations.setdefault(span.name, []).append(span.duration)
+    return result, durations
+
+
+async def measure_allocations(frames: List[str], args: argparse.Namespace) -> Tuple[List[int], int]:
+    """
+    :return: Peak of memory allocated while handling each frame (including stand-ins, which run in the same process)
+        and memory retained by library after the pass.
+    """
+    peaks: List[int] = []
+    started_at: List[int] = []
+
+    def on_frame(_: str) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        if started_at:
+            peaks.append(peak - started_at[-1])
+        started_at.append(current)
+        tracemalloc.reset_peak()
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    await run_pass(frames, 0.0, args.api_latency, args.rate_limit, frame_hook=on_frame)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    library = (tracemalloc.Filter(True, "*yamusicrpc*"),)
+    retained: int = sum(
+        stat.size_diff for stat in after.filter_traces(library).compare_to(before.filter_traces(library), "filename")
+    )
+    return peaks, retained
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--queue-size", type=int, default=100)
+    parser.add_argument("--frames-per-track", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.005, help="seconds between frames in latency pass")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="seconds of every Yandex API response")
+    parser.add_argument("--rate-limit", action="store_true", help="keep Discord rate limits of ActivityScheduler")
+    args = parser.parse_args()
+
+    frames: List[str] = make_session(args.frames, args.queue_size, args.frames_per_track)
+    played_tracks: int = len(set(get_played_track_ids(frames)))
+    print(f"session: {len(frames)} frames, queue {args.queue_size}, {played_tracks} played tracks")
+
+    throughput: PassResult = asyncio.run(run_pass(frames, 0.0, args.api_latency, args.rate_limit))
+    print("\n[throughput]")
+    print(f"frames/s:             {throughput.frames / throughput.elapsed:.0f}")
+    print(f"HTTP calls per track: {throughput.track_requests / played_tracks:.2f} "
+          f"({throughput.requested_track_ids / max(throughput.track_requests, 1):.1f} ids per call)")
+    print(f"activities sent:      {throughput.activities}")
+
+    latency, durations = asyncio.run(measure_latency(frames, args))
+    print(f"\n[latency] frame every {args.interval * 1000:g} ms, {latency.activities} activities acknowledged")
+    print(f"{'stage':>24} {'p50 ms':>9} {'p99 ms':>9}")
+    for stage in ("presence_update", *STAGES):
+        p50, p99 = percentiles(durations.get(stage, []), 50, 99)
+        print(f"{stage:>24} {p50 * 1000:>9.3f} {p99 * 1000:>9.3f}")
+    p50, p99 = percentiles(latency.queueing, 50, 99)
+    print(f"{'socket queueing':>24} {p50 * 1000:>9.3f} {p99 * 1000:>9.3f}")
+
+    peaks, retained = asyncio.run(measure_allocations(frames, args))
+    peak_p50, peak_p99 = percentiles(peaks, 50, 99)
+    print("\n[allocations]")
+    print(f"peak per frame:       {peak_p50 / 1024:.1f} KB (p50), {peak_p99 / 1024:.1f} KB (p99)")
+    print(f"retained by library:  {retained / len(frames):.0f} B per frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Event loop wakeups of an idle listener (no messages from Ynison) and its shutdown latency:
+`YandexListener.listen_with_event` vs. the previous approach (polling of stop event with timeout).
+
+Run from project root:
+    python3 -m benchmarks.bench_idle_wakeups
+"""
+import argparse
+import asyncio
+import selectors
+import time
+from typing import AsyncIterator, Callable, Tuple
+
+from yamusicrpc.yandex import YandexListener
+
+
+class CountingSelector(selectors.DefaultSelector):
+    """
+    Selector, which counts how many times the loop woke up.
+    """
+    wakeups: int = 0
+
+    def select(self, timeout=None):
+        result = super().select(timeout)
+        self.wakeups += 1
+        return result
+
+
+class IdleWebSocket:
+    """
+    WebSocket stand-in, which never receives anything.
+    """
+
+    def __init__(self) -> None:
+        self.__never = asyncio.Event()
+
+    async def receive(self):
+        await self.__never.wait()
+
+
+async def polling_listen(ws: IdleWebSocket, stop_event: asyncio.Event, check_after: float) -> AsyncIterator[None]:
+    # Previous implementation of `listen_with_event`
+    while not stop_event.is_set():
+        try:
+            yield await asyncio.wait_for(ws.receive(), timeout=check_after)
+        except asyncio.TimeoutError:
+            continue
+
+
+def event_listen(ws: IdleWebSocket, stop_event: asyncio.Event, check_after: float) -> AsyncIterator[None]:
+    listener = YandexListener("benchmark")
+    listener._YandexListener__ws = ws
+    return listener.listen_with_event(stop_event)
+
+
+def run(listen: Callable, duration: float, check_after: float) -> Tuple[int, float]:
+    """
+    :return: Count of wakeups while idle and shutdown latency in seconds.
+    """
+    selector = CountingSelector()
+    loop = asyncio.SelectorEventLoop(selector)
+
+    async def main() -> Tuple[int, float]:
+        stop_event = asyncio.Event()
+
+        async def consume() -> None:
+            async for _ in listen(IdleWebSocket(), stop_event, check_after):
+                pass
+
+        task = asyncio.ensure_future(consume())
+        # Let listener start waiting
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+        wakeups_before: int = selector.wakeups
+        await asyncio.sleep(duration)
+        # Wakeup to finish sleep is not a listener wakeup
+        wakeups: int = selector.wakeups - wakeups_before - 1
+
+        stopped_at = time.perf_counter()
+        stop_event.set()
+        await task
+        return wakeups, time.perf_counter() - stopped_at
+
+    try:
+        return loop.run_until_complete(main())
+    finally:
+        loop.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10, help="Idle time to measure, seconds")
+    parser.add_argument("--check-after", type=float, default=5, help="Timeout of polling approach, seconds")
+    args = parser.parse_args()
+
+    print(f"{'approach':>10} {'wakeups':>8} {'wakeups/hour':>13} {'shutdown ms':>12}")
+    for name, listen in (("polling", polling_listen), ("event", event_listen)):
+        wakeups, shutdown = run(listen, args.duration, args.check_after)
+        print(f"{name:>10} {wakeups:>8} {wakeups * 3600 / args.duration:>13.0f} {shutdown * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
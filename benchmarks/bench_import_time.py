@@ -0,0 +1,132 @@
+"""
+Import time of `yamusicrpc` (e.g. autostart on login imports it on every boot).
+Every statement is run in a fresh interpreter with `-X importtime` (`--repeat` times, median),
+after one run to compile bytecode.
+
+Budgets (see `STATEMENTS`, scaled by `--budget-scale` for slower machines) are checked against own time
+of the library: sum of self times of `yamusicrpc` modules. It is steady between runs, unlike wall-clock time
+of the statement, which is mostly aiohttp and depends on load of machine (it is shown, but not checked).
+Heavy dependencies are guarded by module lists instead: fails (exit code 1), if the statement is over budget,
+imports the login stack (Flask, Werkzeug, requests, `yamusicrpc.server`, only needed for device-flow login),
+or `import yamusicrpc` imports aiohttp (subpackages are imported lazily).
+
+Run from project root:
+    python3 -m benchmarks.bench_import_time
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import List, Dict, Tuple
+
+# Statement and budget of own time of the library in ms (about 3x of the measured one)
+STATEMENTS = (
+    ("import yamusicrpc", 5.0),
+    ("from yamusicrpc import ActivityManager", 60.0),
+    ("from yamusicrpc import MultiActivityManager", 60.0),
+    ("from yamusicrpc.yandex import YandexListener, YandexClient", 30.0),
+)
+LOGIN_MODULES = ("flask", "werkzeug", "requests", "yamusicrpc.server")
+# Modules, which must not be imported by `import yamusicrpc`
+LAZY_MODULES = ("aiohttp",)
+
+_SCRIPT = """
+import json, sys, time
+started_at = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - started_at
+print(json.dumps({{"elapsed": elapsed, "modules": [m for m in {modules!r} if m in sys.modules]}}))
+"""
+
+
+def run(
+        statement: str,
+        importtime: bool = False,
+        modules: Tuple[str, ...] = LOGIN_MODULES,
+) -> Tuple[float, List[str], str]:
+    """
+    :param modules: Modules to check.
+    :return: Import time in seconds, imported `modules` and output of `-X importtime` (if requested).
+    """
+    command: List[str] = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", _SCRIPT.format(statement=statement, modules=modules)]
+    process = subprocess.run(command, capture_output=True, text=True, check=True)
+    result: Dict = json.loads(process.stdout.strip().splitlines()[-1])
+    return result["elapsed"], result["modules"], process.stderr
+
+
+def parse_importtime(importtime_output: str) -> List[Tuple[int, str]]:
+    """
+    :return: Self time in microseconds and name of every imported module.
+    """
+    result: List[Tuple[int, str]] = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        result.append((int(self_us), name.strip()))
+    return result
+
+
+def get_own_time(importtime_output: str) -> float:
+    """
+    :return: Sum of self times of `yamusicrpc` modules in ms.
+    """
+    return sum(
+        self_us for self_us, name in parse_importtime(importtime_output) if name.split(".")[0] == "yamusicrpc"
+    ) / 1000
+
+
+def get_slowest(importtime_output: str, count: int) -> List[Tuple[int, str]]:
+    """
+    :return: Modules with the largest self time in microseconds.
+    """
+    return sorted(parse_importtime(importtime_output), reverse=True)[:count]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="multiplier of budgets")
+    parser.add_argument("--top", type=int, default=0, help="show modules with the largest self time")
+    args = parser.parse_args()
+
+    is_failed: bool = False
+    print(f"{'statement':<58} {'total ms':>9} {'own ms':>7} {'budget ms':>10}")
+    for statement, budget in STATEMENTS:
+        budget *= args.budget_scale
+        checked: Tuple[str, ...] = LOGIN_MODULES + (LAZY_MODULES if statement == "import yamusicrpc" else ())
+        # Bytecode is compiled by the first run
+        run(statement)
+        times: List[float] = []
+        own_times: List[float] = []
+        modules: List[str] = []
+        importtime_output: str = ""
+        for _ in range(args.repeat):
+            elapsed, modules, importtime_output = run(statement, importtime=True, modules=checked)
+            times.append(elapsed * 1000)
+            own_times.append(get_own_time(importtime_output))
+
+        own: float = statistics.median(own_times)
+        print(f"{statement:<58} {statistics.median(times):>9.1f} {own:>7.1f} {budget:>10.0f}")
+        if own > budget:
+            print(f"  own time is over budget of {budget:g} ms")
+            is_failed = True
+        if modules:
+            print(f"  imports {', '.join(modules)}")
+            is_failed = True
+        if args.top:
+            for self_us, name in get_slowest(importtime_output, args.top):
+                print(f"  {self_us / 1000:>8.1f} ms  {name}")
+
+    if is_failed:
+        print("\nFAILED")
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Per-frame CPU time and allocations of Ynison state parsing (decode + `TrackInfo.from_ynison`)
+for every available decoder on different queue sizes.
+
+Run from project root:
+    python3 -m benchmarks.bench_ynison_parsing
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from typing import List
+
+from yamusicrpc.models import TrackInfo
+from yamusicrpc.utils import YnisonDecoder, get_ynison_decoder
+
+from .ynison_frames import make_state
+
+
+def get_decoders() -> List[YnisonDecoder]:
+    decoders: List[YnisonDecoder] = []
+    for name in ("json", "orjson", "msgspec"):
+        try:
+            decoders.append(get_ynison_decoder(name))
+        except ImportError:
+            print(f"[bench] Decoder '{name}' is not available, skipped")
+    return decoders
+
+
+def parse(decoder: YnisonDecoder, frame: str) -> TrackInfo:
+    return TrackInfo.from_ynison(decoder.decode(frame), queue_depth=3)
+
+
+def measure_time(decoder: YnisonDecoder, frame: str, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        parse(decoder, frame)
+    return (time.perf_counter() - start) / iterations
+
+
+def measure_peak_memory(decoder: YnisonDecoder, frame: str, iterations: int) -> int:
+    """
+    :return: Peak of memory (bytes) allocated while parsing one frame.
+    """
+    parse(decoder, frame)
+
+    peak: int = 0
+    tracemalloc.start()
+    for _ in range(iterations):
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        result = parse(decoder, frame)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+        del result
+    tracemalloc.stop()
+
+    return peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queue-sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    decoders = get_decoders()
+
+    print(f"{'queue':>6} {'decoder':>8} {'frame KB':>9} {'us/frame':>10} {'speedup':>8} {'peak KB':>9}")
+    for queue_size in args.queue_sizes:
+        frame: str = json.dumps(make_state(queue_size=queue_size, current_index=queue_size // 2))
+        iterations: int = max(10, args.iterations * 100 // max(queue_size, 100))
+
+        baseline: float = 0.0
+        for decoder in decoders:
+            per_frame = measure_time(decoder, frame, iterations)
+            baseline = baseline or per_frame
+            peak = measure_peak_memory(decoder, frame, min(iterations, 5))
+            print(
+                f"{queue_size:>6} {decoder.name:>8} {len(frame) / 1024:>9.1f} {per_frame * 1e6:>10.1f} "
+                f"{baseline / per_frame:>7.1f}x {peak / 1024:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
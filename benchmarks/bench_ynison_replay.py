@@ -0,0 +1,96 @@
+"""
+Offline throughput of the whole presence pipeline (`ActivityManager`) on recorded Ynison session:
+frames are replayed by `YnisonReplayListener`, track metadata is served from pre-filled cache
+and activity is sent to local Discord IPC stand-in (Unix socket), so no account or network is needed.
+
+Discord rate limits are disabled by default (every presence update is sent), `--rate-limit` enables them.
+
+Record session first (see `record_ynison_session`), then run from project root:
+    python3 -m benchmarks.bench_ynison_replay session.jsonl.gz           # as fast as possible
+    python3 -m benchmarks.bench_ynison_replay session.jsonl.gz --speed 1  # real time
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import time
+from typing import Optional
+
+from yamusicrpc import ActivityManager
+from yamusicrpc.cache import TrackCache
+from yamusicrpc.data import DISCORD_CLIENT_ID
+from yamusicrpc.discord import AsyncDiscordIPCClient, ActivityScheduler
+from yamusicrpc.metrics.pipeline import (
+    YNISON_FRAMES, YNISON_PARSE_SECONDS, TRACK_CHANGES, DISCORD_REQUESTS, PRESENCE_LATENCY_SECONDS,
+)
+from yamusicrpc.models import TrackMetadata, TrackEvent
+from yamusicrpc.yandex import YandexClient, YnisonReplayListener, read_ynison_log
+
+from .stand_ins import DiscordStandIn
+
+
+def make_track_cache(path: str) -> TrackCache:
+    """
+    Cache with metadata of all tracks from the log (so API is never requested).
+    """
+    cache = TrackCache(max_size=1_000_000)
+    for _, data in read_ynison_log(path):
+        queue: dict = json.loads(data).get("player_state", {}).get("player_queue", {})
+        for playable in queue.get("playable_list", []):
+            track_id: str = playable["playable_id"]
+            if cache.peek(track_id) is None:
+                cache.put(TrackMetadata(track_id, "Offline Artist", playable.get("album_id_optional")))
+    return cache
+
+
+async def replay(path: str, speed: Optional[float], rate_limit: bool) -> float:
+    """
+    :return: Wall time in seconds.
+    """
+    async with DiscordStandIn() as discord:
+        discord_ipc_client = AsyncDiscordIPCClient(DISCORD_CLIENT_ID, discord.path)
+        scheduler = (
+            ActivityScheduler(discord_ipc_client)
+            if rate_limit
+            else ActivityScheduler(discord_ipc_client, rate=1_000_000, per=1, min_interval=0)
+        )
+        manager = ActivityManager(
+            discord_ipc_client=discord_ipc_client,
+            yandex_listener=YnisonReplayListener(path, speed=speed),
+            yandex_client=YandexClient("offline", track_cache=make_track_cache(path)),
+            activity_scheduler=scheduler,
+        )
+        start: float = time.perf_counter()
+        # Logs of every frame would take more time than the pipeline itself
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            await manager.start()
+        elapsed: float = time.perf_counter() - start
+        await discord_ipc_client.close()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", help="log written by YnisonRecorder")
+    parser.add_argument("--speed", type=float, default=None, help="multiplier of recorded pace (default: max)")
+    parser.add_argument("--rate-limit", action="store_true", help="keep Discord rate limits of ActivityScheduler")
+    args = parser.parse_args()
+
+    elapsed: float = asyncio.run(replay(args.log, args.speed, args.rate_limit))
+
+    frames: float = YNISON_FRAMES.get()
+    parse_count: int = YNISON_PARSE_SECONDS.get_count()
+    latency_count: int = PRESENCE_LATENCY_SECONDS.get_count()
+    print(f"frames:              {frames:.0f}")
+    print(f"wall time:           {elapsed:.2f}s ({frames / elapsed:.0f} frames/s)")
+    print(f"parse:               {YNISON_PARSE_SECONDS.get_sum() / max(parse_count, 1) * 1e6:.1f} us/frame")
+    for event in TrackEvent:
+        print(f"{event.value + ':':<20} {TRACK_CHANGES.get(event=event.value):.0f}")
+    print(f"activities sent:     {DISCORD_REQUESTS.get(cmd='SET_ACTIVITY', result='ok'):.0f}")
+    if latency_count:
+        print(f"presence latency:    {PRESENCE_LATENCY_SECONDS.get_sum() / latency_count * 1000:.1f} ms (mean)")
+
+
+if __name__ == "__main__":
+    main()
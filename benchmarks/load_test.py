@@ -0,0 +1,207 @@
+"""
+Scaling load test of `MultiActivityManager`: N simulated accounts (listener + client + Discord connection each)
+in one process against local stand-ins of Ynison, Yandex API and Discord IPC. N is ramped by steps,
+and for each step the following is measured in the process under test:
+- RSS (total and per account);
+- frames/s and CPU time per frame;
+- event loop lag (p99 and max overshoot of 50 ms sleep);
+- presence latency (from received frame to Discord ack, p50/p99), including Discord rate limits.
+
+Stand-ins run in a separate process, so they don't take CPU and memory of the measured one.
+Ramp stops when loop lag p99 exceeds `--max-lag` (the process is saturated).
+
+Run from project root (Unix only, Discord stand-in listens on Unix socket):
+    python3 -m benchmarks.load_test --steps 1 10 50 100 250 500 --csv scaling.csv
+"""
+import argparse
+import asyncio
+import contextlib
+import csv
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from typing import List, Optional, Dict
+
+from yamusicrpc import MultiActivityManager, Account
+from yamusicrpc.metrics import Span, Tracer, NOOP_SPAN, set_tracer
+from yamusicrpc.metrics.pipeline import YNISON_FRAMES
+
+from .stand_ins import start_stand_ins_process, percentiles
+from .ynison_frames import make_session
+
+LAG_PROBE_INTERVAL = 0.05  # seconds
+
+COLUMNS = (
+    "accounts", "rss_mb", "rss_per_account_kb", "frames_per_s", "cpu_us_per_frame", "cpu_percent",
+    "lag_p99_ms", "lag_max_ms", "latency_p50_ms", "latency_p99_ms", "restarts",
+)
+
+
+class _LatencySpan(Span):
+    __slots__ = ("tracer", "start_time", "is_dropped", "is_ended")
+
+    def __init__(self, tracer: "PresenceLatencyTracer", start_time: float) -> None:
+        self.tracer = tracer
+        self.start_time = start_time
+        self.is_dropped = False
+        self.is_ended = False
+
+    def set_attribute(self, key: str, value) -> None:
+        # Updates without sent activity are not counted
+        if key in ("skipped", "coalesced"):
+            self.is_dropped = True
+
+    def record_exception(self, exception: BaseException) -> None:
+        self.is_dropped = True
+
+    def end(self, end_time: Optional[float] = None) -> None:
+        if not self.is_ended:
+            self.is_ended = True
+            if not self.is_dropped:
+                self.tracer.latencies.append((end_time or time.time()) - self.start_time)
+
+
+class PresenceLatencyTracer(Tracer):
+    """
+    Tracer, which only measures duration of acknowledged presence updates (stages are not traced).
+    """
+    enabled: bool = True
+
+    def __init__(self) -> None:
+        self.latencies: List[float] = []
+
+    def _start_span(self, name: str, parent: Span, start_time: float) -> Span:
+        if name != "presence_update":
+            return NOOP_SPAN
+        return _LatencySpan(self, start_time)
+
+
+def get_rss() -> int:
+    """
+    :return: Current resident set size of the process in bytes (peak one, if current is not available).
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        max_rss: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+async def probe_lag(samples: List[float]) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        started_at: float = loop.time()
+        await asyncio.sleep(LAG_PROBE_INTERVAL)
+        samples.append(loop.time() - started_at - LAG_PROBE_INTERVAL)
+
+
+async def ramp(args: argparse.Namespace, ynison_port: int, api_port: int, discord_path: str, out) -> List[Dict]:
+    tracer = PresenceLatencyTracer()
+    set_tracer(tracer)
+    manager = MultiActivityManager(
+        api_url=f"http://127.0.0.1:{api_port}",
+        login_url=f"http://127.0.0.1:{api_port}",
+        redirector_url=f"ws://127.0.0.1:{ynison_port}",
+        state_scheme="ws",
+    )
+    run_task: asyncio.Task = asyncio.create_task(manager.run())
+    lags: List[float] = []
+    lag_task: asyncio.Task = asyncio.create_task(probe_lag(lags))
+    await asyncio.sleep(0.5)
+    baseline_rss: int = get_rss()
+
+    rows: List[Dict] = []
+    try:
+        for count in args.steps:
+            while len(manager.accounts) < count:
+                index: int = len(manager.accounts)
+                manager.add_account(Account(f"account-{index}", f"token-{index}", discord_ipc_path=discord_path))
+                # Accounts connect gradually, as after restart of real host
+                if index % 10 == 9:
+                    await asyncio.sleep(0.05)
+            await asyncio.sleep(args.warmup)
+
+            lags.clear()
+            tracer.latencies.clear()
+            frames_before: float = YNISON_FRAMES.get()
+            cpu_before: float = time.process_time()
+            started_at: float = time.monotonic()
+            await asyncio.sleep(args.window)
+            elapsed: float = time.monotonic() - started_at
+            frames: float = YNISON_FRAMES.get() - frames_before
+            cpu: float = time.process_time() - cpu_before
+
+            rss: int = get_rss()
+            lag_p99, = percentiles(lags, 99)
+            latency_p50, latency_p99 = percentiles(tracer.latencies, 50, 99)
+            row: Dict = {
+                "accounts": count,
+                "rss_mb": round(rss / 2 ** 20, 1),
+                "rss_per_account_kb": round((rss - baseline_rss) / count / 1024, 1),
+                "frames_per_s": round(frames / elapsed, 1),
+                "cpu_us_per_frame": round(cpu / max(frames, 1) * 1e6, 1),
+                "cpu_percent": round(cpu / elapsed * 100, 1),
+                "lag_p99_ms": round(lag_p99 * 1000, 2),
+                "lag_max_ms": round(max(lags, default=0.0) * 1000, 2),
+                "latency_p50_ms": round(latency_p50 * 1000, 2),
+                "latency_p99_ms": round(latency_p99 * 1000, 2),
+                "restarts": sum(account.restart_count for account in manager.accounts),
+            }
+            rows.append(row)
+            print(" ".join(f"{row[column]:>{len(column)}}" for column in COLUMNS), file=out, flush=True)
+
+            if lag_p99 > args.max_lag:
+                print(f"Saturated at {count} accounts (loop lag p99 > {args.max_lag * 1000:g} ms)", file=out)
+                break
+    finally:
+        lag_task.cancel()
+        manager.stop()
+        await asyncio.gather(run_task, lag_task, return_exceptions=True)
+        set_tracer(None)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, nargs="+", default=[1, 10, 50, 100, 250, 500])
+    parser.add_argument("--window", type=float, default=10.0, help="seconds of measurement per step")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds after accounts are added")
+    parser.add_argument("--frame-interval", type=float, default=1.0, help="seconds between frames of one account")
+    parser.add_argument("--queue-size", type=int, default=100)
+    parser.add_argument("--api-latency", type=float, default=0.05, help="seconds of every Yandex API response")
+    parser.add_argument("--max-lag", type=float, default=0.1, help="loop lag p99 in seconds to stop ramp")
+    parser.add_argument("--csv", help="path to write scaling curve")
+    args = parser.parse_args()
+
+    frames: List[str] = make_session(200, args.queue_size)
+    tempdir: str = tempfile.mkdtemp()
+    discord_path: str = os.path.join(tempdir, "discord-ipc-0")
+
+    stand_ins, ports = start_stand_ins_process(frames, args.frame_interval, args.api_latency, discord_path)
+
+    out = sys.stdout
+    print(" ".join(COLUMNS), file=out, flush=True)
+    try:
+        # Logs of every frame would take more time than the pipeline itself
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            rows: List[Dict] = asyncio.run(ramp(args, *ports, discord_path, out))
+    finally:
+        stand_ins.terminate()
+        stand_ins.join()
+        shutil.rmtree(tempdir, ignore_errors=True)
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Scaling curve is written to {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
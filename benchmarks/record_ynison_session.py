@@ -0,0 +1,69 @@
+"""
+Record Ynison session to compressed log for offline replay (see `bench_ynison_replay`).
+
+Live session of real account (token from `--token`, `YANDEX_MUSIC_TOKEN` or browser login):
+    python3 -m benchmarks.record_ynison_session --out session.jsonl.gz --duration 600
+
+Synthetic session (e.g. with huge playlist queue), without account:
+    python3 -m benchmarks.record_ynison_session --out huge.jsonl.gz --synthetic 5000 --queue-size 10000
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+from typing import Optional
+
+from yamusicrpc.yandex import YandexListener, YandexTokenReceiver, YnisonRecorder
+
+from .ynison_frames import make_session
+
+TOKEN_ENV = "YANDEX_MUSIC_TOKEN"
+
+
+async def record_live(path: str, token: str, duration: Optional[float]) -> None:
+    with YnisonRecorder(path) as recorder:
+        async with YandexListener(token, frame_hook=recorder) as listener:
+            stop_event = asyncio.Event()
+            if duration is not None:
+                asyncio.get_running_loop().call_later(duration, stop_event.set)
+            try:
+                async for _ in listener.listen_with_event(stop_event):
+                    pass
+            except (KeyboardInterrupt, asyncio.CancelledError):
+                pass
+
+
+def record_synthetic(path: str, frames: int, queue_size: int, interval: float) -> None:
+    # Same format as `YnisonRecorder` writes, frames arrive every `interval` seconds
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        for i, data in enumerate(make_session(frames, queue_size)):
+            file.write(json.dumps({"t": round(i * interval, 6), "d": data}) + "\n")
+    print(f"Written {frames} synthetic frame(s) to {path}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True, help="path to log (gzip, JSON lines)")
+    parser.add_argument("--token", help=f"OAuth token of Yandex account (default: ${TOKEN_ENV} or browser login)")
+    parser.add_argument("--duration", type=float, help="seconds to record (default: until Ctrl+C)")
+    parser.add_argument("--synthetic", type=int, metavar="FRAMES", help="write synthetic session instead")
+    parser.add_argument("--queue-size", type=int, default=100, help="queue size of synthetic session")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between synthetic frames")
+    args = parser.parse_args()
+
+    if args.synthetic is not None:
+        record_synthetic(args.out, args.synthetic, args.queue_size, args.interval)
+        return
+
+    token: Optional[str] = args.token or os.environ.get(TOKEN_ENV) or YandexTokenReceiver().get_token()
+    if not token:
+        parser.error("Yandex token is required")
+    try:
+        asyncio.run(record_live(args.out, token, args.duration))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Soak test of `ActivityManager` for memory leaks: synthetic Ynison traffic for hours of simulated time
+(one frame per `--frame-period` simulated seconds) is pushed by local stand-ins as fast as it is handled.
+After warm-up (caches and pools are filled), `tracemalloc` snapshot and RSS are sampled every `--sample-every` frames.
+
+Fails (exit code 1), if growth of traced memory or RSS per 10k frames exceeds the budget,
+and reports call sites, where memory grew the most.
+
+Run from project root (Unix only, Discord stand-in listens on Unix socket):
+    python3 -m benchmarks.soak_test --hours 24
+"""
+import argparse
+import asyncio
+import contextlib
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+from typing import List, Optional, Tuple
+
+from yamusicrpc import ActivityManager
+from yamusicrpc.data import DISCORD_CLIENT_ID, PREFETCH_DEPTH
+from yamusicrpc.discord import AsyncDiscordIPCClient, ActivityScheduler
+from yamusicrpc.yandex import YandexListener, YandexClient
+
+from .load_test import get_rss
+from .stand_ins import start_stand_ins_process
+from .ynison_frames import make_session
+
+# Growth is reported per this count of frames
+FRAMES_UNIT = 10_000
+
+
+class Sample:
+    frame: int
+    rss: int
+    traced: int
+
+    def __init__(self, frame: int, rss: int, traced: int) -> None:
+        self.frame = frame
+        self.rss = rss
+        self.traced = traced
+
+
+class SoakMonitor:
+    """
+    Frame hook of listener, which samples memory every `sample_every` frames after `warmup` ones.
+    """
+
+    def __init__(self, total: int, warmup: int, sample_every: int, frame_period: float, out) -> None:
+        self.total = total
+        self.warmup = warmup
+        self.sample_every = sample_every
+        self.frame_period = frame_period
+        self.out = out
+        self.frame_count = 0
+        self.samples: List[Sample] = []
+        self.first_snapshot: Optional[tracemalloc.Snapshot] = None
+        self.last_snapshot: Optional[tracemalloc.Snapshot] = None
+        # Created on the running loop by `soak()` (before Python 3.10 event is bound to loop on creation)
+        self.done: Optional[asyncio.Event] = None
+
+    def __call__(self, _: str) -> None:
+        self.frame_count += 1
+        count: int = self.frame_count - self.warmup
+        if count >= 0 and count % self.sample_every == 0:
+            self.sample()
+        if self.frame_count >= self.total and self.done is not None:
+            self.done.set()
+
+    def sample(self) -> None:
+        # Previous snapshot is not counted, and only memory, which is not garbage, is (cycles are collected)
+        self.last_snapshot = None
+        gc.collect()
+        sample = Sample(self.frame_count, get_rss(), tracemalloc.get_traced_memory()[0])
+        self.samples.append(sample)
+        snapshot: tracemalloc.Snapshot = tracemalloc.take_snapshot().filter_traces(
+            # Allocations of tracemalloc itself and samples of this monitor
+            (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))
+        )
+        if self.first_snapshot is None:
+            self.first_snapshot = snapshot
+        self.last_snapshot = snapshot
+        print(
+            f"{sample.frame:>9} {sample.frame * self.frame_period / 3600:>10.2f} "
+            f"{sample.rss / 2 ** 20:>8.1f} {sample.traced / 1024:>10.1f}",
+            file=self.out, flush=True,
+        )
+
+
+async def soak(monitor: SoakMonitor, ynison_port: int, api_port: int, discord_path: str) -> None:
+    monitor.done = asyncio.Event()
+    discord_ipc_client = AsyncDiscordIPCClient(DISCORD_CLIENT_ID, discord_path)
+    manager = ActivityManager(
+        discord_ipc_client=discord_ipc_client,
+        yandex_listener=YandexListener(
+            "soak", queue_depth=PREFETCH_DEPTH, frame_hook=monitor,
+            redirector_url=f"ws://127.0.0.1:{ynison_port}", state_scheme="ws",
+        ),
+        yandex_client=YandexClient(
+            "soak", api_url=f"http://127.0.0.1:{api_port}", login_url=f"http://127.0.0.1:{api_port}",
+        ),
+        # Without rate limits every change goes through the whole pipeline
+        activity_scheduler=ActivityScheduler(discord_ipc_client, rate=1_000_000, per=1, min_interval=0),
+    )
+    task: asyncio.Task = asyncio.create_task(manager.start())
+    done: asyncio.Task = asyncio.create_task(monitor.done.wait())
+    await asyncio.wait((task, done), return_when=asyncio.FIRST_COMPLETED)
+    for pending in (task, done):
+        pending.cancel()
+    await asyncio.gather(task, done, return_exceptions=True)
+    await discord_ipc_client.close()
+    # Pipeline failed before the end (e.g. stand-in is not available)
+    if task.done() and not task.cancelled() and task.exception() is not None:
+        raise task.exception()
+
+
+def get_growth(samples: List[Sample]) -> Tuple[float, float]:
+    """
+    :return: Growth of RSS and traced memory in bytes per `FRAMES_UNIT` frames (least squares slope).
+    """
+    frames: List[int] = [sample.frame for sample in samples]
+    mean_frame: float = sum(frames) / len(frames)
+    variance: float = sum((frame - mean_frame) ** 2 for frame in frames) or 1.0
+
+    def slope(values: List[int]) -> float:
+        mean_value: float = sum(values) / len(values)
+        return sum((f - mean_frame) * (v - mean_value) for f, v in zip(frames, values)) / variance * FRAMES_UNIT
+
+    return slope([sample.rss for sample in samples]), slope([sample.traced for sample in samples])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, default=8.0, help="simulated hours of listening")
+    parser.add_argument("--frame-period", type=float, default=1.0, help="simulated seconds per frame")
+    parser.add_argument("--warmup", type=int, default=5_000, help="frames before the first sample")
+    parser.add_argument("--sample-every", type=int, default=2_500, help="frames between samples")
+    parser.add_argument("--queue-size", type=int, default=100)
+    parser.add_argument("--budget-traced-kb", type=float, default=64.0, help="max traced growth per 10k frames")
+    parser.add_argument("--budget-rss-kb", type=float, default=1024.0, help="max RSS growth per 10k frames")
+    parser.add_argument("--top", type=int, default=10, help="count of reported call sites")
+    parser.add_argument("--traceback", type=int, default=1, help="frames of stack to group call sites by")
+    args = parser.parse_args()
+
+    total: int = int(args.hours * 3600 / args.frame_period)
+    if total < args.warmup + 2 * args.sample_every:
+        parser.error("Too few frames for warm-up and two samples, increase --hours")
+
+    # One hour of listening (three-minute tracks), repeated by Ynison stand-in
+    session_frames: int = int(3600 / args.frame_period)
+    frames: List[str] = make_session(session_frames, args.queue_size, frames_per_track=max(1, int(180 / args.frame_period)))
+    tempdir: str = tempfile.mkdtemp()
+    discord_path: str = os.path.join(tempdir, "discord-ipc-0")
+    stand_ins, ports = start_stand_ins_process(frames, 0.0, 0.0, discord_path)
+
+    out = sys.stdout
+    monitor = SoakMonitor(total, args.warmup, args.sample_every, args.frame_period, out)
+    print(f"soak: {total} frames ({args.hours:g} simulated hours), sample every {args.sample_every} frames")
+    print(f"{'frame':>9} {'sim hours':>10} {'RSS MB':>8} {'traced KB':>10}", flush=True)
+    tracemalloc.start(args.traceback)
+    try:
+        # Logs of every frame would take more time than the pipeline itself
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            asyncio.run(soak(monitor, *ports, discord_path))
+    finally:
+        tracemalloc.stop()
+        stand_ins.terminate()
+        stand_ins.join()
+        shutil.rmtree(tempdir, ignore_errors=True)
+
+    rss_growth, traced_growth = get_growth(monitor.samples)
+    print(f"\ngrowth per {FRAMES_UNIT} frames: traced {traced_growth / 1024:.1f} KB "
+          f"(budget {args.budget_traced_kb:g}), RSS {rss_growth / 1024:.1f} KB (budget {args.budget_rss_kb:g})")
+
+    print(f"\ntop {args.top} growing call sites:")
+    group_by: str = "traceback" if args.traceback > 1 else "lineno"
+    stats = monitor.last_snapshot.compare_to(monitor.first_snapshot, group_by)
+    for stat in stats[:args.top]:
+        frame: tracemalloc.Frame = stat.traceback[-1]
+        print(f"{stat.size_diff / 1024:>+10.1f} KB {stat.count_diff:>+8} blocks  {frame.filename}:{frame.lineno}")
+        # The most recent call first
+        for line in stat.traceback.format(most_recent_first=True):
+            print(f"{'':>12}{line}")
+
+    if traced_growth / 1024 > args.budget_traced_kb or rss_growth / 1024 > args.budget_rss_kb:
+        print("\nFAILED: memory growth exceeds budget")
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
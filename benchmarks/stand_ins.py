@@ -0,0 +1,396 @@
+"""
+Local stand-ins of external services for benchmarks without network access:
+- `YnisonStandIn` - Ynison redirector and `PutYnisonState` WebSocket, which pushes given frames;
+- `YandexApiStandIn` - Yandex Music `/tracks` and `login.yandex.ru/info`;
+- `DiscordStandIn` - Discord IPC on Unix socket.
+
+Clients are pointed to them with `redirector_url`/`state_scheme` (`YandexListener`),
+`api_url`/`login_url` (`YandexClient`) and `path` (Discord IPC clients).
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import struct
+import tempfile
+import time
+from typing import List, Optional, Dict, Sequence, Tuple, Set
+
+from aiohttp import web, WSMsgType
+
+_HEADER = struct.Struct('<II')
+_HOST = "127.0.0.1"
+# Client sends auth and device info as WebSocket protocols (`Bearer, v2, {...}`)
+_YNISON_PROTOCOLS = ("Bearer",)
+
+
+class _HttpStandIn:
+    host: str
+    port: int
+
+    def __init__(self, host: str = _HOST, port: int = 0) -> None:
+        self.host = host
+        self.port = port
+        self.__runner: Optional[web.AppRunner] = None
+
+    def _setup(self, app: web.Application) -> None:
+        raise NotImplementedError
+
+    async def start(self) -> None:
+        app = web.Application()
+        self._setup(app)
+        self.__runner = web.AppRunner(app, access_log=None)
+        await self.__runner.setup()
+        await web.TCPSite(self.__runner, self.host, self.port).start()
+        # Real port, if any free port was requested
+        self.port = self.__runner.addresses[0][1]
+
+    async def close(self) -> None:
+        if self.__runner is not None:
+            await self.__runner.cleanup()
+            self.__runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+
+class YnisonStandIn(_HttpStandIn):
+    """
+    Ynison redirector (redirects to itself) and state service, which pushes `frames` to every connection
+    (one frame per `interval` seconds) and then keeps connection open (or starts again, if `repeat`).
+
+    Failures for reconnect tests: `close_connections()` (server restart), `expire_tickets()` (stale redirect
+    ticket is rejected with 400) and `reject_status` (every state connection is rejected, e.g. 401 for revoked token).
+    """
+    frames: Sequence[str]
+    interval: float
+    repeat: bool
+    # HTTP status to reject state connections with (`None` - accept)
+    reject_status: Optional[int]
+
+    redirect_count: int
+    connection_count: int
+    rejected_count: int
+    # Redirect ticket of each state connection (including rejected ones)
+    tickets: List[Optional[str]]
+    # Time (`time.monotonic()`) when each frame was sent (of all connections)
+    sent_at: List[float]
+
+    def __init__(
+            self,
+            frames: Sequence[str],
+            interval: float = 0.0,
+            repeat: bool = False,
+            host: str = _HOST,
+            port: int = 0,
+    ) -> None:
+        super().__init__(host, port)
+        self.frames = frames
+        self.interval = interval
+        self.repeat = repeat
+        self.reject_status = None
+        self.redirect_count = 0
+        self.connection_count = 0
+        self.rejected_count = 0
+        self.tickets = []
+        self.sent_at = []
+        self.__expired_tickets: Set[str] = set()
+        self.__connections: Set[web.WebSocketResponse] = set()
+        self.__finished: int = 0
+        self.__finished_event = asyncio.Event()
+
+    @property
+    def redirector_url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    def _setup(self, app: web.Application) -> None:
+        app.router.add_get("/redirector.YnisonRedirectService/GetRedirectToYnison", self.__redirect)
+        app.router.add_get("/ynison_state.YnisonStateService/PutYnisonState", self.__state)
+
+    async def __redirect(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(protocols=_YNISON_PROTOCOLS)
+        await ws.prepare(request)
+        self.redirect_count += 1
+        await ws.send_str(json.dumps({
+            "host": f"{self.host}:{self.port}",
+            "redirect_ticket": f"ticket-{self.redirect_count}",
+        }))
+        await ws.close()
+        return ws
+
+    def expire_tickets(self) -> None:
+        """
+        Reject redirect tickets issued so far (client must take new redirect).
+        """
+        self.__expired_tickets.update(f"ticket-{number}" for number in range(1, self.redirect_count + 1))
+
+    async def close_connections(self) -> None:
+        """
+        Close all state connections from server side.
+        """
+        await asyncio.gather(*(ws.close() for ws in list(self.__connections)))
+
+    @staticmethod
+    def __get_ticket(request: web.Request) -> Optional[str]:
+        # `Bearer, v2, {"Ynison-Device-Id": ..., "Ynison-Redirect-Ticket": ...}`
+        parts: List[str] = request.headers.get("Sec-WebSocket-Protocol", "").split(", ", 2)
+        return json.loads(parts[2]).get("Ynison-Redirect-Ticket") if len(parts) == 3 else None
+
+    async def __state(self, request: web.Request) -> web.StreamResponse:
+        ticket: Optional[str] = self.__get_ticket(request)
+        self.tickets.append(ticket)
+        if self.reject_status is not None or ticket in self.__expired_tickets:
+            self.rejected_count += 1
+            return web.Response(status=self.reject_status or 400)
+
+        ws = web.WebSocketResponse(protocols=_YNISON_PROTOCOLS)
+        await ws.prepare(request)
+        self.connection_count += 1
+        self.__connections.add(ws)
+        try:
+            return await self.__push_frames(ws)
+        finally:
+            self.__connections.discard(ws)
+
+    async def __push_frames(self, ws: web.WebSocketResponse) -> web.WebSocketResponse:
+        # Initial state of the client
+        await ws.receive()
+
+        # Closing by client is answered while frames are still sent (otherwise client waits for it forever)
+        receiving: asyncio.Task = asyncio.create_task(self.__receive(ws))
+        frames: Sequence[str] = self.frames
+        if self.repeat:
+            # Connections are not synchronized, as of real accounts (each one starts at random point of session)
+            start: int = random.randrange(len(frames))
+            frames = [*frames[start:], *frames[:start]]
+            await asyncio.sleep(random.uniform(0, self.interval))
+        try:
+            while True:
+                for frame in frames:
+                    if ws.closed:
+                        break
+                    await ws.send_str(frame)
+                    if not self.repeat:
+                        self.sent_at.append(time.monotonic())
+                    await asyncio.sleep(self.interval)
+                if not self.repeat or ws.closed:
+                    break
+        except ConnectionError:
+            # Client has gone
+            receiving.cancel()
+            return ws
+
+        self.__finished += 1
+        self.__finished_event.set()
+        await receiving
+        return ws
+
+    @staticmethod
+    async def __receive(ws: web.WebSocketResponse) -> None:
+        async for msg in ws:
+            if msg.type == WSMsgType.CLOSE:
+                break
+
+    async def wait_finished(self, connections: int = 1) -> None:
+        """
+        Wait until all frames are sent to `connections` connections.
+        """
+        while self.__finished < connections:
+            self.__finished_event.clear()
+            await self.__finished_event.wait()
+
+
+class YandexApiStandIn(_HttpStandIn):
+    """
+    Yandex Music `/tracks` (metadata for any requested id) and profile `/info`, optionally with latency.
+    """
+    latency: float
+
+    track_requests: int
+    requested_track_ids: int
+    info_requests: int
+
+    def __init__(self, latency: float = 0.0, host: str = _HOST, port: int = 0) -> None:
+        super().__init__(host, port)
+        self.latency = latency
+        self.track_requests = 0
+        self.requested_track_ids = 0
+        self.info_requests = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _setup(self, app: web.Application) -> None:
+        app.router.add_get("/tracks", self.__tracks)
+        app.router.add_get("/info", self.__info)
+
+    async def __tracks(self, request: web.Request) -> web.Response:
+        track_ids: List[str] = [i for i in request.query.get("track_ids", "").split(",") if i]
+        self.track_requests += 1
+        self.requested_track_ids += len(track_ids)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        return web.json_response({"result": [
+            {
+                "id": track_id,
+                "title": f"Track {track_id}",
+                "artists": [{"name": f"Artist {int(track_id) % 97}"}],
+                "albums": [{"id": int(track_id) // 10}],
+                "coverUri": f"avatars.yandex.net/get-music-content/{track_id}/cover/%%",
+            }
+            for track_id in track_ids
+        ]})
+
+    async def __info(self, request: web.Request) -> web.Response:
+        self.info_requests += 1
+        return web.json_response({"login": "benchmark", "display_name": "Benchmark"})
+
+
+class DiscordStandIn:
+    """
+    Discord IPC on Unix socket: answers handshake with READY and every command with its nonce.
+    """
+    path: str
+
+    activity_count: int
+    # Time (`time.monotonic()`) when the last activity was received
+    last_activity_at: Optional[float]
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        """
+        :param path: Path to socket. Defaults to `discord-ipc-0` in new temporary directory.
+        """
+        self.__tempdir: Optional[str] = None
+        if path is None:
+            self.__tempdir = tempfile.mkdtemp()
+            path = os.path.join(self.__tempdir, "discord-ipc-0")
+        self.path = path
+        self.activity_count = 0
+        self.last_activity_at = None
+        self.__server: Optional[asyncio.AbstractServer] = None
+        self.__handlers: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        self.__server = await asyncio.start_unix_server(self.__handle, self.path)
+
+    async def close(self) -> None:
+        # Handlers are finished before loop is closed
+        for task in self.__handlers:
+            task.cancel()
+        await asyncio.gather(*self.__handlers, return_exceptions=True)
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+            self.__server = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        if self.__tempdir is not None:
+            shutil.rmtree(self.__tempdir, ignore_errors=True)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def __handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task: asyncio.Task = asyncio.current_task()
+        self.__handlers.add(task)
+        try:
+            while True:
+                opcode, length = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+                data: dict = json.loads(await reader.readexactly(length))
+                if opcode == 0:
+                    response: dict = {"cmd": "DISPATCH", "evt": "READY", "data": {"user": {"username": "benchmark"}}}
+                elif opcode == 3:
+                    # PING -> PONG
+                    writer.write(_HEADER.pack(4, length) + json.dumps(data).encode('utf-8'))
+                    continue
+                else:
+                    if data.get("cmd") == "SET_ACTIVITY":
+                        self.activity_count += 1
+                        self.last_activity_at = time.monotonic()
+                    response = {"cmd": data.get("cmd"), "evt": None, "data": {}, "nonce": data.get("nonce")}
+                body: bytes = json.dumps(response).encode('utf-8')
+                writer.write(_HEADER.pack(1, len(body)) + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.__handlers.discard(task)
+            writer.close()
+
+    async def wait_idle(self, idle: float, timeout: float) -> None:
+        """
+        Wait until no activity is received for `idle` seconds (but not longer than `timeout`).
+        """
+        deadline: float = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            last: float = self.last_activity_at or 0.0
+            if time.monotonic() - last >= idle:
+                return
+            await asyncio.sleep(idle / 4)
+
+
+def _serve_stand_ins(frames: Sequence[str], interval: float, api_latency: float, discord_path: str, connection) -> None:
+    async def serve() -> None:
+        async with YnisonStandIn(frames, interval, repeat=True) as ynison, \
+                YandexApiStandIn(api_latency) as api, \
+                DiscordStandIn(discord_path):
+            connection.send((ynison.port, api.port))
+            await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+def start_stand_ins_process(
+        frames: Sequence[str],
+        interval: float,
+        api_latency: float,
+        discord_path: str,
+) -> Tuple[multiprocessing.Process, Tuple[int, int]]:
+    """
+    Run all stand-ins (Ynison repeats `frames`) in a separate process, so they don't take CPU and memory
+    of the measured one. The process is served until terminated.
+
+    :return: Process and ports of Ynison and Yandex API stand-ins.
+    """
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(
+        target=_serve_stand_ins, args=(frames, interval, api_latency, discord_path, sender), daemon=True,
+    )
+    process.start()
+    return process, receiver.recv()
+
+
+def get_played_track_ids(frames: Sequence[str]) -> List[str]:
+    """
+    :return: Ids of current tracks of frames (in order, without repeats in a row).
+    """
+    result: List[str] = []
+    for frame in frames:
+        queue: Dict = json.loads(frame)["player_state"]["player_queue"]
+        index: int = queue["current_playable_index"]
+        track_id: str = queue["playable_list"][index]["playable_id"] if index >= 0 else ""
+        if not result or result[-1] != track_id:
+            result.append(track_id)
+    return result
+
+
+def percentiles(values: Sequence[float], *ps: float) -> Tuple[float, ...]:
+    """
+    :return: Percentiles (nearest rank) of values, `nan` if there are no values.
+    """
+    if not values:
+        return tuple(float("nan") for _ in ps)
+    ordered: List[float] = sorted(values)
+    return tuple(ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] for p in ps)
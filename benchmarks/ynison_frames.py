@@ -0,0 +1,96 @@
+import json
+import random
+from typing import Dict, List, Optional
+
+
+def make_playable(track_id: int) -> Dict:
+    return {
+        "playable_id": str(track_id),
+        "album_id_optional": str(track_id // 10),
+        "playable_type": "TRACK",
+        "from": "web-own_tracks-track-track-main",
+        "title": f"Track {track_id}",
+        "cover_url_optional": f"avatars.yandex.net/get-music-content/{track_id}/a1b2c3d4.a.{track_id // 10}-1/%%",
+        "navigation_id_optional": "d1c2b3a4",
+        "track_info": {
+            "track_source_key": "own",
+            "batch_id_optional": "",
+        },
+    }
+
+
+def make_state(
+        queue_size: int = 100,
+        current_index: int = 0,
+        paused: bool = False,
+        progress_ms: int = 0,
+        duration_ms: int = 200_000,
+        entity_id: str = "playlist-1",
+        first_track_id: int = 1_000_000,
+        version: int = 1,
+) -> Dict:
+    """
+    Synthetic Ynison state (`PutYnisonState` response) with the same structure as the real one.
+    """
+    device_id: str = "benchmarkdevice01"
+    return {
+        "player_state": {
+            "player_queue": {
+                "current_playable_index": current_index,
+                "entity_id": entity_id,
+                "entity_type": "PLAYLIST",
+                "playable_list": [make_playable(first_track_id + i) for i in range(queue_size)],
+                "options": {"repeat_mode": "NONE"},
+                "entity_context": "BASED_ON_ENTITY_BY_DEFAULT",
+                "version": {"device_id": device_id, "version": str(version), "timestamp_ms": "0"},
+                "from_optional": "",
+                "shuffle_optional": None,
+            },
+            "status": {
+                "duration_ms": str(duration_ms),
+                "paused": paused,
+                "playback_speed": 1,
+                "progress_ms": str(progress_ms),
+                "version": {"device_id": device_id, "version": str(version), "timestamp_ms": "0"},
+            },
+        },
+        "devices": [
+            {
+                "capabilities": {"can_be_player": True, "can_be_remote_controller": False, "volume_granularity": 16},
+                "info": {"device_id": device_id, "type": "WEB", "title": "Chrome Browser", "app_name": "Chrome"},
+                "volume_info": {"volume": 0},
+                "is_offline": False,
+            }
+        ],
+        "active_device_id_optional": device_id,
+        "timestamp_ms": "0",
+        "rid": "ac281c26-a047-4419-ad00-e4fbfda1cba3",
+    }
+
+
+def make_session(
+        frames: int = 1000,
+        queue_size: int = 100,
+        frames_per_track: int = 20,
+        seed: Optional[int] = 0,
+) -> List[str]:
+    """
+    Synthetic listening session: progress pings, pauses, seeks and track changes (as raw JSON frames).
+    """
+    rnd = random.Random(seed)
+    result: List[str] = []
+    index, progress, paused = 0, 0, False
+
+    for i in range(frames):
+        if i and i % frames_per_track == 0:
+            index, progress = (index + 1) % queue_size, 0
+        elif rnd.random() < 0.05:
+            paused = not paused
+        elif rnd.random() < 0.05:
+            progress = rnd.randrange(0, 200_000)
+        elif not paused:
+            progress += 1000
+
+        result.append(json.dumps(make_state(queue_size, index, paused, progress)))
+
+    return result
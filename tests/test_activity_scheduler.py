@@ -0,0 +1,149 @@
+import asyncio
+import time
+import unittest
+from typing import List, Optional
+
+from yamusicrpc.discord import ActivityScheduler
+from yamusicrpc.exceptions import DiscordProcessNotFoundError
+
+
+class FakeDiscordClient:
+    """
+    Discord client, which records sent activities (with time of sending).
+    """
+
+    def __init__(self, error: Optional[Exception] = None) -> None:
+        self.activities: List[dict] = []
+        self.sent_at: List[float] = []
+        self.yandex_music_activities: List[dict] = []
+        self.error = error
+
+    async def set_activity(self, activity: dict) -> None:
+        if self.error is not None:
+            raise self.error
+        self.activities.append(activity)
+        self.sent_at.append(time.monotonic())
+
+    async def set_yandex_music_activity(self, **fields) -> None:
+        self.yandex_music_activities.append(fields)
+
+
+def make_activity(title: str, start: int = 1000) -> dict:
+    return {"details": title, "timestamps": {"start": start, "end": start + 200}}
+
+
+class ActivitySchedulerTest(unittest.IsolatedAsyncioTestCase):
+    def make_scheduler(self, client: FakeDiscordClient, **kwargs) -> ActivityScheduler:
+        kwargs = {"rate": 1000, "per": 1, "min_interval": 0, **kwargs}
+        scheduler = ActivityScheduler(client, **kwargs)
+        self.addAsyncCleanup(scheduler.close)
+        return scheduler
+
+    async def test_burst_is_coalesced_to_latest(self):
+        client = FakeDiscordClient()
+        scheduler = self.make_scheduler(client)
+
+        for title in ("first", "second", "third"):
+            scheduler.submit(make_activity(title))
+        await scheduler.flush()
+
+        self.assertEqual([activity["details"] for activity in client.activities], ["third"])
+        self.assertEqual(scheduler.coalesced_count, 2)
+
+    async def test_same_activity_is_skipped(self):
+        client = FakeDiscordClient()
+        scheduler = self.make_scheduler(client, timestamp_tolerance=2)
+
+        scheduler.submit(make_activity("track"))
+        await scheduler.flush()
+        # Timestamps drift by progress rounding
+        scheduler.submit(make_activity("track", start=1001))
+        await scheduler.flush()
+
+        self.assertEqual(len(client.activities), 1)
+        self.assertEqual(scheduler.skipped_count, 1)
+
+    async def test_changed_activity_is_sent(self):
+        client = FakeDiscordClient()
+        scheduler = self.make_scheduler(client, timestamp_tolerance=2)
+
+        for activity in (make_activity("track"), make_activity("track", start=1010), make_activity("other")):
+            scheduler.submit(activity)
+            await scheduler.flush()
+
+        self.assertEqual(len(client.activities), 3)
+        self.assertEqual(scheduler.skipped_count, 0)
+
+    async def test_rate_is_limited_by_token_bucket(self):
+        client = FakeDiscordClient()
+        # Two activities at once, then one per 0.1 s
+        scheduler = self.make_scheduler(client, rate=2, per=0.2)
+
+        for index in range(4):
+            scheduler.submit(make_activity(f"track {index}"))
+            await scheduler.flush()
+
+        intervals = [b - a for a, b in zip(client.sent_at, client.sent_at[1:])]
+        self.assertLess(intervals[0], 0.05)
+        self.assertGreaterEqual(intervals[1], 0.08)
+        self.assertGreaterEqual(intervals[2], 0.08)
+
+    async def test_min_interval_between_activities(self):
+        client = FakeDiscordClient()
+        scheduler = self.make_scheduler(client, min_interval=0.1)
+
+        for index in range(3):
+            scheduler.submit(make_activity(f"track {index}"))
+            await scheduler.flush()
+
+        intervals = [b - a for a, b in zip(client.sent_at, client.sent_at[1:])]
+        self.assertTrue(all(interval >= 0.09 for interval in intervals), intervals)
+
+    async def test_updates_while_waiting_replace_pending(self):
+        client = FakeDiscordClient()
+        scheduler = self.make_scheduler(client, min_interval=0.1)
+
+        scheduler.submit(make_activity("first"))
+        await scheduler.flush()
+        scheduler.submit(make_activity("second"))
+        await asyncio.sleep(0.02)
+        scheduler.submit(make_activity("third"))
+        await scheduler.flush()
+
+        self.assertEqual([activity["details"] for activity in client.activities], ["first", "third"])
+
+    async def test_yandex_music_activity_is_sent_with_fields(self):
+        client = FakeDiscordClient()
+        scheduler = self.make_scheduler(client)
+
+        scheduler.submit_yandex_music_activity("Title", "Artist", 1000, 1200, "https://music.yandex.ru/track/1")
+        await scheduler.flush()
+
+        self.assertEqual(len(client.yandex_music_activities), 1)
+        self.assertEqual(client.yandex_music_activities[0]["title"], "Title")
+
+    async def test_error_is_raised_by_next_submit(self):
+        client = FakeDiscordClient(error=DiscordProcessNotFoundError())
+        scheduler = self.make_scheduler(client)
+
+        scheduler.submit(make_activity("track"))
+        await scheduler.flush()
+
+        with self.assertRaises(DiscordProcessNotFoundError):
+            scheduler.submit(make_activity("track"))
+
+    async def test_error_is_passed_to_callback(self):
+        errors: List[Exception] = []
+        client = FakeDiscordClient(error=DiscordProcessNotFoundError())
+        scheduler = self.make_scheduler(client, on_error=errors.append)
+
+        scheduler.submit(make_activity("track"))
+        await scheduler.flush()
+        scheduler.submit(make_activity("track"))
+        await scheduler.flush()
+
+        self.assertEqual(len(errors), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
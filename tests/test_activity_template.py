@@ -0,0 +1,79 @@
+import json
+import unittest
+
+from yamusicrpc.discord.activity_template import PayloadTemplate
+from yamusicrpc.discord.discord_ipc_client import (
+    DiscordIPCClient, YANDEX_MUSIC_ACTIVITY_TEMPLATE, YANDEX_LOGO_ASSET,
+)
+
+VALUES = (
+    "plain",
+    "",
+    "Песня номер 1",
+    'quotes " and \\ backslash',
+    "control \n\t\r\x00\x1f",
+    "emoji 🎵 outside BMP",
+    "${title}",
+    0,
+    -42,
+    2 ** 63,
+    1.5,
+    True,
+    None,
+    ["list", 1],
+    {"nested": "dict"},
+)
+
+
+class PayloadTemplateTest(unittest.TestCase):
+    def test_render_is_same_as_json_dumps(self):
+        template = PayloadTemplate({"cmd": "SET", "args": {"value": PayloadTemplate.field("value")}, "n": 1})
+
+        for value in VALUES:
+            with self.subTest(value=value):
+                expected = json.dumps({"cmd": "SET", "args": {"value": value}, "n": 1}).encode('utf-8')
+                self.assertEqual(template.render(value=value), expected)
+
+    def test_fields_in_order(self):
+        template = PayloadTemplate({
+            "b": PayloadTemplate.field("b"), "a": [PayloadTemplate.field("a"), "const"], "c": PayloadTemplate.field("b"),
+        })
+
+        self.assertEqual(template.fields, ["b", "a", "b"])
+        self.assertEqual(template.render(a="x", b=2), json.dumps({"b": 2, "a": ["x", "const"], "c": 2}).encode())
+
+    def test_template_without_fields(self):
+        payload = {"cmd": "PING", "args": {}}
+
+        self.assertEqual(PayloadTemplate(payload).render(), json.dumps(payload).encode('utf-8'))
+
+    def test_missing_field_is_error(self):
+        template = PayloadTemplate({"value": PayloadTemplate.field("value")})
+
+        with self.assertRaises(KeyError):
+            template.render()
+
+    def test_yandex_music_activity(self):
+        fields = {
+            "title": 'Track "1" — Песня', "artists": "Artist\\Исполнитель", "start": 1_700_000_000,
+            "end": 1_700_000_200, "url": "https://music.yandex.ru/album/1/track/2",
+        }
+
+        for image_url in ("https://avatars.yandex.net/cover.png", None):
+            with self.subTest(image_url=image_url):
+                body = YANDEX_MUSIC_ACTIVITY_TEMPLATE.render(
+                    pid=123, nonce="abc", image_url=image_url or YANDEX_LOGO_ASSET, **fields,
+                )
+                expected = json.dumps({
+                    "cmd": "SET_ACTIVITY",
+                    "args": {
+                        "pid": 123,
+                        "activity": DiscordIPCClient.build_yandex_music_activity(image_url=image_url, **fields),
+                    },
+                    "nonce": "abc",
+                }).encode('utf-8')
+                self.assertEqual(body, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,273 @@
+import asyncio
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+import unittest
+from typing import Optional, List, Callable
+
+from benchmarks.stand_ins import DiscordStandIn
+from yamusicrpc.discord import AsyncDiscordIPCClient
+from yamusicrpc.exceptions import DiscordProcessNotFoundError, DiscordIPCError
+
+_HEADER = struct.Struct('<II')
+
+
+class FakeDiscord:
+    """
+    Discord IPC on Unix socket with scripted commands:
+    - `ECHO` is answered with its args after `args["delay"]` seconds (so responses can come out of order);
+    - `FAIL` is answered with ERROR event;
+    - `HANG` is never answered;
+    - `DROP` closes connection.
+    PING is answered with PONG only if `answer_ping` is set.
+    Frames are written in chunks of `chunk_size` bytes (with yield to event loop between them).
+    """
+
+    def __init__(
+            self,
+            path: str,
+            chunk_size: Optional[int] = None,
+            answer_handshake: bool = True,
+            answer_ping: bool = True,
+    ) -> None:
+        self.path = path
+        self.chunk_size = chunk_size
+        self.answer_handshake = answer_handshake
+        self.answer_ping = answer_ping
+        self.connection_count = 0
+        self.commands: List[str] = []
+        self.__server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self.__server = await asyncio.start_unix_server(self.__handle, self.path)
+
+    async def close(self) -> None:
+        self.__server.close()
+        await self.__server.wait_closed()
+
+    async def __write(self, writer: asyncio.StreamWriter, opcode: int, payload: dict) -> None:
+        body: bytes = json.dumps(payload).encode('utf-8')
+        frame: bytes = _HEADER.pack(opcode, len(body)) + body
+        size: int = self.chunk_size or len(frame)
+        for start in range(0, len(frame), size):
+            writer.write(frame[start:start + size])
+            await writer.drain()
+            await asyncio.sleep(0.001)
+
+    async def __handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        tasks: List[asyncio.Task] = []
+        self.connection_count += 1
+        try:
+            while True:
+                opcode, length = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+                data: dict = json.loads(await reader.readexactly(length))
+                if opcode == 0:
+                    if self.answer_handshake:
+                        await self.__write(writer, 1, {"evt": "READY", "data": {"user": {"username": "test"}}})
+                    continue
+                if opcode == 3:
+                    if self.answer_ping:
+                        await self.__write(writer, 4, data)
+                    continue
+
+                cmd: str = data["cmd"]
+                self.commands.append(cmd)
+                if cmd == "ECHO":
+                    tasks.append(asyncio.ensure_future(self.__echo(writer, data)))
+                elif cmd == "FAIL":
+                    await self.__write(writer, 1, {
+                        "cmd": cmd, "evt": "ERROR", "data": {"code": 4000, "message": "Invalid payload"},
+                        "nonce": data["nonce"],
+                    })
+                elif cmd == "DROP":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def __echo(self, writer: asyncio.StreamWriter, data: dict) -> None:
+        await asyncio.sleep(data["args"].get("delay", 0))
+        await self.__write(writer, 1, {"cmd": "ECHO", "evt": None, "data": data["args"], "nonce": data["nonce"]})
+
+
+@unittest.skipIf(sys.platform == 'win32', "Discord stand-in listens on Unix socket")
+class AsyncDiscordIPCClientTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.path = os.path.join(folder.name, "discord-ipc-0")
+
+    async def start(self, **kwargs) -> FakeDiscord:
+        server = FakeDiscord(self.path, **kwargs)
+        await server.start()
+        self.addAsyncCleanup(server.close)
+        return server
+
+    def make_client(self, **kwargs) -> AsyncDiscordIPCClient:
+        client = AsyncDiscordIPCClient("1", self.path, auto_reconnect=False, **kwargs)
+        self.addAsyncCleanup(client.close)
+        return client
+
+    async def test_frames_split_across_reads(self):
+        await self.start(chunk_size=3)
+        client = self.make_client()
+
+        handshake = await client.connect()
+
+        self.assertEqual(handshake["data"]["user"]["username"], "test")
+        self.assertEqual((await client.request("ECHO", {"value": "Песня"}))["data"], {"value": "Песня"})
+
+    async def test_responses_are_dispatched_by_nonce(self):
+        await self.start()
+        client = self.make_client()
+        await client.connect()
+
+        # The second request is answered first
+        slow, fast = await asyncio.gather(
+            client.request("ECHO", {"delay": 0.05, "value": "slow"}),
+            client.request("ECHO", {"delay": 0, "value": "fast"}),
+        )
+
+        self.assertEqual(slow["data"]["value"], "slow")
+        self.assertEqual(fast["data"]["value"], "fast")
+
+    async def test_error_event_raises_discord_ipc_error(self):
+        await self.start()
+        client = self.make_client()
+        await client.connect()
+
+        with self.assertRaises(DiscordIPCError):
+            await client.request("FAIL", {})
+        # Connection is still usable
+        self.assertEqual((await client.request("ECHO", {"value": 1}))["data"], {"value": 1})
+
+    async def test_request_timeout(self):
+        await self.start()
+        client = self.make_client(request_timeout=0.1)
+        await client.connect()
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await client.request("HANG", {})
+        self.assertEqual((await client.request("ECHO", {"value": 2}))["data"], {"value": 2})
+
+    async def test_pending_requests_fail_when_connection_is_lost(self):
+        await self.start()
+        client = self.make_client()
+        await client.connect()
+
+        pending = asyncio.ensure_future(client.request("ECHO", {"delay": 1}))
+        await asyncio.sleep(0.01)
+        with self.assertRaises(DiscordProcessNotFoundError):
+            await client.request("DROP", {})
+        with self.assertRaises(DiscordProcessNotFoundError):
+            await pending
+
+    async def test_handshake_timeout(self):
+        await self.start(answer_handshake=False)
+        client = self.make_client(request_timeout=0.1)
+
+        started_at: float = time.monotonic()
+        with self.assertRaises(DiscordProcessNotFoundError):
+            await client.connect()
+
+        self.assertLess(time.monotonic() - started_at, 1)
+        self.assertFalse(client.is_connected)
+
+
+async def wait_until(predicate: Callable[[], bool], timeout: float = 2) -> None:
+    deadline: float = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("Condition is not met in time")
+        await asyncio.sleep(0.01)
+
+
+@unittest.skipIf(sys.platform == 'win32', "Discord stand-in listens on Unix socket")
+class AsyncDiscordIPCClientKeepAliveTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.path = os.path.join(folder.name, "discord-ipc-0")
+        self.client = AsyncDiscordIPCClient(
+            "1", self.path, ping_interval=0.02, ping_timeout=0.1, reconnect_base_delay=0.01, reconnect_max_delay=0.05,
+        )
+        self.addAsyncCleanup(self.client.close)
+
+    async def start_stand_in(self) -> DiscordStandIn:
+        stand_in = DiscordStandIn(self.path)
+        await stand_in.start()
+        self.addAsyncCleanup(stand_in.close)
+        return stand_in
+
+    async def test_answered_pings_keep_connection(self):
+        await self.start_stand_in()
+        await self.client.connect()
+
+        await asyncio.sleep(0.2)
+
+        self.assertTrue(self.client.is_connected)
+        self.assertEqual(self.client.reconnect_count, 0)
+
+    async def test_hung_connection_is_reconnected(self):
+        server = FakeDiscord(self.path, answer_ping=False)
+        await server.start()
+        self.addAsyncCleanup(server.close)
+        await self.client.connect()
+
+        await wait_until(lambda: self.client.reconnect_count >= 1)
+
+        self.assertGreaterEqual(server.connection_count, 2)
+        self.assertTrue(self.client.is_kept_alive)
+
+    async def test_last_activity_is_replayed_once_after_restart(self):
+        stand_in = await self.start_stand_in()
+        await self.client.connect()
+        await self.client.set_yandex_music_activity("Title", "Artist", 1000, 1200, "https://music.yandex.ru")
+        self.assertEqual(stand_in.activity_count, 1)
+
+        await stand_in.close()
+        await wait_until(lambda: not self.client.is_connected)
+        restarted = await self.start_stand_in()
+        await wait_until(lambda: restarted.activity_count >= 1)
+        # Supervisor keeps pinging restored connection, but activity is not sent again
+        await asyncio.sleep(0.2)
+
+        self.assertEqual(self.client.reconnect_count, 1)
+        self.assertEqual(restarted.activity_count, 1)
+
+    async def test_activity_set_while_disconnected_is_sent_after_restart(self):
+        stand_in = await self.start_stand_in()
+        await self.client.connect()
+
+        await stand_in.close()
+        await wait_until(lambda: not self.client.is_connected)
+        self.assertIsNone(await self.client.set_activity({"details": "Title"}))
+        restarted = await self.start_stand_in()
+        await wait_until(lambda: restarted.activity_count >= 1)
+        await asyncio.sleep(0.2)
+
+        self.assertEqual(restarted.activity_count, 1)
+
+    async def test_cleared_activity_is_not_replayed(self):
+        stand_in = await self.start_stand_in()
+        await self.client.connect()
+        await self.client.set_activity({"details": "Title"})
+        await self.client.set_activity(None)
+
+        await stand_in.close()
+        await wait_until(lambda: not self.client.is_connected)
+        restarted = await self.start_stand_in()
+        await wait_until(lambda: self.client.reconnect_count == 1)
+        await asyncio.sleep(0.1)
+
+        self.assertEqual(restarted.activity_count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import time
+import unittest
+from typing import List
+
+from yamusicrpc.models import TrackInfo, TrackEvent, TrackChange
+from yamusicrpc.presence_pipeline import handle_track_change
+
+
+class FakeClient:
+    async def fill_track_info(self, track_info: TrackInfo) -> None:
+        track_info.artists = "Artist"
+        track_info.album_id = "10"
+        track_info.cover_url = "https://avatars.yandex.net/cover.png"
+
+
+class FakePrefetcher:
+    def __init__(self) -> None:
+        self.tracks: List[TrackInfo] = []
+
+    def schedule(self, track_info: TrackInfo) -> None:
+        self.tracks.append(track_info)
+
+
+class FakeScheduler:
+    def __init__(self) -> None:
+        self.activities: List[dict] = []
+
+    def submit_yandex_music_activity(self, **fields) -> None:
+        self.activities.append(fields)
+
+
+class HandleTrackChangeTest(unittest.IsolatedAsyncioTestCase):
+    async def test_filled_track_is_prefetched_and_submitted(self):
+        track = TrackInfo("1", "Title", is_paused=False, duration=200, progress=50, next_track_ids=("2",))
+        change = TrackChange(track, None, frozenset({TrackEvent.TRACK_CHANGED}))
+        prefetcher, scheduler = FakePrefetcher(), FakeScheduler()
+
+        await handle_track_change(FakeClient(), prefetcher, scheduler, change)
+
+        self.assertEqual(prefetcher.tracks, [track])
+        self.assertEqual(len(scheduler.activities), 1)
+        activity = scheduler.activities[0]
+        self.assertEqual(activity["title"], "Title")
+        self.assertEqual(activity["artists"], "Artist")
+        self.assertEqual(activity["image_url"], "https://avatars.yandex.net/cover.png")
+        self.assertEqual(activity["url"], track.get_track_url())
+        self.assertAlmostEqual(activity["start"], time.time() - 50, delta=2)
+        self.assertEqual(activity["end"] - activity["start"], 200)
+        self.assertIs(activity["span"], change.span)
+
+
+if __name__ == "__main__":
+    unittest.main()
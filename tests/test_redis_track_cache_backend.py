@@ -0,0 +1,142 @@
+import asyncio
+import unittest
+from typing import Dict, List, Optional
+
+from yamusicrpc.cache import RedisTrackCacheBackend
+from yamusicrpc.exceptions import CacheBackendError
+from yamusicrpc.models import TrackMetadata
+
+
+class FakeRedis:
+    """
+    Redis server with the commands used by backend (RESP over TCP, values in memory, expiration is ignored).
+    `FAIL` command is answered with error reply.
+    """
+
+    def __init__(self, password: Optional[str] = None) -> None:
+        self.password = password
+        self.values: Dict[bytes, bytes] = {}
+        self.connection_count = 0
+        self.commands: List[List[bytes]] = []
+        self.__server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> int:
+        self.__server = await asyncio.start_server(self.__handle, "127.0.0.1", 0)
+        return self.__server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        self.__server.close()
+        await self.__server.wait_closed()
+
+    async def __handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connection_count += 1
+        is_authenticated: bool = self.password is None
+        try:
+            while True:
+                line: bytes = await reader.readline()
+                if not line:
+                    break
+                command: List[bytes] = []
+                for _ in range(int(line[1:])):
+                    length = int((await reader.readline())[1:])
+                    command.append((await reader.readexactly(length + 2))[:-2])
+                self.commands.append(command)
+
+                name: bytes = command[0].upper()
+                if name == b"AUTH":
+                    is_authenticated = command[1].decode() == self.password
+                    reply = b"+OK\r\n" if is_authenticated else b"-WRONGPASS invalid password\r\n"
+                elif not is_authenticated:
+                    reply = b"-NOAUTH Authentication required\r\n"
+                else:
+                    reply = self.__execute(name, command[1:])
+                writer.write(reply)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def __execute(self, name: bytes, args: List[bytes]) -> bytes:
+        if name == b"SELECT":
+            return b"+OK\r\n"
+        if name == b"SET":
+            if b"NX" in args[2:] and args[0] in self.values:
+                return b"$-1\r\n"
+            self.values[args[0]] = args[1]
+            return b"+OK\r\n"
+        if name == b"MGET":
+            reply: List[bytes] = [b"*%d\r\n" % len(args)]
+            for key in args:
+                value = self.values.get(key)
+                reply.append(b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value))
+            return b"".join(reply)
+        if name == b"DEL":
+            return b":%d\r\n" % sum(self.values.pop(key, None) is not None for key in args)
+        return b"-ERR unknown command\r\n"
+
+
+class RedisTrackCacheBackendTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.server = FakeRedis(password="secret")
+        self.backend = RedisTrackCacheBackend(port=await self.server.start(), password="secret", db=1)
+
+    async def asyncTearDown(self) -> None:
+        await self.backend.close()
+        await self.server.close()
+
+    async def test_values_round_trip(self):
+        track = TrackMetadata("1", "Artist", "10", "https://example.com/cover.png")
+
+        await self.backend.put_many([track])
+
+        self.assertEqual(await self.backend.get_many(["1", "2"]), {"1": track})
+        self.assertEqual(self.server.commands[:2], [[b"AUTH", b"secret"], [b"SELECT", b"1"]])
+
+    async def test_locks_are_taken_once(self):
+        self.assertEqual(await self.backend.lock_many(["1", "2"], ttl=10), ["1", "2"])
+        self.assertEqual(await self.backend.lock_many(["2", "3"], ttl=10), ["3"])
+
+        await self.backend.unlock_many(["2"])
+
+        self.assertEqual(await self.backend.lock_many(["2"], ttl=10), ["2"])
+
+    async def test_replies_are_parsed(self):
+        replies = await self.backend.execute(
+            ("SET", "key", "value"), ("MGET", "key", "missing"), ("DEL", "key", "missing"),
+        )
+
+        self.assertEqual(replies, [b"OK", [b"value", None], 1])
+
+    async def test_error_reply_keeps_pipeline_in_sync(self):
+        with self.assertRaises(CacheBackendError):
+            await self.backend.execute(("FAIL",), ("SET", "key", "value"), ("MGET", "key"))
+
+        # Replies of the failed pipeline are not read by the next commands
+        self.assertEqual(await self.backend.execute(("MGET", "key")), [[b"value"]])
+        self.assertEqual(self.server.connection_count, 1)
+
+    async def test_failed_auth_connection_is_not_reused(self):
+        self.backend.password = "wrong"
+        with self.assertRaises(CacheBackendError):
+            await self.backend.execute(("MGET", "key"))
+
+        self.backend.password = "secret"
+        self.assertEqual(await self.backend.execute(("MGET", "key")), [[None]])
+        self.assertEqual(self.server.connection_count, 2)
+
+    async def test_cancelled_read_connection_is_not_reused(self):
+        await self.backend.execute(("SET", "key", "value"))
+        task = asyncio.ensure_future(self.backend.execute(("MGET", "key")))
+        # Command is written, but its reply isn't read yet
+        await asyncio.sleep(0)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+        self.assertEqual(await self.backend.execute(("DEL", "key")), [1])
+        self.assertEqual(self.server.connection_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import asyncio
+import unittest
+from typing import Dict, List, Optional
+
+from yamusicrpc.models import TrackMetadata
+from yamusicrpc.yandex import TrackBatcher
+
+
+class FakeApi:
+    """
+    `/tracks` lookup, which records requested batches.
+    """
+
+    def __init__(self, missing: tuple = (), error: Optional[Exception] = None) -> None:
+        self.batches: List[List[str]] = []
+        self.missing = missing
+        self.error = error
+
+    async def fetch(self, track_ids: List[str]) -> Dict[str, TrackMetadata]:
+        self.batches.append(list(track_ids))
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        return {track_id: TrackMetadata(track_id, f"Artist {track_id}") for track_id in track_ids
+                if track_id not in self.missing}
+
+
+class TrackBatcherTest(unittest.IsolatedAsyncioTestCase):
+    async def test_lookups_within_window_are_one_request(self):
+        api = FakeApi()
+        batcher = TrackBatcher(api.fetch, window=0.01)
+
+        results = await asyncio.gather(batcher.get("1"), batcher.get(2), batcher.get("3"))
+
+        self.assertEqual(api.batches, [["1", "2", "3"]])
+        self.assertEqual([metadata.track_id for metadata in results], ["1", "2", "3"])
+        self.assertEqual(batcher.requests_count, 1)
+
+    async def test_same_id_shares_in_flight_lookup(self):
+        api = FakeApi()
+        batcher = TrackBatcher(api.fetch, window=0.01)
+
+        first, second = await asyncio.gather(batcher.get("7"), batcher.get(7))
+
+        self.assertEqual(api.batches, [["7"]])
+        self.assertIs(first, second)
+        self.assertEqual(batcher.coalesced_count, 1)
+
+    async def test_results_are_mapped_by_id(self):
+        # Response order and missing tracks must not shift results between ids
+        api = FakeApi(missing=("2",))
+        batcher = TrackBatcher(api.fetch, window=0.01)
+
+        results = await batcher.get_many(["3", "2", "1", "3"])
+
+        self.assertEqual(list(results), ["3", "2", "1"])
+        self.assertEqual(results["3"].track_id, "3")
+        self.assertEqual(results["1"].track_id, "1")
+        self.assertIsNone(results["2"])
+
+    async def test_full_batch_is_sent_without_waiting(self):
+        api = FakeApi()
+        batcher = TrackBatcher(api.fetch, window=10, max_batch_size=2)
+
+        results = await asyncio.wait_for(batcher.get_many(["1", "2"]), timeout=1)
+
+        self.assertEqual(api.batches, [["1", "2"]])
+        self.assertEqual(len(results), 2)
+
+    async def test_large_lookup_is_split_by_max_size(self):
+        api = FakeApi()
+        batcher = TrackBatcher(api.fetch, window=0.01, max_batch_size=2)
+
+        results = await batcher.get_many(["1", "2", "3", "4", "5"])
+
+        self.assertEqual(api.batches, [["1", "2"], ["3", "4"], ["5"]])
+        self.assertEqual(len(results), 5)
+
+    async def test_error_is_raised_to_all_waiters(self):
+        api = FakeApi(error=ValueError("API is down"))
+        batcher = TrackBatcher(api.fetch, window=0.01)
+
+        results = await asyncio.gather(batcher.get("1"), batcher.get("2"), return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+    async def test_id_is_looked_up_again_after_completion(self):
+        api = FakeApi()
+        batcher = TrackBatcher(api.fetch, window=0.01)
+
+        await batcher.get("1")
+        await batcher.get("1")
+
+        self.assertEqual(api.batches, [["1"], ["1"]])
+
+    async def test_cancelled_waiter_does_not_cancel_lookup(self):
+        api = FakeApi()
+        batcher = TrackBatcher(api.fetch, window=0.01)
+
+        cancelled = asyncio.ensure_future(batcher.get("1"))
+        other = asyncio.ensure_future(batcher.get("1"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+
+        self.assertEqual((await other).track_id, "1")
+        self.assertEqual(api.batches, [["1"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,193 @@
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import unittest
+from typing import List, Optional
+
+from yamusicrpc.cache import TrackCache, SqliteTrackStore
+from yamusicrpc.models import TrackMetadata
+
+
+class RecordingStore(SqliteTrackStore):
+    """
+    SQLite store, which records threads of lookups and writes.
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self.threads: List[threading.Thread] = []
+
+    def get(self, track_id) -> Optional[TrackMetadata]:
+        self.threads.append(threading.current_thread())
+        return super().get(track_id)
+
+    def put(self, metadata: TrackMetadata) -> None:
+        self.threads.append(threading.current_thread())
+        super().put(metadata)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_track(track_id: str) -> TrackMetadata:
+    return TrackMetadata(track_id, f"Artist {track_id}")
+
+
+class TrackCacheMemoryTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+
+    def test_least_recently_used_is_evicted(self):
+        cache = TrackCache(max_size=2, clock=self.clock)
+        cache.put(make_track("1"))
+        cache.put(make_track("2"))
+
+        # Lookup makes track the most recently used one
+        cache.get("1")
+        cache.put(make_track("3"))
+
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn("2", cache)
+        self.assertIn("1", cache)
+        self.assertIn("3", cache)
+
+    def test_peek_does_not_change_order_and_counters(self):
+        cache = TrackCache(max_size=2, clock=self.clock)
+        cache.put(make_track("1"))
+        cache.put(make_track("2"))
+
+        self.assertEqual(cache.peek("1").track_id, "1")
+        cache.put(make_track("3"))
+
+        self.assertNotIn("1", cache)
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+
+    def test_entry_expires_after_ttl(self):
+        cache = TrackCache(ttl=10, clock=self.clock)
+        cache.put(make_track("1"))
+
+        self.clock.now = 10
+        self.assertIsNotNone(cache.get("1"))
+        self.clock.now = 10.5
+        self.assertNotIn("1", cache)
+        self.assertIsNone(cache.get("1"))
+
+        self.assertEqual(len(cache), 0)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_put_renews_ttl(self):
+        cache = TrackCache(ttl=10, clock=self.clock)
+        cache.put(make_track("1"))
+        self.clock.now = 8
+        cache.put(make_track("1"))
+
+        self.clock.now = 15
+        self.assertIsNotNone(cache.get("1"))
+
+    def test_entries_without_ttl_never_expire(self):
+        cache = TrackCache(ttl=None, clock=self.clock)
+        cache.put(make_track("1"))
+
+        self.clock.now = 10 ** 9
+        self.assertIsNotNone(cache.get("1"))
+
+    def test_counters_under_eviction(self):
+        cache = TrackCache(max_size=2, clock=self.clock)
+        for track_id in ("1", "2", "3"):
+            cache.put(make_track(track_id))
+
+        results = [cache.get(track_id) for track_id in ("1", "2", "3", "1")]
+
+        self.assertEqual([metadata is not None for metadata in results], [False, True, True, False])
+        self.assertEqual(cache.get_stats(), {
+            "size": 2, "max_size": 2, "hits": 2, "misses": 2, "store_hits": 0, "hit_ratio": 0.5,
+        })
+
+
+class TrackCacheTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.store = RecordingStore(os.path.join(folder.name, "tracks.sqlite"))
+        self.addCleanup(self.store.close)
+
+    async def test_async_lookup_reads_store_off_event_loop(self):
+        self.store.put(TrackMetadata("1", "Artist"))
+        self.store.threads.clear()
+        cache = TrackCache(store=self.store)
+
+        tracks = await cache.get_many_async(["1", 2])
+
+        self.assertEqual(list(tracks), ["1", "2"])
+        self.assertEqual(tracks["1"].artists, "Artist")
+        self.assertIsNone(tracks["2"])
+        self.assertEqual(len(self.store.threads), 2)
+        self.assertNotIn(threading.current_thread(), self.store.threads)
+        self.assertEqual((cache.hits, cache.misses, cache.store_hits), (1, 1, 1))
+
+    async def test_memory_hit_does_not_read_store(self):
+        cache = TrackCache(store=self.store)
+        await cache.put_many_async([TrackMetadata("1", "Artist")])
+        self.store.threads.clear()
+
+        self.assertEqual((await cache.get_async("1")).artists, "Artist")
+        self.assertEqual(self.store.threads, [])
+
+    async def test_async_put_writes_store_off_event_loop(self):
+        cache = TrackCache(store=self.store)
+
+        await cache.put_many_async([TrackMetadata("1", "Artist"), TrackMetadata("2", "Other")])
+
+        self.assertEqual(len(self.store.threads), 2)
+        self.assertNotIn(threading.current_thread(), self.store.threads)
+        self.assertEqual(self.store.get("2").artists, "Other")
+        self.assertIsNotNone(cache.peek("1"))
+
+    async def test_async_lookup_without_store(self):
+        cache = TrackCache()
+        await cache.put_many_async([TrackMetadata("1", "Artist")])
+
+        tracks = await cache.get_many_async(["1", "2"])
+
+        self.assertEqual(tracks["1"].artists, "Artist")
+        self.assertIsNone(tracks["2"])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    async def test_closed_store_is_not_fatal(self):
+        self.store.put(TrackMetadata("1", "Artist"))
+        cache = TrackCache(store=self.store)
+        cache.FLUSH_HITS_EVERY = 1
+        await cache.put_many_async([TrackMetadata("2", "Other")])
+        self.store.close()
+
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            self.assertIsNone(await cache.get_async("1"))
+            await cache.put_many_async([TrackMetadata("3", "New")])
+            # Memory still works (and its hit triggers failing flush)
+            self.assertEqual((await cache.get_async("3")).artists, "New")
+            self.assertEqual((await cache.get_async("2")).artists, "Other")
+            cache.put(TrackMetadata("4", "Sync"))
+            self.assertIsNone(cache.get("5"))
+            cache.close()
+
+        self.assertIn("[TrackCache] Persistent store is not available", output.getvalue())
+        self.assertEqual(cache.misses, 2)
+
+    def test_sync_lookup_falls_back_to_store(self):
+        self.store.put(TrackMetadata("1", "Artist"))
+        cache = TrackCache(store=self.store)
+
+        self.assertEqual(cache.get("1").artists, "Artist")
+        self.assertIsNone(cache.get("2"))
+        self.assertEqual(cache.store_hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+from typing import Tuple
+
+from yamusicrpc.models import TrackInfo, TrackEvent, TrackChangeDetector
+
+
+def make_track(
+        track_id: str = "1",
+        is_paused: bool = False,
+        progress: int = 0,
+        next_track_ids: Tuple[str, ...] = ("2", "3"),
+        entity_id: str = "playlist",
+        queue_length: int = 10,
+) -> TrackInfo:
+    return TrackInfo(
+        track_id, f"Track {track_id}", is_paused=is_paused, duration=200, progress=progress,
+        next_track_ids=next_track_ids, entity_id=entity_id, queue_length=queue_length,
+    )
+
+
+class TrackChangeDetectorTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.detector = TrackChangeDetector(seek_threshold=3)
+
+    def test_first_state_is_track_change(self):
+        change = self.detector.update(make_track(), now=0)
+
+        self.assertEqual(change.events, {TrackEvent.TRACK_CHANGED})
+        self.assertIsNone(change.previous)
+
+    def test_progress_ping_is_empty_change(self):
+        self.detector.update(make_track(progress=10), now=100)
+        change = self.detector.update(make_track(progress=15), now=105)
+
+        self.assertFalse(change)
+        self.assertEqual(change.events, frozenset())
+
+    def test_new_track(self):
+        first = make_track("1")
+        self.detector.update(first, now=0)
+        change = self.detector.update(make_track("2"), now=1)
+
+        self.assertEqual(change.events, {TrackEvent.TRACK_CHANGED})
+        self.assertIs(change.previous, first)
+
+    def test_new_track_in_other_queue(self):
+        self.detector.update(make_track("1"), now=0)
+        change = self.detector.update(make_track("2", entity_id="album"), now=1)
+
+        self.assertEqual(change.events, {TrackEvent.TRACK_CHANGED, TrackEvent.QUEUE_CHANGED})
+
+    def test_pause_and_resume(self):
+        self.detector.update(make_track(progress=10), now=100)
+        paused = self.detector.update(make_track(is_paused=True, progress=12), now=102)
+        resumed = self.detector.update(make_track(progress=12), now=160)
+
+        self.assertEqual(paused.events, {TrackEvent.PAUSED})
+        # Progress doesn't advance while paused, so long pause is not a seek
+        self.assertEqual(resumed.events, {TrackEvent.RESUMED})
+
+    def test_seek_beyond_threshold(self):
+        self.detector.update(make_track(progress=10), now=100)
+        forward = self.detector.update(make_track(progress=60), now=101)
+        backward = self.detector.update(make_track(progress=20), now=102)
+
+        self.assertEqual(forward.events, {TrackEvent.SEEKED})
+        self.assertEqual(backward.events, {TrackEvent.SEEKED})
+
+    def test_drift_within_threshold_is_not_seek(self):
+        self.detector.update(make_track(progress=10), now=100)
+        change = self.detector.update(make_track(progress=17), now=105)
+
+        self.assertNotIn(TrackEvent.SEEKED, change)
+
+    def test_queue_change_of_same_track(self):
+        self.detector.update(make_track(progress=10), now=100)
+        reordered = self.detector.update(make_track(progress=10, next_track_ids=("3", "2")), now=100)
+        extended = self.detector.update(make_track(progress=10, next_track_ids=("3", "2"), queue_length=11), now=100)
+
+        self.assertEqual(reordered.events, {TrackEvent.QUEUE_CHANGED})
+        self.assertEqual(extended.events, {TrackEvent.QUEUE_CHANGED})
+
+    def test_reset_treats_next_state_as_new_track(self):
+        self.detector.update(make_track(), now=0)
+        self.detector.reset()
+        change = self.detector.update(make_track(), now=1)
+
+        self.assertIn(TrackEvent.TRACK_CHANGED, change)
+
+
+if __name__ == "__main__":
+    unittest.main()
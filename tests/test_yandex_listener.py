@@ -0,0 +1,113 @@
+import asyncio
+import random
+import time
+import unittest
+from typing import List, Callable
+from unittest import mock
+
+from benchmarks.stand_ins import YnisonStandIn
+from benchmarks.ynison_frames import make_session
+from yamusicrpc.exceptions import YnisonConnectionError
+from yamusicrpc.models import TrackInfo
+from yamusicrpc.yandex import YandexListener
+from yamusicrpc.yandex import yandex_listener
+
+
+async def wait_until(predicate: Callable[[], bool], timeout: float = 2) -> None:
+    deadline: float = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("Condition is not met in time")
+        await asyncio.sleep(0.01)
+
+
+class YandexListenerReconnectTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.ynison = YnisonStandIn(make_session(frames=2, queue_size=5))
+        await self.ynison.start()
+        self.addAsyncCleanup(self.ynison.close)
+        self.states: List[TrackInfo] = []
+
+    async def listen(self, **kwargs) -> YandexListener:
+        """
+        Enter listener and consume its states in background task (`self.consumer`) until the test ends.
+        """
+        listener = YandexListener(
+            "token", redirector_url=self.ynison.redirector_url, state_scheme="ws",
+            reconnect_base_delay=0.01, reconnect_max_delay=0.04, **kwargs,
+        )
+        await listener.__aenter__()
+        self.consumer: asyncio.Task = asyncio.ensure_future(self.__consume(listener))
+
+        async def stop() -> None:
+            self.consumer.cancel()
+            await asyncio.gather(self.consumer, return_exceptions=True)
+            await listener.__aexit__(None, None, None)
+        self.addAsyncCleanup(stop)
+
+        await wait_until(lambda: len(self.states) == 2)
+        return listener
+
+    async def __consume(self, listener: YandexListener) -> None:
+        async for state in listener.listen():
+            self.states.append(state)
+
+    async def test_reconnect_reuses_redirect_ticket(self):
+        listener = await self.listen()
+
+        await self.ynison.close_connections()
+        await wait_until(lambda: len(self.states) == 4)
+
+        self.assertEqual(listener.reconnect_count, 1)
+        self.assertEqual(listener.redirect_count, 1)
+        self.assertEqual(self.ynison.redirect_count, 1)
+        self.assertEqual(self.ynison.tickets, ["ticket-1", "ticket-1"])
+
+    async def test_expired_ticket_is_refreshed(self):
+        listener = await self.listen()
+
+        self.ynison.expire_tickets()
+        await self.ynison.close_connections()
+        await wait_until(lambda: len(self.states) == 4)
+
+        self.assertEqual(listener.reconnect_count, 1)
+        self.assertEqual(listener.redirect_count, 2)
+        self.assertEqual(self.ynison.tickets, ["ticket-1", "ticket-1", "ticket-2"])
+        self.assertEqual(self.ynison.rejected_count, 1)
+
+    async def test_rejected_token_is_not_retried(self):
+        for status in (401, 403):
+            with self.subTest(status=status):
+                self.states.clear()
+                self.ynison.reject_status = None
+                listener = await self.listen()
+                rejected_count: int = self.ynison.rejected_count
+
+                self.ynison.reject_status = status
+                await self.ynison.close_connections()
+
+                with self.assertRaises(YnisonConnectionError):
+                    await asyncio.wait_for(self.consumer, timeout=2)
+                self.assertEqual(self.ynison.rejected_count, rejected_count + 1)
+                self.assertEqual(listener.reconnect_count, 0)
+
+    async def test_backoff_is_exponential_with_jitter_and_cap(self):
+        await self.listen(max_reconnect_attempts=5)
+
+        # Server error is retried with new redirect each time
+        self.ynison.reject_status = 503
+        with mock.patch.object(yandex_listener.random, "uniform", wraps=random.uniform) as uniform:
+            await self.ynison.close_connections()
+            with self.assertRaises(YnisonConnectionError):
+                await asyncio.wait_for(self.consumer, timeout=2)
+
+        self.assertEqual([call.args for call in uniform.call_args_list], [
+            (0.005, 0.01), (0.01, 0.02), (0.02, 0.04), (0.02, 0.04), (0.02, 0.04),
+        ])
+        self.assertEqual(self.ynison.rejected_count, 5)
+        # The first attempt reuses ticket, the next ones take new redirect
+        self.assertEqual(self.ynison.redirect_count, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
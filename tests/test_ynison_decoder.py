@@ -0,0 +1,87 @@
+import json
+import unittest
+from typing import List, Tuple
+
+from benchmarks.ynison_frames import make_session, make_state
+from yamusicrpc.models import TrackInfo
+from yamusicrpc.utils import YnisonDecoder, OrjsonYnisonDecoder, MsgspecYnisonDecoder, LazyPlayableList
+from yamusicrpc.utils import ynison_decoder
+
+
+def as_tuple(track_info: TrackInfo) -> Tuple:
+    return tuple(getattr(track_info, name) for name in TrackInfo.__slots__)
+
+
+def make_frames() -> List[str]:
+    frames: List[str] = make_session(frames=60, queue_size=10, frames_per_track=5)
+
+    # Podcast episode in queue, int ids and missing optional fields
+    state = make_state(queue_size=5, current_index=1)
+    queue = state["player_state"]["player_queue"]
+    queue["playable_list"][2]["playable_type"] = "LOCAL_TRACK"
+    queue["playable_list"][1]["playable_id"] = 42
+    del queue["playable_list"][1]["cover_url_optional"]
+    del queue["playable_list"][1]["album_id_optional"]
+    queue["entity_id"] = 7
+    frames.append(json.dumps(state))
+
+    # The last track of queue, numbers instead of strings
+    state = make_state(queue_size=3, current_index=2)
+    state["player_state"]["status"].update(duration_ms=180_000, progress_ms=5_000)
+    frames.append(json.dumps(state))
+    return frames
+
+
+class YnisonDecoderTest(unittest.TestCase):
+    def get_decoders(self) -> List[YnisonDecoder]:
+        decoders: List[YnisonDecoder] = [YnisonDecoder()]
+        for decoder_type in (OrjsonYnisonDecoder, MsgspecYnisonDecoder):
+            try:
+                decoders.append(decoder_type())
+            except ImportError:
+                pass
+        return decoders
+
+    def test_decoders_give_equal_track_info(self):
+        reference = YnisonDecoder()
+
+        for decoder in self.get_decoders():
+            for frame in make_frames():
+                for data in (frame, frame.encode('utf-8')):
+                    with self.subTest(decoder=decoder.name, data_type=type(data).__name__):
+                        expected = TrackInfo.from_ynison(reference.decode(frame), queue_depth=3)
+                        actual = TrackInfo.from_ynison(decoder.decode(data), queue_depth=3)
+                        self.assertEqual(as_tuple(actual), as_tuple(expected))
+
+    @unittest.skipIf(ynison_decoder.msgspec is None, "msgspec is not installed")
+    def test_msgspec_decodes_queue_lazily(self):
+        decoded = MsgspecYnisonDecoder().decode(json.dumps(make_state(queue_size=5)))
+        playable_list = decoded["player_state"]["player_queue"]["playable_list"]
+
+        self.assertIsInstance(playable_list, LazyPlayableList)
+        self.assertEqual(len(playable_list), 5)
+        self.assertEqual(playable_list[1]["playable_id"], "1000001")
+        self.assertEqual([item["playable_id"] for item in playable_list[3:]], ["1000003", "1000004"])
+
+    @unittest.skipIf(ynison_decoder.msgspec is None, "msgspec is not installed")
+    def test_msgspec_falls_back_to_full_decode(self):
+        # Frames, which don't match schema of state (`msgspec.ValidationError`)
+        unexpected_state = make_state(queue_size=3)
+        unexpected_state["player_state"]["status"]["paused"] = "false"
+        frames: List[str] = [
+            json.dumps({"error": {"message": "Bad request"}}),
+            json.dumps({"player_state": {"status": {}}}),
+            json.dumps(unexpected_state),
+        ]
+
+        for frame in frames:
+            with self.subTest(frame=frame[:50]):
+                self.assertEqual(MsgspecYnisonDecoder().decode(frame), json.loads(frame))
+        self.assertEqual(
+            as_tuple(TrackInfo.from_ynison(MsgspecYnisonDecoder().decode(frames[2]))),
+            as_tuple(TrackInfo.from_ynison(json.loads(frames[2]))),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,17 +4,51 @@ __license__ = "MIT"
 __copyright__ = "Copyright 2025-present issamansur (EDEXADE, Inc)"
 __version__ = "2.0.0"
 
+import importlib
+from typing import TYPE_CHECKING
+
 from . import data, exceptions
-from . import models, yandex, discord
-from .activity_manager import ActivityManager
+
+if TYPE_CHECKING:
+    from . import models, cache, yandex, discord
+    from .activity_manager import ActivityManager
+    from .multi_activity_manager import MultiActivityManager, Account
 
 __all__ = [
     "data",
     "exceptions",
 
     "models",
+    "cache",
     "yandex",
     "discord",
 
     "ActivityManager",
+    "MultiActivityManager",
+    "Account",
 ]
+
+# Subpackages and classes are imported on first access (PEP 562), so `import yamusicrpc` doesn't load
+# aiohttp, Flask, requests and others until they are needed (e.g. Flask only for device-flow login)
+_LAZY_SUBPACKAGES = ("models", "cache", "yandex", "discord")
+_LAZY_ATTRIBUTES = {
+    "ActivityManager": ".activity_manager",
+    "MultiActivityManager": ".multi_activity_manager",
+    "Account": ".multi_activity_manager",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_SUBPACKAGES:
+        value = importlib.import_module(f".{name}", __name__)
+    elif name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # The next access doesn't call `__getattr__`
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *__all__})
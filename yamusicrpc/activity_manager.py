@@ -1,43 +1,79 @@
-import time
-from typing import Optional
+import inspect
+from typing import Optional, Union, TYPE_CHECKING
 
-from .data import DISCORD_CLIENT_ID
-from .yandex import YandexTokenReceiver, YandexListener, YandexClient
-from .discord import DiscordIPCClient
+from .data import DISCORD_CLIENT_ID, PREFETCH_DEPTH, PREFETCH_CONCURRENCY
+from .yandex import YandexListener, YandexClient, QueuePrefetcher
+from .discord import DiscordIPCClient, AsyncDiscordIPCClient, ActivityScheduler
+from .presence_pipeline import handle_track_change
+
+if TYPE_CHECKING:
+    from .yandex import YandexTokenReceiver
 
 
 class ActivityManager:
-    __yandex_token_receiver: Optional[YandexTokenReceiver]
+    __yandex_token_receiver: Optional["YandexTokenReceiver"]
     __yandex_listener: Optional[YandexListener]
     __client: Optional[YandexClient]
-    __discord_ipc_client: DiscordIPCClient
+    __discord_ipc_client: Union[AsyncDiscordIPCClient, DiscordIPCClient]
 
     def __init__(
             self,
-            yandex_token_receiver: YandexTokenReceiver = YandexTokenReceiver(),
-            discord_ipc_client: DiscordIPCClient = DiscordIPCClient(DISCORD_CLIENT_ID),
+            yandex_token_receiver: Optional["YandexTokenReceiver"] = None,
+            discord_ipc_client: Optional[Union[AsyncDiscordIPCClient, DiscordIPCClient]] = None,
+            prefetch_depth: int = PREFETCH_DEPTH,
+            prefetch_concurrency: int = PREFETCH_CONCURRENCY,
+            yandex_listener: Optional[YandexListener] = None,
+            yandex_client: Optional[YandexClient] = None,
+            activity_scheduler: Optional[ActivityScheduler] = None,
     ):
+        """
+        :param yandex_token_receiver: Receiver of token (used only if listener or client is not set).
+            Created on start if needed, so Flask and requests are imported only for login.
+        :param discord_ipc_client: Client to send activity with. `AsyncDiscordIPCClient` if not set.
+        :param prefetch_depth: Count of next tracks in queue to prefetch.
+        :param prefetch_concurrency: Max count of simultaneous prefetch requests.
+        :param yandex_listener: Source of states (e.g. `YnisonReplayListener`). Created for token if not set.
+        :param yandex_client: Client of Yandex Music API. Created for token if not set.
+        :param activity_scheduler: Scheduler of activities for `discord_ipc_client` (e.g. with other rate limits).
+            Created with Discord limits if not set.
+        """
         self.__yandex_token_receiver = yandex_token_receiver
-        self.__yandex_listener = None
-        self.__client = None
-        self.__discord_ipc_client = discord_ipc_client
+        self.__yandex_listener = yandex_listener
+        self.__client = yandex_client
+        self.__activity_scheduler = activity_scheduler
+        self.__discord_ipc_client = (
+            discord_ipc_client if discord_ipc_client is not None else AsyncDiscordIPCClient(DISCORD_CLIENT_ID)
+        )
+        self.__prefetch_depth = prefetch_depth
+        self.__prefetch_concurrency = prefetch_concurrency
 
     # Main func
     async def start(self):
-        token: Optional[str] = self.__yandex_token_receiver.get_token()
-        self.__yandex_listener = YandexListener(token)
-        self.__client = YandexClient(token)
-        self.__discord_ipc_client.connect()
+        if self.__yandex_listener is None or self.__client is None:
+            if self.__yandex_token_receiver is None:
+                from .yandex.yandex_token_receiver import YandexTokenReceiver
+                self.__yandex_token_receiver = YandexTokenReceiver()
+            token: Optional[str] = self.__yandex_token_receiver.get_token()
+            if self.__yandex_listener is None:
+                self.__yandex_listener = YandexListener(token, queue_depth=self.__prefetch_depth)
+            if self.__client is None:
+                self.__client = YandexClient(token)
+        prefetcher = QueuePrefetcher(self.__client, self.__prefetch_depth, self.__prefetch_concurrency)
+        scheduler = (
+            self.__activity_scheduler
+            if self.__activity_scheduler is not None
+            else ActivityScheduler(self.__discord_ipc_client)
+        )
+        # Blocking `DiscordIPCClient` is still supported
+        connected = self.__discord_ipc_client.connect()
+        if inspect.isawaitable(connected):
+            await connected
 
-        async with self.__yandex_listener as l:
-            async for track in l.listen():
-                start_time: int = int(time.time()) - track.progress
-                await self.__client.fill_track_info(track)
-                self.__discord_ipc_client.set_yandex_music_activity(
-                    title=track.title,
-                    artists=track.artists,
-                    start=start_time,
-                    end=start_time + track.duration,
-                    url=track.get_track_url(),
-                    image_url=track.cover_url
-                )
+        async with self.__client, self.__yandex_listener as l:
+            try:
+                # Only states with changes (new track, pause, seek, ...) need update
+                async for change in l.listen_changes():
+                    await handle_track_change(self.__client, prefetcher, scheduler, change)
+            finally:
+                await prefetcher.close()
+                await scheduler.close()
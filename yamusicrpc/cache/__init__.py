@@ -0,0 +1,17 @@
+from .sqlite_track_store import SqliteTrackStore
+from .track_cache import TrackCache
+from .track_cache_backend import (
+    TrackCacheBackend,
+    SqliteTrackCacheBackend,
+    RedisTrackCacheBackend,
+    get_track_cache_backend,
+)
+
+__all__ = [
+    "SqliteTrackStore",
+    "TrackCache",
+    "TrackCacheBackend",
+    "SqliteTrackCacheBackend",
+    "RedisTrackCacheBackend",
+    "get_track_cache_backend",
+]
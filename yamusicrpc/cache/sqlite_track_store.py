@@ -0,0 +1,135 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Union, List, Dict
+
+from ..data import TRACK_STORE_MAX_ENTRIES, TRACK_STORE_MAX_AGE
+from ..models import TrackMetadata
+
+
+class SqliteTrackStore:
+    """
+    Persistent track metadata store (SQLite file), used as the second level of `TrackCache`
+    to keep metadata of frequently played tracks between restarts.
+    """
+    path: str
+    max_entries: int
+    max_age: Optional[float]
+
+    # How many writes are allowed before the next eviction pass
+    EVICT_EVERY: int = 64
+
+    def __init__(
+            self,
+            path: str,
+            max_entries: int = TRACK_STORE_MAX_ENTRIES,
+            max_age: Optional[float] = TRACK_STORE_MAX_AGE,
+    ) -> None:
+        """
+        :param path: Path to SQLite file. Folder is created if needed.
+        :param max_entries: Max count of stored tracks. The coldest (least played) tracks are evicted first.
+        :param max_age: Max age of entry in seconds. `None` means entries never become stale.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.__writes = 0
+        self.__lock = threading.Lock()
+
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+
+        self.__conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.__conn.execute("PRAGMA journal_mode=WAL")
+        self.__conn.execute("PRAGMA synchronous=NORMAL")
+        self.__conn.execute(
+            "CREATE TABLE IF NOT EXISTS tracks ("
+            "track_id TEXT PRIMARY KEY, "
+            "artists TEXT NOT NULL, "
+            "album_id TEXT, "
+            "cover_url TEXT, "
+            "updated_at REAL NOT NULL, "
+            "hits INTEGER NOT NULL DEFAULT 0"
+            ")"
+        )
+        self.__conn.execute("CREATE INDEX IF NOT EXISTS tracks_hits ON tracks (hits DESC)")
+        self.evict()
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return self.__conn.execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+
+    def __min_updated_at(self) -> float:
+        return time.time() - self.max_age if self.max_age is not None else 0.0
+
+    @staticmethod
+    def __to_metadata(row: tuple) -> TrackMetadata:
+        track_id, artists, album_id, cover_url = row
+        return TrackMetadata(track_id=track_id, artists=artists, album_id=album_id, cover_url=cover_url)
+
+    def get(self, track_id: Union[str, int]) -> Optional[TrackMetadata]:
+        with self.__lock:
+            row = self.__conn.execute(
+                "SELECT track_id, artists, album_id, cover_url FROM tracks WHERE track_id = ? AND updated_at >= ?",
+                (str(track_id), self.__min_updated_at()),
+            ).fetchone()
+        return self.__to_metadata(row) if row else None
+
+    def put(self, metadata: TrackMetadata) -> None:
+        with self.__lock:
+            self.__conn.execute(
+                "INSERT INTO tracks (track_id, artists, album_id, cover_url, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (track_id) DO UPDATE SET "
+                "artists = excluded.artists, album_id = excluded.album_id, "
+                "cover_url = excluded.cover_url, updated_at = excluded.updated_at",
+                (str(metadata.track_id), metadata.artists, metadata.album_id, metadata.cover_url, time.time()),
+            )
+            self.__writes += 1
+            need_evict = self.__writes >= self.EVICT_EVERY
+
+        if need_evict:
+            self.evict()
+
+    def add_hits(self, hits: Dict[str, int]) -> None:
+        """
+        Increase play counters of tracks (used to choose tracks for warm-load).
+        """
+        if not hits:
+            return
+        with self.__lock:
+            self.__conn.executemany(
+                "UPDATE tracks SET hits = hits + ? WHERE track_id = ?",
+                [(count, track_id) for track_id, count in hits.items()],
+            )
+
+    def load_hottest(self, limit: int) -> List[TrackMetadata]:
+        with self.__lock:
+            rows = self.__conn.execute(
+                "SELECT track_id, artists, album_id, cover_url FROM tracks WHERE updated_at >= ? "
+                "ORDER BY hits DESC, updated_at DESC LIMIT ?",
+                (self.__min_updated_at(), limit),
+            ).fetchall()
+        return [self.__to_metadata(row) for row in rows]
+
+    def evict(self) -> None:
+        """
+        Remove stale entries and the coldest entries above `max_entries`.
+        """
+        with self.__lock:
+            self.__writes = 0
+            self.__conn.execute("DELETE FROM tracks WHERE updated_at < ?", (self.__min_updated_at(),))
+            self.__conn.execute(
+                "DELETE FROM tracks WHERE track_id NOT IN ("
+                "SELECT track_id FROM tracks ORDER BY hits DESC, updated_at DESC LIMIT ?"
+                ")",
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__conn.execute("DELETE FROM tracks")
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__conn.close()
@@ -0,0 +1,252 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Union, Tuple, Dict, Iterable, List, Callable
+
+from ..data import TRACK_CACHE_MAX_SIZE, TRACK_CACHE_TTL
+from ..metrics.pipeline import TRACK_CACHE_REQUESTS
+from ..models import TrackMetadata
+from .sqlite_track_store import SqliteTrackStore
+
+
+class TrackCache:
+    """
+    Bounded in-memory cache of track metadata (LRU with TTL), keyed by track id.
+    Optionally backed by persistent `SqliteTrackStore` (write-through).
+    Store failures (e.g. file locked by another instance, or store closed at exit) are not fatal:
+    they are logged, and cache keeps working in memory only (lookup is a miss, write is skipped).
+    """
+    max_size: int
+    ttl: Optional[float]
+    store: Optional[SqliteTrackStore]
+    clock: Callable[[], float]
+
+    hits: int
+    misses: int
+    store_hits: int
+
+    # How many hits are accumulated before they are flushed to store
+    FLUSH_HITS_EVERY: int = 32
+
+    def __init__(
+            self,
+            max_size: int = TRACK_CACHE_MAX_SIZE,
+            ttl: Optional[float] = TRACK_CACHE_TTL,
+            store: Optional[SqliteTrackStore] = None,
+            clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        :param max_size: Max count of stored tracks. The least recently used track is evicted first.
+        :param ttl: Lifetime of entry in seconds. `None` means entries never expire.
+        :param store: Persistent store, consulted on memory miss and updated on each put.
+        :param clock: Source of time in seconds for TTL (e.g. fake clock in tests).
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.store = store
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.store_hits = 0
+        self.__pending_hits: Dict[str, int] = {}
+        self.__pending_count = 0
+        self.__entries: 'OrderedDict[str, Tuple[float, TrackMetadata]]' = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __contains__(self, track_id: Union[str, int]) -> bool:
+        return self.peek(track_id) is not None
+
+    def __is_expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and self.clock() - stored_at > self.ttl
+
+    def get(self, track_id: Union[str, int]) -> Optional[TrackMetadata]:
+        key = str(track_id)
+        metadata: Optional[TrackMetadata] = self.__get_memory(key)
+        if metadata is None:
+            metadata = self.__get_stored(key)
+        if self.__is_flush_due():
+            self.flush()
+        return metadata
+
+    async def get_many_async(self, track_ids: Iterable[Union[str, int]]) -> Dict[str, Optional[TrackMetadata]]:
+        """
+        Same as `get`, but for several tracks and for callers in event loop:
+        store (blocking SQLite I/O) is read in worker thread, once for all memory misses.
+        """
+        tracks: Dict[str, Optional[TrackMetadata]] = {}
+        missing: List[str] = []
+        for key in map(str, track_ids):
+            tracks[key] = self.__get_memory(key)
+            if tracks[key] is None:
+                missing.append(key)
+
+        if missing and self.store is None:
+            with self.__lock:
+                self.misses += len(missing)
+        elif missing:
+            tracks.update(await asyncio.to_thread(self.__get_stored_many, missing))
+        if self.__is_flush_due():
+            await asyncio.to_thread(self.flush)
+        return tracks
+
+    async def get_async(self, track_id: Union[str, int]) -> Optional[TrackMetadata]:
+        key = str(track_id)
+        return (await self.get_many_async((key,)))[key]
+
+    def __get_memory(self, key: str) -> Optional[TrackMetadata]:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and not self.__is_expired(entry[0]):
+                self.__entries.move_to_end(key)
+                self.hits += 1
+                self.__count_hit(key)
+                TRACK_CACHE_REQUESTS.inc(level="memory", result="hit")
+                return entry[1]
+            if entry is not None:
+                del self.__entries[key]
+
+        TRACK_CACHE_REQUESTS.inc(level="memory", result="miss")
+        return None
+
+    def __get_stored(self, key: str) -> Optional[TrackMetadata]:
+        if self.store is None:
+            with self.__lock:
+                self.misses += 1
+            return None
+
+        try:
+            metadata: Optional[TrackMetadata] = self.store.get(key)
+        except sqlite3.Error as e:
+            self.__on_store_error(e)
+            metadata = None
+        TRACK_CACHE_REQUESTS.inc(level="store", result="hit" if metadata is not None else "miss")
+        with self.__lock:
+            if metadata is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.store_hits += 1
+            self.__count_hit(key)
+        self.__put_memory(metadata)
+        return metadata
+
+    def __get_stored_many(self, keys: List[str]) -> Dict[str, Optional[TrackMetadata]]:
+        return {key: self.__get_stored(key) for key in keys}
+
+    def __count_hit(self, key: str) -> None:
+        if self.store is None:
+            return
+        self.__pending_hits[key] = self.__pending_hits.get(key, 0) + 1
+        self.__pending_count += 1
+
+    def __is_flush_due(self) -> bool:
+        return self.__pending_count >= self.FLUSH_HITS_EVERY
+
+    def peek(self, track_id: Union[str, int]) -> Optional[TrackMetadata]:
+        """
+        Same as `get`, but doesn't affect LRU order and hit/miss counters.
+        """
+        entry = self.__entries.get(str(track_id))
+        if entry is None or self.__is_expired(entry[0]):
+            return None
+        return entry[1]
+
+    def put(self, metadata: TrackMetadata) -> None:
+        self.__put_memory(metadata)
+        if self.store is not None:
+            self.__put_stored_many([metadata])
+
+    async def put_many_async(self, tracks: Iterable[TrackMetadata]) -> None:
+        """
+        Same as `put`, but for several tracks and for callers in event loop:
+        store is written in worker thread, once for all tracks.
+        """
+        tracks = list(tracks)
+        for metadata in tracks:
+            self.__put_memory(metadata)
+        if self.store is not None and tracks:
+            await asyncio.to_thread(self.__put_stored_many, tracks)
+
+    def __put_stored_many(self, tracks: List[TrackMetadata]) -> None:
+        try:
+            for metadata in tracks:
+                self.store.put(metadata)
+        except sqlite3.Error as e:
+            self.__on_store_error(e)
+
+    @staticmethod
+    def __on_store_error(error: sqlite3.Error) -> None:
+        print(f"[TrackCache] Persistent store is not available: {error!r}")
+
+    def __put_memory(self, metadata: TrackMetadata) -> None:
+        key = str(metadata.track_id)
+        with self.__lock:
+            self.__entries[key] = (self.clock(), metadata)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+
+    def invalidate(self, track_id: Union[str, int]) -> None:
+        with self.__lock:
+            self.__entries.pop(str(track_id), None)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+
+    # Persistent store utils
+    def warm_up(self, limit: Optional[int] = None) -> int:
+        """
+        Load the hottest tracks from store to memory, so the first lookups don't need network.
+
+        :param limit: Count of tracks to load. Defaults to `max_size`.
+        :return: Count of loaded tracks.
+        """
+        if self.store is None:
+            return 0
+
+        tracks = self.store.load_hottest(min(limit or self.max_size, self.max_size))
+        # Coldest first, so the hottest ones are the most recently used
+        for metadata in reversed(tracks):
+            self.__put_memory(metadata)
+        return len(tracks)
+
+    def flush(self) -> None:
+        """
+        Write accumulated hit counters to store.
+        """
+        if self.store is None:
+            return
+        with self.__lock:
+            pending, self.__pending_hits = self.__pending_hits, {}
+            self.__pending_count = 0
+        try:
+            self.store.add_hits(pending)
+        except sqlite3.Error as e:
+            self.__on_store_error(e)
+
+    def close(self) -> None:
+        if self.store is not None:
+            self.flush()
+            self.store.close()
+
+    # Stats
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get_stats(self) -> Dict[str, Union[int, float]]:
+        return {
+            "size": len(self.__entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "store_hits": self.store_hits,
+            "hit_ratio": self.hit_ratio,
+        }
@@ -0,0 +1,367 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional, Dict, List, Iterable, Tuple, Union
+from urllib.parse import urlparse, unquote
+
+from ..data import TRACK_CACHE_TTL, TRACK_STORE_MAX_ENTRIES
+from ..exceptions import CacheBackendError
+from ..models import TrackMetadata
+from .sqlite_track_store import SqliteTrackStore
+from .track_cache import TrackCache
+
+
+def _dump(metadata: TrackMetadata) -> bytes:
+    return json.dumps([metadata.track_id, metadata.artists, metadata.album_id, metadata.cover_url]).encode('utf-8')
+
+
+def _load(data: bytes) -> TrackMetadata:
+    track_id, artists, album_id, cover_url = json.loads(data)
+    return TrackMetadata(track_id=track_id, artists=artists, album_id=album_id, cover_url=cover_url)
+
+
+class TrackCacheBackend:
+    """
+    Shared (second level) cache of track metadata, which is used by several `YandexClient`s
+    (e.g. accounts of `MultiActivityManager`) before requesting the API.
+
+    Besides values, backend provides fill locks: only the owner of lock requests the track,
+    others wait for the value to appear (protection from stampede of identical requests on miss).
+
+    This backend keeps data in the process memory (for clients in one process).
+    """
+    name: str = "memory"
+
+    def __init__(self, cache: Optional[TrackCache] = None) -> None:
+        """
+        :param cache: In-memory cache to keep values in.
+        """
+        self.cache = cache if cache is not None else TrackCache()
+        # Lock key -> (owner, expires at)
+        self.__locks: Dict[str, Tuple[str, float]] = {}
+        self.owner = uuid.uuid4().hex
+
+    async def get_many(self, track_ids: Iterable[str]) -> Dict[str, TrackMetadata]:
+        tracks: Dict[str, Optional[TrackMetadata]] = await self.cache.get_many_async(track_ids)
+        return {track_id: metadata for track_id, metadata in tracks.items() if metadata is not None}
+
+    async def put_many(self, tracks: Iterable[TrackMetadata]) -> None:
+        await self.cache.put_many_async(tracks)
+
+    async def lock_many(self, track_ids: Iterable[str], ttl: float) -> List[str]:
+        """
+        Try to take fill locks of tracks (lock expires after `ttl` seconds, if owner has died).
+
+        :return: Ids of tracks, which locks were taken.
+        """
+        now: float = time.monotonic()
+        locked: List[str] = []
+        for track_id in track_ids:
+            lock: Optional[Tuple[str, float]] = self.__locks.get(track_id)
+            if lock is None or lock[1] <= now:
+                self.__locks[track_id] = (self.owner, now + ttl)
+                locked.append(track_id)
+        return locked
+
+    async def unlock_many(self, track_ids: Iterable[str]) -> None:
+        for track_id in track_ids:
+            lock: Optional[Tuple[str, float]] = self.__locks.get(track_id)
+            if lock is not None and lock[0] == self.owner:
+                del self.__locks[track_id]
+
+    async def close(self) -> None:
+        pass
+
+
+class SqliteTrackCacheBackend(TrackCacheBackend):
+    """
+    Backend on SQLite file, shared between processes on one host (file can be placed in `/dev/shm`).
+    Blocking calls are done in thread.
+    """
+    name: str = "sqlite"
+
+    def __init__(
+            self,
+            path: str,
+            max_entries: int = TRACK_STORE_MAX_ENTRIES,
+            ttl: Optional[float] = TRACK_CACHE_TTL,
+    ) -> None:
+        """
+        :param path: Path to SQLite file.
+        :param max_entries: Max count of stored tracks.
+        :param ttl: Max age of entry in seconds.
+        """
+        self.owner = uuid.uuid4().hex
+        self.store = SqliteTrackStore(path, max_entries=max_entries, max_age=ttl)
+        self.__lock = threading.Lock()
+        self.__conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self.__conn.execute(
+            "CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def __get_many(self, track_ids: List[str]) -> Dict[str, TrackMetadata]:
+        tracks: Dict[str, TrackMetadata] = {}
+        for track_id in track_ids:
+            metadata: Optional[TrackMetadata] = self.store.get(track_id)
+            if metadata is not None:
+                tracks[track_id] = metadata
+        return tracks
+
+    def __put_many(self, tracks: List[TrackMetadata]) -> None:
+        for metadata in tracks:
+            self.store.put(metadata)
+
+    def __lock_many(self, track_ids: List[str], ttl: float) -> List[str]:
+        now: float = time.time()
+        locked: List[str] = []
+        with self.__lock:
+            # Immediate transaction: check and take of lock is atomic for all processes
+            self.__conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.__conn.execute("DELETE FROM locks WHERE expires_at <= ?", (now,))
+                for track_id in track_ids:
+                    cursor = self.__conn.execute(
+                        "INSERT OR IGNORE INTO locks (key, owner, expires_at) VALUES (?, ?, ?)",
+                        (track_id, self.owner, now + ttl),
+                    )
+                    if cursor.rowcount == 1:
+                        locked.append(track_id)
+                self.__conn.execute("COMMIT")
+            except BaseException:
+                self.__conn.execute("ROLLBACK")
+                raise
+        return locked
+
+    def __unlock_many(self, track_ids: List[str]) -> None:
+        with self.__lock:
+            self.__conn.executemany(
+                "DELETE FROM locks WHERE key = ? AND owner = ?",
+                [(track_id, self.owner) for track_id in track_ids],
+            )
+
+    @staticmethod
+    async def __run(func, *args):
+        try:
+            return await asyncio.to_thread(func, *args)
+        except sqlite3.Error as e:
+            raise CacheBackendError(f"SQLite error: {e!r}") from e
+
+    async def get_many(self, track_ids: Iterable[str]) -> Dict[str, TrackMetadata]:
+        return await self.__run(self.__get_many, list(track_ids))
+
+    async def put_many(self, tracks: Iterable[TrackMetadata]) -> None:
+        await self.__run(self.__put_many, list(tracks))
+
+    async def lock_many(self, track_ids: Iterable[str], ttl: float) -> List[str]:
+        return await self.__run(self.__lock_many, list(track_ids), ttl)
+
+    async def unlock_many(self, track_ids: Iterable[str]) -> None:
+        await self.__run(self.__unlock_many, list(track_ids))
+
+    async def close(self) -> None:
+        with self.__lock:
+            self.__conn.close()
+        self.store.close()
+
+
+class RedisTrackCacheBackend(TrackCacheBackend):
+    """
+    Backend on Redis (or Redis-compatible server), shared between processes and hosts.
+    Minimal RESP client over asyncio streams (without external dependencies):
+    values are stored with `SET ... PX`, locks are taken with `SET ... NX PX`.
+    """
+    name: str = "redis"
+
+    KEY_PREFIX: str = "yamusicrpc:track:"
+    LOCK_PREFIX: str = "yamusicrpc:lock:"
+
+    def __init__(
+            self,
+            host: str = "127.0.0.1",
+            port: int = 6379,
+            db: int = 0,
+            password: Optional[str] = None,
+            ttl: Optional[float] = TRACK_CACHE_TTL,
+    ) -> None:
+        """
+        :param host: Host of server.
+        :param port: Port of server.
+        :param db: Number of database.
+        :param password: Password (`AUTH`), if required.
+        :param ttl: Max age of entry in seconds.
+        """
+        self.owner = uuid.uuid4().hex
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.ttl = ttl
+        self.__reader: Optional[asyncio.StreamReader] = None
+        self.__writer: Optional[asyncio.StreamWriter] = None
+        self.__lock: Optional[asyncio.Lock] = None
+
+    # Protocol block
+    @staticmethod
+    def __encode(command: Tuple[Union[str, bytes, int, float], ...]) -> bytes:
+        chunks: List[bytes] = [b"*%d\r\n" % len(command)]
+        for arg in command:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode('utf-8')
+            chunks.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(chunks)
+
+    async def __read_reply(self) -> Union[None, int, bytes, List, CacheBackendError]:
+        """
+        Error reply is returned (not raised), so replies of the rest of pipelined commands are still read.
+        """
+        line: bytes = await self.__reader.readline()
+        if not line:
+            raise ConnectionResetError("Connection closed by server")
+
+        kind, value = line[:1], line[1:-2]
+        if kind == b"+":
+            return value
+        if kind == b"-":
+            return CacheBackendError(value.decode('utf-8', 'replace'))
+        if kind == b":":
+            return int(value)
+        if kind == b"$":
+            length = int(value)
+            if length < 0:
+                return None
+            return (await self.__reader.readexactly(length + 2))[:-2]
+        if kind == b"*":
+            length = int(value)
+            if length < 0:
+                return None
+            return [await self.__read_reply() for _ in range(length)]
+        raise CacheBackendError(f"Unknown reply: {line!r}")
+
+    async def __connect(self) -> None:
+        self.__reader, self.__writer = await asyncio.open_connection(self.host, self.port)
+        commands: List[Tuple] = []
+        if self.password is not None:
+            commands.append(("AUTH", self.password))
+        if self.db:
+            commands.append(("SELECT", self.db))
+        if commands:
+            self.__raise_error(await self.__send(commands))
+
+    async def __send(self, commands: List[Tuple]) -> List:
+        # Commands are pipelined: written at once, then replies are read in order
+        self.__writer.write(b"".join(map(self.__encode, commands)))
+        await self.__writer.drain()
+        return [await self.__read_reply() for _ in commands]
+
+    @staticmethod
+    def __raise_error(replies: List) -> None:
+        for reply in replies:
+            if isinstance(reply, CacheBackendError):
+                raise reply
+
+    async def execute(self, *commands: Tuple) -> List:
+        """
+        Execute commands (pipelined) and return their replies.
+        Connection is opened lazily and reopened after errors.
+
+        :raises CacheBackendError: If connection failed or any command got error reply
+            (the first one is raised after all replies are read).
+        """
+        if self.__lock is None:
+            self.__lock = asyncio.Lock()
+
+        async with self.__lock:
+            try:
+                if self.__writer is None or self.__writer.is_closing():
+                    await self.__connect()
+                replies: List = await self.__send(list(commands))
+            except (OSError, asyncio.IncompleteReadError) as e:
+                await self.__close_connection()
+                raise CacheBackendError(f"Redis connection error: {e!r}") from e
+            except BaseException:
+                # Replies may be left unread (e.g. cancelled in the middle) or connection is not authenticated,
+                # so it can't be reused
+                await self.__close_connection()
+                raise
+
+        # All replies are read, so connection stays in sync after error reply
+        self.__raise_error(replies)
+        return replies
+
+    # Backend block
+    async def get_many(self, track_ids: Iterable[str]) -> Dict[str, TrackMetadata]:
+        track_ids = list(track_ids)
+        if not track_ids:
+            return {}
+
+        values: List[Optional[bytes]] = (await self.execute(
+            ("MGET", *(self.KEY_PREFIX + track_id for track_id in track_ids))
+        ))[0]
+        return {track_id: _load(value) for track_id, value in zip(track_ids, values) if value is not None}
+
+    async def put_many(self, tracks: Iterable[TrackMetadata]) -> None:
+        expire: Tuple = ("PX", int(self.ttl * 1000)) if self.ttl is not None else ()
+        commands: List[Tuple] = [
+            ("SET", self.KEY_PREFIX + metadata.track_id, _dump(metadata), *expire)
+            for metadata in tracks
+        ]
+        if commands:
+            await self.execute(*commands)
+
+    async def lock_many(self, track_ids: Iterable[str], ttl: float) -> List[str]:
+        track_ids = list(track_ids)
+        if not track_ids:
+            return []
+
+        replies: List = await self.execute(*(
+            ("SET", self.LOCK_PREFIX + track_id, self.owner, "NX", "PX", int(ttl * 1000))
+            for track_id in track_ids
+        ))
+        return [track_id for track_id, reply in zip(track_ids, replies) if reply is not None]
+
+    async def unlock_many(self, track_ids: Iterable[str]) -> None:
+        # Lock of another owner can be removed only if ours has expired, which means extra request at worst
+        track_ids = list(track_ids)
+        if track_ids:
+            await self.execute(("DEL", *(self.LOCK_PREFIX + track_id for track_id in track_ids)))
+
+    async def __close_connection(self) -> None:
+        if self.__writer is not None:
+            self.__writer.close()
+            try:
+                await self.__writer.wait_closed()
+            except OSError:
+                pass
+        self.__reader = None
+        self.__writer = None
+
+    async def close(self) -> None:
+        await self.__close_connection()
+
+
+def get_track_cache_backend(url: Optional[str] = None) -> TrackCacheBackend:
+    """
+    Create backend by URL:
+    - `None` or `memory://` - in process memory;
+    - `sqlite:///path/to/file` - SQLite file;
+    - `redis://[:password@]host[:port][/db]` - Redis server.
+    """
+    if url is None:
+        return TrackCacheBackend()
+
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return TrackCacheBackend()
+    if parsed.scheme == "sqlite":
+        return SqliteTrackCacheBackend(unquote(parsed.path))
+    if parsed.scheme == "redis":
+        return RedisTrackCacheBackend(
+            host=parsed.hostname or "127.0.0.1",
+            port=parsed.port or 6379,
+            db=int(parsed.path.strip("/") or 0),
+            password=unquote(parsed.password) if parsed.password else None,
+        )
+    raise ValueError(f"Unknown track cache backend: {url}")
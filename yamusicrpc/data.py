@@ -8,5 +8,78 @@ YANDEX_CLIENT_SECRET = '53bc75238f0c4d08a118e51fe9203300'  # noqa: S105
 
 YANDEX_COVER_DEFAULT_SIZE = '200x200'
 
+# For yandex endpoints (can be replaced, e.g. with local stand-ins in benchmarks)
+YANDEX_API_URL = 'https://api.music.yandex.net'
+YANDEX_LOGIN_URL = 'https://login.yandex.ru'
+YNISON_REDIRECTOR_URL = 'wss://ynison.music.yandex.ru'
+# Scheme of Ynison host received from redirector
+YNISON_STATE_SCHEME = 'wss'
+
+# For http connection pool (keep-alive, dns cache)
+HTTP_POOL_LIMIT = 10
+HTTP_DNS_CACHE_TTL = 300  # seconds
+HTTP_KEEPALIVE_TIMEOUT = 60  # seconds
+
+# For track metadata cache
+TRACK_CACHE_MAX_SIZE = 512
+TRACK_CACHE_TTL = 6 * 60 * 60  # seconds
+TRACK_STORE_MAX_ENTRIES = 5000
+TRACK_STORE_MAX_AGE = 30 * 24 * 60 * 60  # seconds
+TRACK_STORE_WARM_UP_SIZE = 256
+
+# For batching of /tracks requests
+TRACK_BATCH_WINDOW = 0.02  # seconds
+TRACK_BATCH_MAX_SIZE = 50
+
+# For shared (between clients) track cache: fill lock protects from identical requests on miss
+SHARED_CACHE_LOCK_TTL = 5  # seconds
+SHARED_CACHE_POLL_INTERVAL = 0.05  # seconds
+
+# For prefetching of next tracks in queue
+PREFETCH_DEPTH = 3
+PREFETCH_CONCURRENCY = 1
+
+# For change detection: progress jump (seconds) treated as seek
+SEEK_THRESHOLD = 3
+
+# For reconnect to Ynison (exponential backoff)
+RECONNECT_BASE_DELAY = 1  # seconds
+RECONNECT_MAX_DELAY = 60  # seconds
+
+# For restart of failed account in multi-account runtime (exponential backoff)
+ACCOUNT_RESTART_BASE_DELAY = 1  # seconds
+ACCOUNT_RESTART_MAX_DELAY = 60  # seconds
+
 # For discord
 DISCORD_CLIENT_ID: str = '1370004230688997396'
+
+# Discord limits SET_ACTIVITY to 5 updates per 20 seconds
+DISCORD_ACTIVITY_RATE = 5
+DISCORD_ACTIVITY_PER = 20  # seconds
+DISCORD_ACTIVITY_MIN_INTERVAL = 1  # seconds
+DISCORD_TIMESTAMP_TOLERANCE = 2  # seconds
+
+# For discord IPC connection
+DISCORD_REQUEST_TIMEOUT = 5  # seconds
+DISCORD_MAX_PENDING_REQUESTS = 8
+DISCORD_MAX_FRAME_SIZE = 1024 * 1024  # bytes
+# Discord listens on the first free socket of `discord-ipc-0..9`
+DISCORD_IPC_SOCKETS_COUNT = 10
+DISCORD_PROBE_TIMEOUT = 0.5  # seconds
+
+# For keeping discord IPC connection alive
+DISCORD_PING_INTERVAL = 15  # seconds
+DISCORD_PING_TIMEOUT = 5  # seconds
+DISCORD_RECONNECT_BASE_DELAY = 1  # seconds
+DISCORD_RECONNECT_MAX_DELAY = 30  # seconds
+
+# For metrics
+METRICS_DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # seconds
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9464
+
+# For tracing
+TRACING_MAX_SPANS = 10000
+
+# For recording of Ynison sessions (gzip compression level 1..9: speed vs size)
+YNISON_LOG_COMPRESS_LEVEL = 6
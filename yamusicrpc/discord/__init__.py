@@ -1,5 +1,11 @@
+from .endpoint_resolver import DiscordEndpointResolver
 from .discord_ipc_client import DiscordIPCClient
+from .async_discord_ipc_client import AsyncDiscordIPCClient
+from .activity_scheduler import ActivityScheduler
 
 __all__ = [
+    "DiscordEndpointResolver",
     "DiscordIPCClient",
-]
\ No newline at end of file
+    "AsyncDiscordIPCClient",
+    "ActivityScheduler",
+]
@@ -0,0 +1,244 @@
+import asyncio
+import inspect
+import time
+from typing import Optional, Callable, Union
+
+from ..data import (
+    DISCORD_ACTIVITY_RATE, DISCORD_ACTIVITY_PER, DISCORD_ACTIVITY_MIN_INTERVAL, DISCORD_TIMESTAMP_TOLERANCE
+)
+from ..metrics.pipeline import PRESENCE_LATENCY_SECONDS
+from ..metrics.tracing import Span, NOOP_SPAN, use_span
+from .discord_ipc_client import DiscordIPCClient
+from .async_discord_ipc_client import AsyncDiscordIPCClient
+
+
+class ActivityScheduler:
+    """
+    Sits between listener and `DiscordIPCClient`:
+    - coalesces bursts of updates (only the latest activity is sent);
+    - limits sending rate (token bucket + min interval), according to Discord limits for SET_ACTIVITY;
+    - skips activity, if it is the same as the last sent one.
+
+    Correct using:
+    ```
+    scheduler = ActivityScheduler(discord_ipc_client)
+    async for track in listener.listen():
+        scheduler.submit_yandex_music_activity(...)
+    await scheduler.close()
+    ```
+    """
+    rate: int
+    per: float
+    min_interval: float
+    timestamp_tolerance: int
+
+    sent_count: int
+    skipped_count: int
+    coalesced_count: int
+
+    def __init__(
+            self,
+            discord_ipc_client: Union[DiscordIPCClient, AsyncDiscordIPCClient],
+            rate: int = DISCORD_ACTIVITY_RATE,
+            per: float = DISCORD_ACTIVITY_PER,
+            min_interval: float = DISCORD_ACTIVITY_MIN_INTERVAL,
+            timestamp_tolerance: int = DISCORD_TIMESTAMP_TOLERANCE,
+            on_error: Optional[Callable[[Exception], None]] = None,
+    ) -> None:
+        """
+        :param discord_ipc_client: Connected client to send activity with.
+        :param rate: Max count of activities sent per `per` seconds (bucket capacity).
+        :param per: Period in seconds for `rate`.
+        :param min_interval: Min time in seconds between two sent activities.
+        :param timestamp_tolerance: Max difference of timestamps in seconds for activities to be treated as same.
+        :param on_error: Called when sending fails. If not set, the error is raised by the next `submit`.
+        """
+        self.__discord_ipc_client = discord_ipc_client
+        self.rate = rate
+        self.per = per
+        self.min_interval = min_interval
+        self.timestamp_tolerance = timestamp_tolerance
+        self.__on_error = on_error
+
+        self.sent_count = 0
+        self.skipped_count = 0
+        self.coalesced_count = 0
+
+        self.__tokens: float = float(rate)
+        self.__updated_at: float = time.monotonic()
+        self.__sent_at: Optional[float] = None
+
+        self.__pending: Optional[dict] = None
+        # Fields of pending Yandex Music activity (sent with pre-serialized template)
+        self.__pending_fields: Optional[dict] = None
+        # Time (`time.monotonic()`) when pending state was received, to measure presence latency
+        self.__pending_received_at: Optional[float] = None
+        # Root span of pending update (see `YandexListener.listen_changes()`)
+        self.__pending_span: Span = NOOP_SPAN
+        self.__last: Optional[dict] = None
+        self.__error: Optional[Exception] = None
+        self.__event: Optional[asyncio.Event] = None
+        self.__idle: Optional[asyncio.Event] = None
+        self.__task: Optional[asyncio.Task] = None
+
+    def submit(self, activity: dict, received_at: Optional[float] = None, span: Span = NOOP_SPAN) -> None:
+        """
+        Schedule activity to be sent (not blocking). Replaces not yet sent activity.
+
+        :param activity: Activity to send.
+        :param received_at: Time (`time.monotonic()`) when state of activity was received (for latency metric).
+        :param span: Root span of update, which is ended when activity is sent (or skipped, or replaced).
+        :raises: Error of previous sending (e.g. `DiscordProcessNotFoundError`).
+        """
+        self.__submit(activity, None, received_at, span)
+
+    def __submit(self, activity: dict, fields: Optional[dict], received_at: Optional[float], span: Span) -> None:
+        if self.__error is not None:
+            error, self.__error = self.__error, None
+            span.record_exception(error)
+            span.end()
+            raise error
+
+        if self.__task is None or self.__task.done():
+            self.__event = asyncio.Event()
+            self.__idle = asyncio.Event()
+            self.__task = asyncio.create_task(self.__worker())
+
+        if self.__pending is not None:
+            self.coalesced_count += 1
+            self.__pending_span.set_attribute("coalesced", True)
+            self.__pending_span.end()
+        self.__pending = activity
+        self.__pending_fields = fields
+        self.__pending_received_at = received_at
+        self.__pending_span = span
+        self.__idle.clear()
+        self.__event.set()
+
+    def submit_yandex_music_activity(
+            self,
+            title: str,
+            artists: str,
+            start: int,
+            end: int,
+            url: str,
+            image_url: Optional[str] = None,
+            received_at: Optional[float] = None,
+            span: Span = NOOP_SPAN,
+    ) -> None:
+        fields: dict = {
+            "title": title, "artists": artists, "start": start, "end": end, "url": url, "image_url": image_url,
+        }
+        # Activity dict is still built to compare with the last sent one
+        self.__submit(DiscordIPCClient.build_yandex_music_activity(**fields), fields, received_at, span)
+
+    async def flush(self) -> None:
+        """
+        Wait until scheduled activity is sent (or skipped).
+        """
+        if self.__task is not None and not self.__task.done() and self.__pending is not None:
+            await self.__idle.wait()
+
+    async def close(self) -> None:
+        if self.__task is not None and not self.__task.done():
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+        self.__task = None
+        self.__pending = None
+        self.__pending_fields = None
+        self.__pending_received_at = None
+        self.__pending_span.end()
+        self.__pending_span = NOOP_SPAN
+
+    def reset(self) -> None:
+        """
+        Forget the last sent activity (e.g. after reconnect), so the next one is sent anyway.
+        """
+        self.__last = None
+
+    # Rate limit
+    def __refill(self) -> None:
+        now = time.monotonic()
+        self.__tokens = min(float(self.rate), self.__tokens + (now - self.__updated_at) * self.rate / self.per)
+        self.__updated_at = now
+
+    def __get_delay(self) -> float:
+        self.__refill()
+        delay: float = 0.0
+        if self.__tokens < 1:
+            delay = (1 - self.__tokens) * self.per / self.rate
+        if self.__sent_at is not None:
+            delay = max(delay, self.__sent_at + self.min_interval - time.monotonic())
+        return delay
+
+    # Comparing
+    def __is_same(self, activity: dict, other: Optional[dict]) -> bool:
+        if other is None or activity.keys() != other.keys():
+            return False
+
+        timestamps: dict = activity.get("timestamps", {})
+        other_timestamps: dict = other.get("timestamps", {})
+        if timestamps.keys() != other_timestamps.keys():
+            return False
+        for key, value in timestamps.items():
+            if abs(value - other_timestamps[key]) > self.timestamp_tolerance:
+                return False
+
+        return all(value == other[key] for key, value in activity.items() if key != "timestamps")
+
+    async def __worker(self) -> None:
+        while True:
+            await self.__event.wait()
+            self.__event.clear()
+
+            delay: float = self.__get_delay()
+            if delay > 0:
+                # Updates received while waiting replace pending activity
+                await asyncio.sleep(delay)
+
+            activity, self.__pending = self.__pending, None
+            fields, self.__pending_fields = self.__pending_fields, None
+            received_at, self.__pending_received_at = self.__pending_received_at, None
+            span, self.__pending_span = self.__pending_span, NOOP_SPAN
+            if activity is None:
+                self.__idle.set()
+                continue
+
+            if self.__is_same(activity, self.__last):
+                self.skipped_count += 1
+                span.set_attribute("skipped", True)
+                span.end()
+            else:
+                try:
+                    # Spans of encoding, writing and ack (started by client) are children of update span
+                    with use_span(span):
+                        if fields is not None:
+                            result = self.__discord_ipc_client.set_yandex_music_activity(**fields)
+                        else:
+                            result = self.__discord_ipc_client.set_activity(activity)
+                        if inspect.isawaitable(result):
+                            await result
+                except Exception as e:
+                    span.record_exception(e)
+                    span.end()
+                    self.__idle.set()
+                    if self.__on_error is not None:
+                        self.__on_error(e)
+                    else:
+                        self.__error = e
+                    return
+
+                self.__refill()
+                self.__tokens -= 1
+                self.__sent_at = time.monotonic()
+                self.__last = activity
+                self.sent_count += 1
+                if received_at is not None:
+                    PRESENCE_LATENCY_SECONDS.observe(time.monotonic() - received_at)
+                span.end()
+
+            if self.__pending is None:
+                self.__idle.set()
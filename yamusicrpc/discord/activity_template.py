@@ -0,0 +1,51 @@
+import json
+import re
+from json.encoder import encode_basestring_ascii
+from typing import List, Any
+
+# Placeholder of dynamic field in template payload (serialized with quotes)
+_FIELD_PATTERN = re.compile(r'"\$\{(\w+)\}"')
+
+
+def _encode_value(value: Any) -> bytes:
+    # Same output as `json.dumps` (with `ensure_ascii`), but without encoder setup for each value
+    if type(value) is str:
+        return encode_basestring_ascii(value).encode('ascii')
+    if type(value) is int:
+        return str(value).encode('ascii')
+    return json.dumps(value).encode('utf-8')
+
+
+class PayloadTemplate:
+    """
+    Payload, serialized to JSON once: on rendering, only dynamic fields are encoded
+    and spliced between pre-serialized constant parts (e.g. assets and buttons of activity).
+
+    Correct using:
+    ```
+    template = PayloadTemplate({"nonce": PayloadTemplate.field("nonce"), "cmd": "SET_ACTIVITY"})
+    body: bytes = template.render(nonce="1")
+    ```
+    Result is the same as `json.dumps(payload).encode('utf-8')` for payload with the values.
+    """
+    fields: List[str]
+
+    def __init__(self, payload: dict):
+        parts: List[str] = _FIELD_PATTERN.split(json.dumps(payload))
+        self.__literals: List[bytes] = [part.encode('utf-8') for part in parts[0::2]]
+        self.fields = parts[1::2]
+
+    @staticmethod
+    def field(name: str) -> str:
+        """
+        Placeholder for dynamic field `name` (to be used as value in template payload).
+        """
+        return f"${{{name}}}"
+
+    def render(self, **values: Any) -> bytes:
+        literals: List[bytes] = self.__literals
+        chunks: List[bytes] = [literals[0]]
+        for name, literal in zip(self.fields, literals[1:]):
+            chunks.append(_encode_value(values[name]))
+            chunks.append(literal)
+        return b''.join(chunks)
@@ -0,0 +1,478 @@
+import asyncio
+import os
+import random
+import struct
+import sys
+import json
+import time
+import uuid
+from typing import Optional, Tuple, Dict, List, Callable
+
+from yamusicrpc.data import (
+    DISCORD_MAX_FRAME_SIZE, DISCORD_REQUEST_TIMEOUT, DISCORD_MAX_PENDING_REQUESTS,
+    DISCORD_PING_INTERVAL, DISCORD_PING_TIMEOUT, DISCORD_RECONNECT_BASE_DELAY, DISCORD_RECONNECT_MAX_DELAY,
+)
+from yamusicrpc.exceptions import DiscordProcessNotFoundError, AdminRightsRequiredError, DiscordIPCError
+from yamusicrpc.metrics.pipeline import DISCORD_REQUESTS, DISCORD_REQUEST_SECONDS, RECONNECTS, DOWNTIME_SECONDS
+from yamusicrpc.metrics.tracing import Tracer, get_tracer
+from .discord_ipc_client import YANDEX_MUSIC_ACTIVITY_TEMPLATE, YANDEX_LOGO_ASSET
+from .endpoint_resolver import DiscordEndpointResolver
+
+_HEADER = struct.Struct('<II')
+
+# Size of one read from socket
+_READ_CHUNK_SIZE = 16 * 1024
+
+# Errors, which mean that Discord is closed (or socket is broken)
+_DISCONNECT_ERRORS = (
+    ConnectionRefusedError, ConnectionResetError, FileNotFoundError, BrokenPipeError, asyncio.IncompleteReadError,
+)
+
+
+class AsyncDiscordIPCClient:
+    """
+    Non-blocking Discord IPC client built on asyncio streams (unix socket / named pipe on Windows),
+    so Discord I/O never blocks the event loop.
+
+    After handshake, background reader parses incoming frames and resolves requests by `nonce`,
+    so responses (and errors) are always read and the number of unanswered requests is bounded.
+
+    Connection is persistent: it is checked by PING/PONG and, if Discord is restarted,
+    restored with backoff (across all `discord-ipc-0..9` sockets) with replay of the last activity.
+    """
+    OP_HANDSHAKE = 0
+    OP_FRAME = 1
+    OP_CLOSE = 2
+    OP_PING = 3
+    OP_PONG = 4
+
+    client_id: str
+    path: Optional[str]
+    request_timeout: float
+
+    def __init__(
+            self,
+            client_id: str,
+            path: Optional[str] = None,
+            request_timeout: float = DISCORD_REQUEST_TIMEOUT,
+            max_pending_requests: int = DISCORD_MAX_PENDING_REQUESTS,
+            max_frame_size: int = DISCORD_MAX_FRAME_SIZE,
+            auto_reconnect: bool = True,
+            ping_interval: float = DISCORD_PING_INTERVAL,
+            ping_timeout: float = DISCORD_PING_TIMEOUT,
+            reconnect_base_delay: float = DISCORD_RECONNECT_BASE_DELAY,
+            reconnect_max_delay: float = DISCORD_RECONNECT_MAX_DELAY,
+            resolver: Optional[DiscordEndpointResolver] = None,
+    ):
+        """
+        :param client_id: Discord application id.
+        :param path: Path to IPC socket. Found automatically (by `resolver`) if not set.
+        :param request_timeout: Time in seconds to wait for response to request.
+        :param max_pending_requests: Max count of requests waiting for response (others wait for free slot).
+        :param max_frame_size: Max size of incoming frame in bytes (bigger frame is treated as broken connection).
+        :param auto_reconnect: Restore connection after it is lost (until `close` is called).
+        :param ping_interval: Interval in seconds between PING health checks.
+        :param ping_timeout: Time in seconds to wait for PONG, after which connection is treated as lost.
+        :param reconnect_base_delay: Initial delay in seconds between reconnect attempts.
+        :param reconnect_max_delay: Max delay in seconds between reconnect attempts.
+        :param resolver: Resolver of IPC endpoint (with cache of the last good one).
+        """
+        self.client_id = client_id
+        self.path = path
+        self.resolver = resolver if resolver is not None else DiscordEndpointResolver()
+        self.request_timeout = request_timeout
+        self.max_pending_requests = max_pending_requests
+        self.max_frame_size = max_frame_size
+        self.auto_reconnect = auto_reconnect
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.reconnect_base_delay = reconnect_base_delay
+        self.reconnect_max_delay = reconnect_max_delay
+
+        # Handshake response (with user) of current connection
+        self.handshake: Optional[dict] = None
+        self.reconnect_count = 0
+
+        self.__reader: Optional[asyncio.StreamReader] = None
+        self.__writer: Optional[asyncio.StreamWriter] = None
+        self.__buffer = bytearray()
+        self.__pending: Dict[str, asyncio.Future] = {}
+        self.__semaphore: Optional[asyncio.Semaphore] = None
+        self.__supervisor_task: Optional[asyncio.Task] = None
+        self.__replay_task: Optional[asyncio.Task] = None
+        self.__pong_event: Optional[asyncio.Event] = None
+        # Renders the last sent activity (for nonce), to restore it after reconnect
+        self.__last_activity: Optional[Callable[[str], bytes]] = None
+
+    @property
+    def is_connected(self) -> bool:
+        return self.__writer is not None and not self.__writer.is_closing()
+
+    @property
+    def is_kept_alive(self) -> bool:
+        """
+        Whether lost connection will be restored automatically.
+        """
+        return self.auto_reconnect and self.__supervisor_task is not None and not self.__supervisor_task.done()
+
+    async def __open_connection(self, path: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        if sys.platform == 'win32':
+            loop = asyncio.get_running_loop()
+            reader = asyncio.StreamReader()
+            protocol = asyncio.StreamReaderProtocol(reader)
+            # Available only for ProactorEventLoop (default loop on Windows)
+            transport, _ = await loop.create_pipe_connection(lambda: protocol, path)
+            writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+            return reader, writer
+
+        return await asyncio.open_unix_connection(path)
+
+    async def connect(self) -> dict:
+        """
+        Connect to Discord and start keeping connection alive.
+        If client is already connected, the handshake of current connection is returned (without new handshake).
+        """
+        if self.is_connected and self.handshake is not None:
+            return self.handshake
+
+        # Explicit connect replaces background reconnecting
+        await self.__stop_supervisor()
+
+        data: dict = await self.__connect_any()
+        self.__supervisor_task = asyncio.create_task(self.__supervise())
+        return data
+
+    async def __connect_any(self) -> dict:
+        # Cached endpoint is tried first, all candidates are scanned only if it fails
+        while True:
+            is_cached = self.path is None and self.resolver.last_good is not None
+            paths: List[str] = [self.path] if self.path else await self.resolver.resolve()
+            for path in paths:
+                try:
+                    data: dict = await self.__connect(path)
+                except DiscordProcessNotFoundError:
+                    await self.__close_connection()
+                    self.resolver.mark_bad(path)
+                else:
+                    self.resolver.mark_good(path)
+                    return data
+            if not is_cached:
+                raise DiscordProcessNotFoundError
+
+    async def __connect(self, path: str) -> dict:
+        try:
+            self.__reader, self.__writer = await self.__open_connection(path)
+        except PermissionError as e:
+            raise AdminRightsRequiredError from e
+        except (OSError, *_DISCONNECT_ERRORS) as e:
+            raise DiscordProcessNotFoundError from e
+
+        self.__buffer.clear()
+        handshake = {
+            "v": 1,
+            "client_id": self.client_id
+        }
+
+        await self._send(self.OP_HANDSHAKE, handshake)
+        print("[AsyncDiscordIPC] Handshake sent")
+
+        # Socket can accept connection without answering (e.g. Discord is starting or hung)
+        frame_task: asyncio.Task = asyncio.ensure_future(self._read_frame())
+        try:
+            # Not `asyncio.wait_for` for the same reason as in `__request`
+            done, _ = await asyncio.wait((frame_task,), timeout=self.request_timeout)
+        finally:
+            frame_task.cancel()
+        if not done:
+            print("[AsyncDiscordIPC] Handshake timed out")
+            raise DiscordProcessNotFoundError
+
+        opcode, data = frame_task.result()
+        if opcode == self.OP_CLOSE:
+            raise DiscordProcessNotFoundError
+
+        if self.__semaphore is None:
+            self.__semaphore = asyncio.Semaphore(self.max_pending_requests)
+        self.handshake = data
+
+        print(f"[AsyncDiscordIPC] User '{data.get('data').get('user').get('username')}' accepted handshake")
+        return data
+
+    # Keep-alive block
+    async def __supervise(self) -> None:
+        """
+        Background task: reads connection until it is lost, then reconnects and replays the last activity.
+        """
+        while True:
+            await self.__run_connection()
+            await self.__close_connection()
+            if not self.auto_reconnect:
+                return
+
+            print("[AsyncDiscordIPC] Connection lost, reconnecting...")
+            disconnected_at: float = time.monotonic()
+            await self.__reconnect()
+            RECONNECTS.inc(target="discord")
+            DOWNTIME_SECONDS.observe(time.monotonic() - disconnected_at, target="discord")
+            self.__replay_task = asyncio.create_task(self.__replay())
+
+    async def __run_connection(self) -> None:
+        self.__pong_event = asyncio.Event()
+        ping_task: asyncio.Task = asyncio.create_task(self.__ping_loop())
+        try:
+            await self.__read_loop()
+        finally:
+            ping_task.cancel()
+
+    async def __ping_loop(self) -> None:
+        """
+        Health check: Discord must answer PING with PONG, otherwise connection is hung and is closed.
+        """
+        try:
+            while True:
+                await asyncio.sleep(self.ping_interval)
+                self.__pong_event.clear()
+                await self._send(self.OP_PING, {"nonce": uuid.uuid4().hex})
+                await asyncio.wait_for(self.__pong_event.wait(), self.ping_timeout)
+        except (asyncio.TimeoutError, DiscordProcessNotFoundError):
+            print("[AsyncDiscordIPC] Health check failed")
+            if self.__writer is not None:
+                # Reader gets EOF and finishes the connection
+                self.__writer.close()
+
+    async def __reconnect(self) -> None:
+        attempt: int = 0
+        while True:
+            try:
+                await self.__connect_any()
+            except (DiscordProcessNotFoundError, AdminRightsRequiredError):
+                # Exponential backoff with jitter
+                delay: float = min(self.reconnect_max_delay, self.reconnect_base_delay * 2 ** attempt)
+                attempt += 1
+                await asyncio.sleep(random.uniform(delay / 2, delay))
+            else:
+                self.reconnect_count += 1
+                print(f"[AsyncDiscordIPC] Reconnected after {attempt + 1} attempt(s)")
+                return
+
+    async def __replay(self) -> None:
+        if self.__last_activity is None:
+            return
+
+        try:
+            await self.__request("SET_ACTIVITY", self.__last_activity)
+            print("[AsyncDiscordIPC] Activity restored")
+        except (DiscordIPCError, DiscordProcessNotFoundError, asyncio.TimeoutError) as e:
+            print(f"[AsyncDiscordIPC] Failed to restore activity: {e!r}")
+
+    async def _send(self, opcode: int, payload: dict) -> None:
+        await self._send_raw(opcode, json.dumps(payload).encode('utf-8'))
+
+    async def _send_raw(self, opcode: int, body: bytes) -> None:
+        if self.__writer is None:
+            raise DiscordProcessNotFoundError
+
+        try:
+            # Header and body are buffered by transport and written at once
+            self.__writer.writelines((_HEADER.pack(opcode, len(body)), body))
+            await self.__writer.drain()
+        except _DISCONNECT_ERRORS as e:
+            raise DiscordProcessNotFoundError from e
+
+    async def _read_frame(self) -> Tuple[int, dict]:
+        """
+        Read one frame (8-byte header with opcode and length, then payload),
+        parsing data from socket incrementally in the reusable buffer.
+        """
+        if self.__reader is None:
+            raise DiscordProcessNotFoundError
+
+        buffer: bytearray = self.__buffer
+        while True:
+            if len(buffer) >= _HEADER.size:
+                opcode, length = _HEADER.unpack_from(buffer)
+                if length > self.max_frame_size:
+                    raise DiscordProcessNotFoundError
+                end: int = _HEADER.size + length
+                if len(buffer) >= end:
+                    payload: bytearray = buffer[_HEADER.size:end]
+                    del buffer[:end]
+                    return opcode, json.loads(payload)
+
+            try:
+                chunk: bytes = await self.__reader.read(_READ_CHUNK_SIZE)
+            except _DISCONNECT_ERRORS as e:
+                raise DiscordProcessNotFoundError from e
+            if not chunk:
+                raise DiscordProcessNotFoundError
+            buffer += chunk
+
+    async def __read_loop(self) -> None:
+        """
+        Background reader: dispatches responses to waiting requests and answers PINGs.
+        """
+        error: Exception = DiscordProcessNotFoundError()
+        try:
+            while True:
+                opcode, data = await self._read_frame()
+
+                if opcode == self.OP_FRAME:
+                    self.__dispatch(data)
+                elif opcode == self.OP_PING:
+                    await self._send(self.OP_PONG, data)
+                elif opcode == self.OP_PONG:
+                    self.__pong_event.set()
+                elif opcode == self.OP_CLOSE:
+                    print(f"[AsyncDiscordIPC] Connection closed by Discord: {data.get('message')}")
+                    break
+        except asyncio.CancelledError:
+            raise
+        except (DiscordProcessNotFoundError, ValueError) as e:
+            error = e
+        finally:
+            self.__fail_pending(error)
+
+    def __dispatch(self, data: dict) -> None:
+        future: Optional[asyncio.Future] = self.__pending.pop(data.get("nonce"), None)
+        if future is None or future.done():
+            return
+
+        if data.get("evt") == "ERROR":
+            error: dict = data.get("data") or {}
+            future.set_exception(DiscordIPCError(error.get("code"), error.get("message")))
+        else:
+            future.set_result(data)
+
+    def __fail_pending(self, error: Exception) -> None:
+        pending, self.__pending = self.__pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    async def request(self, cmd: str, args: dict) -> dict:
+        """
+        Send command and wait for response with the same nonce.
+
+        :raises DiscordIPCError: If Discord returned error.
+        :raises DiscordProcessNotFoundError: If connection is lost.
+        """
+        return await self.__request(
+            cmd,
+            lambda nonce: json.dumps({"cmd": cmd, "args": args, "nonce": nonce}).encode('utf-8')
+        )
+
+    async def __request(self, cmd: str, render: Callable[[str], bytes]) -> dict:
+        """
+        :param cmd: Name of command (for metrics).
+        :param render: Returns body of frame for given nonce.
+        """
+        if self.__semaphore is None or not self.is_connected:
+            DISCORD_REQUESTS.inc(cmd=cmd, result="disconnected")
+            raise DiscordProcessNotFoundError
+
+        async with self.__semaphore:
+            nonce: str = uuid.uuid4().hex
+            future: asyncio.Future = asyncio.get_running_loop().create_future()
+            self.__pending[nonce] = future
+            result: str = "ok"
+            tracer: Tracer = get_tracer()
+            start: float = time.perf_counter()
+            try:
+                with tracer.start_span("discord.encode"):
+                    body: bytes = render(nonce)
+                with tracer.start_span("discord.write"):
+                    await self._send_raw(self.OP_FRAME, body)
+                with tracer.start_span("discord.ack"):
+                    # Not `asyncio.wait_for`: before Python 3.12 it swallows cancellation,
+                    # if response arrives at the same time, so `ActivityScheduler.close()` never returns
+                    done, _ = await asyncio.wait((future,), timeout=self.request_timeout)
+                    if not done:
+                        raise asyncio.TimeoutError
+                    return future.result()
+            except DiscordIPCError:
+                result = "error"
+                raise
+            except DiscordProcessNotFoundError:
+                result = "disconnected"
+                raise
+            except asyncio.TimeoutError:
+                result = "timeout"
+                raise
+            finally:
+                self.__pending.pop(nonce, None)
+                DISCORD_REQUESTS.inc(cmd=cmd, result=result)
+                if result == "ok":
+                    DISCORD_REQUEST_SECONDS.observe(time.perf_counter() - start, cmd=cmd)
+
+    async def set_activity(self, activity: Optional[dict], pid: int = os.getpid()) -> Optional[dict]:
+        """
+        Set activity (`None` clears it).
+        While connection is being restored, activity is only saved and sent after reconnect.
+
+        :return: Discord response or `None` if activity was saved until reconnect.
+        """
+        payload: dict = {"cmd": "SET_ACTIVITY", "args": {"pid": pid, "activity": activity}}
+        return await self.__set_activity(
+            lambda nonce: json.dumps({**payload, "nonce": nonce}).encode('utf-8'),
+            is_cleared=activity is None,
+        )
+
+    async def __set_activity(self, render: Callable[[str], bytes], is_cleared: bool = False) -> Optional[dict]:
+        self.__last_activity = render if not is_cleared else None
+
+        try:
+            response: dict = await self.__request("SET_ACTIVITY", render)
+        except DiscordProcessNotFoundError:
+            if self.is_kept_alive:
+                print("[AsyncDiscordIPC] Activity saved until reconnect")
+                return None
+            raise
+
+        print("[AsyncDiscordIPC] Activity sent")
+        return response
+
+    async def set_yandex_music_activity(
+            self,
+            title: str,
+            artists: str,
+            start: int,
+            end: int,
+            url: str,
+            image_url: Optional[str] = None,
+    ) -> None:
+        # Only changing fields are encoded, the rest of payload is pre-serialized
+        fields: dict = {
+            "pid": os.getpid(), "title": title, "artists": artists, "start": start, "end": end, "url": url,
+            "image_url": image_url or YANDEX_LOGO_ASSET,
+        }
+        await self.__set_activity(lambda nonce: YANDEX_MUSIC_ACTIVITY_TEMPLATE.render(nonce=nonce, **fields))
+
+    async def __close_connection(self) -> None:
+        self.__fail_pending(DiscordProcessNotFoundError())
+
+        if self.__writer is not None:
+            self.__writer.close()
+            try:
+                await self.__writer.wait_closed()
+            except _DISCONNECT_ERRORS + (OSError,):
+                pass
+            self.__reader = None
+            self.__writer = None
+            self.__buffer.clear()
+            self.handshake = None
+            print("[AsyncDiscordIPC] Connection closed")
+
+    async def __stop_supervisor(self) -> None:
+        for task in (self.__supervisor_task, self.__replay_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self.__supervisor_task = None
+        self.__replay_task = None
+
+    async def close(self) -> None:
+        await self.__stop_supervisor()
+        await self.__close_connection()
@@ -2,57 +2,70 @@ import json
 import struct
 import os
 import socket
-import tempfile
 import time
-import sys
 
 from typing import Optional
 
-from yamusicrpc.exceptions import DiscordProcessNotFoundError, AdminRightsRequiredError
+from yamusicrpc.exceptions import DiscordProcessNotFoundError, AdminRightsRequiredError, DiscordIPCError
+from yamusicrpc.metrics.pipeline import DISCORD_REQUESTS, DISCORD_REQUEST_SECONDS
+from yamusicrpc.metrics.tracing import Tracer, get_tracer
+from .endpoint_resolver import DiscordEndpointResolver
+from .activity_template import PayloadTemplate
+
+_HEADER = struct.Struct('<II')
+
+# Name of image asset of Discord application
+YANDEX_LOGO_ASSET = "yandex_logo"
 
 
 class DiscordIPCClient:
     OP_HANDSHAKE = 0
     OP_FRAME = 1
+    OP_CLOSE = 2
 
-    def __init__(self, client_id):
+    def __init__(self, client_id, resolver: Optional[DiscordEndpointResolver] = None, path: Optional[str] = None):
+        """
+        :param client_id: Discord application id.
+        :param resolver: Resolver of IPC endpoint (with cache of the last good one).
+        :param path: Path to IPC socket. Found automatically (by `resolver`) if not set.
+        """
         self.client_id = client_id
+        self.path = path
+        self.resolver = resolver if resolver is not None else DiscordEndpointResolver()
         self.sock = None
 
     @staticmethod
     def _encode(opcode, payload):
         data = json.dumps(payload).encode('utf-8')
-        return struct.pack('<II', opcode, len(data)) + data
-
-    @staticmethod
-    def _get_socket_path():
-        ipc = 'discord-ipc-0'
-
-        if sys.platform in ('linux', 'darwin'):
-            tempdir = os.environ.get('XDG_RUNTIME_DIR') or (
-                f"/run/user/{os.getuid()}" if os.path.exists(f"/run/user/{os.getuid()}") else tempfile.gettempdir())
-            paths = ['.', 'snap.discord', 'app/com.discordapp.Discord', 'app/com.discordapp.DiscordCanary']
-        elif sys.platform == 'win32':
-            return r'\\?\pipe\discord-ipc-0'
-        else:
-            return None
-
-        for path in paths:
-            full_path = os.path.abspath(os.path.join(tempdir, path))
-            if os.path.isdir(full_path):
-                for entry in os.scandir(full_path):
-                    if entry.name.startswith(ipc):
-                        return entry.path
-        return None
+        return _HEADER.pack(opcode, len(data)) + data
 
     def connect(self) -> dict:
+        """
+        Connect to the first available Discord IPC socket (Discord may listen not on `discord-ipc-0`).
+        """
+        # Cached endpoint is tried first, all candidates are scanned only if it fails
+        while True:
+            is_cached = self.path is None and self.resolver.last_good is not None
+            for path in [self.path] if self.path else self.resolver.resolve_blocking():
+                try:
+                    data = self._connect(path)
+                except DiscordProcessNotFoundError:
+                    self.close()
+                    self.resolver.mark_bad(path)
+                else:
+                    self.resolver.mark_good(path)
+                    return data
+            if not is_cached:
+                raise DiscordProcessNotFoundError
+
+    def _connect(self, path: str) -> dict:
         if os.name == 'nt':
             import win32file
             import pywintypes
 
             try:
                 self.sock = win32file.CreateFile(
-                    self._get_socket_path(),
+                    path,
                     win32file.GENERIC_READ | win32file.GENERIC_WRITE,
                     0, None,
                     win32file.OPEN_EXISTING,
@@ -69,7 +82,7 @@ class DiscordIPCClient:
         else:
             try:
                 self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-                self.sock.connect(self._get_socket_path())
+                self.sock.connect(path)
             except (ConnectionRefusedError, FileNotFoundError, BrokenPipeError) as e:
                 raise DiscordProcessNotFoundError from e
 
@@ -81,42 +94,65 @@ class DiscordIPCClient:
         self._send(self.OP_HANDSHAKE, handshake)
         print("[DiscordIPC] Handshake sent")
 
+        opcode, data = self._read_frame()
+        if opcode == self.OP_CLOSE:
+            self.close()
+            raise DiscordProcessNotFoundError
+
+        print(f"[DiscordIPC] User '{data.get('data').get('user').get('username')}' accepted handshake")
+        return data
+
+    def _recv(self, size: int) -> bytes:
         if os.name == 'nt':
             import win32file
             import pywintypes
 
             try:
-                response = win32file.ReadFile(self.sock, 1024)[1]
+                return win32file.ReadFile(self.sock, size)[1]
             except pywintypes.error as e:
                 if e.winerror == 2:  # File not found
                     raise DiscordProcessNotFoundError from e
                 if e.winerror == 5: # Not rights for rpc
                     raise AdminRightsRequiredError from e
                 else:
-                    print(f"[DiscordIPC] Error sending packet: {e}")
+                    print(f"[DiscordIPC] Error reading packet: {e}")
                     raise DiscordProcessNotFoundError from e
         else:
             try:
-                response = self.sock.recv(1024)
-            except (ConnectionRefusedError, FileNotFoundError, BrokenPipeError) as e:
+                return self.sock.recv(size)
+            except (ConnectionRefusedError, ConnectionResetError, FileNotFoundError, BrokenPipeError) as e:
                 raise DiscordProcessNotFoundError from e
 
-        opcode, length = struct.unpack('<II', response[:8])
-        payload = response[8:8 + length]
-        data = json.loads(payload.decode('utf-8'))
+    def _recv_exactly(self, size: int) -> bytes:
+        """
+        Read exactly `size` bytes (one `recv` can return only part of frame).
+        """
+        buffer = bytearray()
+        while len(buffer) < size:
+            chunk = self._recv(size - len(buffer))
+            if not chunk:
+                raise DiscordProcessNotFoundError
+            buffer += chunk
+        return bytes(buffer)
 
-        print(f"[DiscordIPC] User '{data.get('data').get('user').get('username')}' accepted handshake")
-        return data
+    def _read_frame(self):
+        opcode, length = _HEADER.unpack(self._recv_exactly(_HEADER.size))
+        payload = self._recv_exactly(length)
+        return opcode, json.loads(payload.decode('utf-8'))
 
     def _send(self, opcode, payload):
-        packet = self._encode(opcode, payload)
+        self._send_raw(opcode, json.dumps(payload).encode('utf-8'))
+
+    def _send_raw(self, opcode: int, body: bytes) -> None:
+        header = _HEADER.pack(opcode, len(body))
 
         if os.name == 'nt':
             import win32file
             import pywintypes
 
             try:
-                win32file.WriteFile(self.sock, packet)
+                # One message for pipe
+                win32file.WriteFile(self.sock, header + body)
             except pywintypes.error as e:
                 if e.winerror == 2:  # File not found
                     raise DiscordProcessNotFoundError from e
@@ -127,21 +163,54 @@ class DiscordIPCClient:
                     raise DiscordProcessNotFoundError from e
         else:
             try:
-                self.sock.send(packet)
-            except (ConnectionRefusedError, FileNotFoundError, BrokenPipeError) as e:
+                # Scatter-gather write: header and body are not concatenated
+                sent = self.sock.sendmsg((header, body))
+                if sent < len(header) + len(body):
+                    self.sock.sendall((header + body)[sent:])
+            except (ConnectionRefusedError, ConnectionResetError, FileNotFoundError, BrokenPipeError) as e:
                 raise DiscordProcessNotFoundError from e
 
     def set_activity(self, activity: dict, pid: int = os.getpid()):
-        payload = {
-            "cmd": "SET_ACTIVITY",
-            "args": {
-                "pid": pid,
-                "activity": activity
-            },
-            "nonce": str(time.time())
-        }
-        self._send(self.OP_FRAME, payload)
-        print("[DiscordIPC] Activity sent")
+        nonce = str(time.time())
+        with get_tracer().start_span("discord.encode"):
+            payload = {
+                "cmd": "SET_ACTIVITY",
+                "args": {
+                    "pid": pid,
+                    "activity": activity
+                },
+                "nonce": nonce
+            }
+            body = json.dumps(payload).encode('utf-8')
+        self._set_activity_raw(nonce, body)
+
+    def _set_activity_raw(self, nonce: str, body: bytes) -> None:
+        tracer: Tracer = get_tracer()
+        start = time.perf_counter()
+        try:
+            with tracer.start_span("discord.write"):
+                self._send_raw(self.OP_FRAME, body)
+            print("[DiscordIPC] Activity sent")
+
+            # Read response, so responses don't pile up in socket buffer
+            with tracer.start_span("discord.ack"):
+                while True:
+                    opcode, data = self._read_frame()
+                    if opcode == self.OP_CLOSE:
+                        raise DiscordProcessNotFoundError
+                    if opcode == self.OP_FRAME and data.get("nonce") == nonce:
+                        break
+        except DiscordProcessNotFoundError:
+            DISCORD_REQUESTS.inc(cmd="SET_ACTIVITY", result="disconnected")
+            raise
+
+        if data.get("evt") == "ERROR":
+            DISCORD_REQUESTS.inc(cmd="SET_ACTIVITY", result="error")
+            error = data.get("data") or {}
+            raise DiscordIPCError(error.get("code"), error.get("message"))
+
+        DISCORD_REQUESTS.inc(cmd="SET_ACTIVITY", result="ok")
+        DISCORD_REQUEST_SECONDS.observe(time.perf_counter() - start, cmd="SET_ACTIVITY")
 
     def set_yandex_music_activity(
             self,
@@ -152,7 +221,26 @@ class DiscordIPCClient:
             url: str,
             image_url: Optional[str] = None,
     ) -> None:
-        self.set_activity({
+        # Only changing fields are encoded, the rest of payload is pre-serialized
+        nonce = str(time.time())
+        with get_tracer().start_span("discord.encode"):
+            body = YANDEX_MUSIC_ACTIVITY_TEMPLATE.render(
+                pid=os.getpid(), nonce=nonce,
+                title=title, artists=artists, start=start, end=end, url=url,
+                image_url=image_url or YANDEX_LOGO_ASSET,
+            )
+        self._set_activity_raw(nonce, body)
+
+    @staticmethod
+    def build_yandex_music_activity(
+            title: str,
+            artists: str,
+            start: int,
+            end: int,
+            url: str,
+            image_url: Optional[str] = None,
+    ) -> dict:
+        return {
             "type": 2,
             # "emoji": "<:yandex:1370472333915197491>",
             "details": title,
@@ -162,8 +250,8 @@ class DiscordIPCClient:
                 "end": end,
             },
             "assets": {
-                "large_image": image_url if image_url else "yandex_logo",
-                "small_image": "yandex_logo",
+                "large_image": image_url if image_url else YANDEX_LOGO_ASSET,
+                "small_image": YANDEX_LOGO_ASSET,
                 "small_text": "YaMusicRPC by @edexade"
             },
             "buttons": [
@@ -176,7 +264,7 @@ class DiscordIPCClient:
                     "url": "https://github.com/issamansur/YaMusicRPC"
                 },
             ]
-        })
+        }
 
     def close(self):
         if self.sock:
@@ -184,3 +272,21 @@ class DiscordIPCClient:
                 self.sock.close()
             self.sock = None
             print("[DiscordIPC] Connection closed")
+
+
+# SET_ACTIVITY payload of Yandex Music activity, serialized once (see `set_yandex_music_activity`)
+YANDEX_MUSIC_ACTIVITY_TEMPLATE = PayloadTemplate({
+    "cmd": "SET_ACTIVITY",
+    "args": {
+        "pid": PayloadTemplate.field("pid"),
+        "activity": DiscordIPCClient.build_yandex_music_activity(
+            title=PayloadTemplate.field("title"),
+            artists=PayloadTemplate.field("artists"),
+            start=PayloadTemplate.field("start"),
+            end=PayloadTemplate.field("end"),
+            url=PayloadTemplate.field("url"),
+            image_url=PayloadTemplate.field("image_url"),
+        ),
+    },
+    "nonce": PayloadTemplate.field("nonce"),
+})
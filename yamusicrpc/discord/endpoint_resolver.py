@@ -0,0 +1,115 @@
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+from typing import Optional, List
+
+from yamusicrpc.data import DISCORD_IPC_SOCKETS_COUNT, DISCORD_PROBE_TIMEOUT
+
+
+class DiscordEndpointResolver:
+    """
+    Finds Discord IPC endpoint (`discord-ipc-0..9` in runtime dir, snap and flatpak dirs).
+
+    Last-known-good endpoint is cached and returned without scanning,
+    full scan (with probing of all candidates) is done only after it fails.
+    """
+    # Directories (relative to runtime dir), where Discord can create sockets
+    SOCKET_DIRS = ('.', 'snap.discord', 'app/com.discordapp.Discord', 'app/com.discordapp.DiscordCanary')
+
+    probe_timeout: float
+    last_good: Optional[str]
+
+    def __init__(self, probe_timeout: float = DISCORD_PROBE_TIMEOUT):
+        """
+        :param probe_timeout: Time in seconds to wait for connection to one candidate.
+        """
+        self.probe_timeout = probe_timeout
+        self.last_good = None
+        self.scan_count = 0
+
+    @classmethod
+    def get_candidates(cls) -> List[str]:
+        """
+        Return all existing endpoints in order of priority (Discord uses the first free one).
+        """
+        if sys.platform == 'win32':
+            return [rf'\\?\pipe\discord-ipc-{i}' for i in range(DISCORD_IPC_SOCKETS_COUNT)]
+        if sys.platform not in ('linux', 'darwin'):
+            return []
+
+        tempdir = os.environ.get('XDG_RUNTIME_DIR') or (
+            f"/run/user/{os.getuid()}" if os.path.exists(f"/run/user/{os.getuid()}") else tempfile.gettempdir())
+
+        candidates = []
+        for i in range(DISCORD_IPC_SOCKETS_COUNT):
+            for path in cls.SOCKET_DIRS:
+                full_path = os.path.abspath(os.path.join(tempdir, path, f'discord-ipc-{i}'))
+                if os.path.exists(full_path):
+                    candidates.append(full_path)
+        return candidates
+
+    # Probe block
+    async def probe(self, path: str) -> bool:
+        """
+        Check that somebody listens on endpoint (stale socket files refuse connection).
+        """
+        if sys.platform == 'win32':
+            # Opening pipe takes its instance, so only existence is checked
+            return os.path.exists(path)
+
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_unix_connection(path), self.probe_timeout)
+        except (OSError, asyncio.TimeoutError):
+            return False
+
+        writer.close()
+        return True
+
+    def probe_blocking(self, path: str) -> bool:
+        if sys.platform == 'win32':
+            return os.path.exists(path)
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.probe_timeout)
+        try:
+            sock.connect(path)
+        except OSError:
+            return False
+        finally:
+            sock.close()
+        return True
+
+    # Resolve block
+    async def resolve(self) -> List[str]:
+        """
+        Return endpoints to try in order: cached one (without scan) or all alive candidates (probed concurrently).
+        """
+        if self.last_good is not None:
+            return [self.last_good]
+
+        self.scan_count += 1
+        candidates: List[str] = self.get_candidates()
+        alive: List[bool] = await asyncio.gather(*(self.probe(path) for path in candidates))
+        return [path for path, is_alive in zip(candidates, alive) if is_alive]
+
+    def resolve_blocking(self) -> List[str]:
+        """
+        Same as `resolve`, but for blocking client (candidates are probed one by one, dead sockets fail fast).
+        """
+        if self.last_good is not None:
+            return [self.last_good]
+
+        self.scan_count += 1
+        return [path for path in self.get_candidates() if self.probe_blocking(path)]
+
+    def mark_good(self, path: str) -> None:
+        self.last_good = path
+
+    def mark_bad(self, path: str) -> None:
+        """
+        Forget failed endpoint, so the next `resolve` rescans all candidates.
+        """
+        if self.last_good == path:
+            self.last_good = None
@@ -1,3 +1,6 @@
+from typing import Optional
+
+
 class YaMusicRpcException(Exception):
     """
     Base exception class for exceptions raised by this library.
@@ -17,4 +20,28 @@ class AdminRightsRequiredError(YaMusicRpcException):
     Error raised when a Discord client has not enough rights to use Discord RPC.
     """
     def __init__(self):
-        super().__init__("Admin Rights Required")
\ No newline at end of file
+        super().__init__("Admin Rights Required")
+
+
+class DiscordIPCError(YaMusicRpcException):
+    """
+    Error returned by Discord in response to IPC command.
+    """
+    def __init__(self, code: Optional[int], message: Optional[str]):
+        self.code = code
+        self.message = message
+        super().__init__(f"Discord IPC error {code}: {message}")
+
+
+class YnisonConnectionError(YaMusicRpcException):
+    """
+    Error raised when connection to Ynison can't be restored.
+    """
+    def __init__(self, attempts: int):
+        super().__init__(f"Unable to reconnect to Ynison after {attempts} attempt(s)")
+
+
+class CacheBackendError(YaMusicRpcException):
+    """
+    Error raised when shared track cache backend fails (e.g. server is not available).
+    """
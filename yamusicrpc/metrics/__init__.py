@@ -0,0 +1,25 @@
+from .registry import Counter, Histogram, MetricsRegistry, REGISTRY
+from .server import MetricsServer
+from .tracing import (
+    Span, Tracer, RecordingTracer, OpenTelemetryTracer, NOOP_SPAN,
+    get_tracer, set_tracer, current_span, use_span,
+)
+from . import pipeline
+
+__all__ = [
+    "Counter",
+    "Histogram",
+    "MetricsRegistry",
+    "REGISTRY",
+    "MetricsServer",
+    "Span",
+    "Tracer",
+    "RecordingTracer",
+    "OpenTelemetryTracer",
+    "NOOP_SPAN",
+    "get_tracer",
+    "set_tracer",
+    "current_span",
+    "use_span",
+    "pipeline",
+]
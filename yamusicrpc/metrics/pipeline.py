@@ -0,0 +1,69 @@
+"""
+Metrics of the pipeline: Ynison frame -> track metadata -> Discord presence.
+"""
+from .registry import REGISTRY
+
+# Ynison
+YNISON_FRAMES = REGISTRY.counter(
+    "yamusicrpc_ynison_frames_total",
+    "Ynison state frames received",
+)
+YNISON_PARSE_SECONDS = REGISTRY.histogram(
+    "yamusicrpc_ynison_parse_seconds",
+    "Time to decode and parse Ynison state frame",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05),
+)
+TRACK_CHANGES = REGISTRY.counter(
+    "yamusicrpc_track_changes_total",
+    "Changes of state detected in Ynison frames",
+    ("event",),
+)
+
+# Yandex Music API
+HTTP_REQUESTS = REGISTRY.counter(
+    "yamusicrpc_http_requests_total",
+    "HTTP requests to Yandex by endpoint and status (`error` - request failed without response)",
+    ("endpoint", "status"),
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "yamusicrpc_http_request_seconds",
+    "Latency of HTTP requests to Yandex",
+    ("endpoint",),
+)
+
+# Caches
+TRACK_CACHE_REQUESTS = REGISTRY.counter(
+    "yamusicrpc_track_cache_requests_total",
+    "Lookups of track metadata by cache level (`memory`, `store`, `shared`) and result (`hit`, `miss`)",
+    ("level", "result"),
+)
+
+# Discord
+DISCORD_REQUESTS = REGISTRY.counter(
+    "yamusicrpc_discord_requests_total",
+    "Discord IPC commands by result (`ok`, `error` - Discord error, `disconnected`, `timeout`)",
+    ("cmd", "result"),
+)
+DISCORD_REQUEST_SECONDS = REGISTRY.histogram(
+    "yamusicrpc_discord_request_seconds",
+    "Time from sending Discord IPC command to response",
+    ("cmd",),
+)
+PRESENCE_LATENCY_SECONDS = REGISTRY.histogram(
+    "yamusicrpc_presence_latency_seconds",
+    "Time from detected Ynison state change to activity acknowledged by Discord (including rate limit delay)",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30),
+)
+
+# Connections
+RECONNECTS = REGISTRY.counter(
+    "yamusicrpc_reconnects_total",
+    "Restored connections by target (`ynison`, `discord`)",
+    ("target",),
+)
+DOWNTIME_SECONDS = REGISTRY.histogram(
+    "yamusicrpc_downtime_seconds",
+    "Time from connection loss to reconnect by target",
+    ("target",),
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
@@ -0,0 +1,202 @@
+import bisect
+import threading
+import time
+from typing import Dict, List, Tuple, Sequence, Optional, Iterator
+from contextlib import contextmanager
+
+from ..data import METRICS_DEFAULT_BUCKETS
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs: List[str] = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    type: str
+    name: str
+    documentation: str
+    label_names: Tuple[str, ...]
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if len(labels) != len(self.label_names):
+            raise ValueError(f"Metric '{self.name}' expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _render_samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines: List[str] = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        lines.extend(self._render_samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """
+    Monotonically increasing value (e.g. count of received frames).
+    """
+    type: str = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, label_names)
+        self.__values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: object) -> None:
+        key: Tuple[str, ...] = self._key(labels)
+        with self._lock:
+            self.__values[key] = self.__values.get(key, 0) + amount
+
+    def get(self, **labels: object) -> float:
+        with self._lock:
+            return self.__values.get(self._key(labels), 0)
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            values = list(self.__values.items())
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values (e.g. latency in seconds) by buckets, with sum and count.
+    """
+    type: str = "histogram"
+    buckets: Tuple[float, ...]
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            label_names: Sequence[str] = (),
+            buckets: Sequence[float] = METRICS_DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # Labels -> (counts by bucket (not cumulative), sum)
+        self.__values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key: Tuple[str, ...] = self._key(labels)
+        index: int = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            values = self.__values.get(key)
+            if values is None:
+                values = self.__values[key] = ([0] * len(self.buckets), [0.0])
+            counts, total = values
+            counts[index] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels: object) -> Iterator[None]:
+        """
+        Observe duration of `with` block in seconds.
+        """
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def get_count(self, **labels: object) -> int:
+        with self._lock:
+            values = self.__values.get(self._key(labels))
+            return sum(values[0]) if values else 0
+
+    def get_sum(self, **labels: object) -> float:
+        with self._lock:
+            values = self.__values.get(self._key(labels))
+            return values[1][0] if values else 0.0
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(counts), total[0]) for key, (counts, total) in self.__values.items()]
+
+        lines: List[str] = []
+        for key, counts, total in values:
+            cumulative: int = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le: str = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            labels: str = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics, which can be rendered in Prometheus text format.
+    """
+
+    def __init__(self) -> None:
+        self.__metrics: Dict[str, _Metric] = {}
+        self.__lock = threading.Lock()
+
+    def __register(self, metric: _Metric) -> _Metric:
+        with self.__lock:
+            existing: Optional[_Metric] = self.__metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.label_names != metric.label_names:
+                    raise ValueError(f"Metric '{metric.name}' is already registered with another type or labels")
+                return existing
+            self.__metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        """
+        Register counter (or return already registered one with the same name).
+        """
+        return self.__register(Counter(name, documentation, label_names))
+
+    def histogram(
+            self,
+            name: str,
+            documentation: str,
+            label_names: Sequence[str] = (),
+            buckets: Sequence[float] = METRICS_DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """
+        Register histogram (or return already registered one with the same name).
+        """
+        return self.__register(Histogram(name, documentation, label_names, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self.__metrics.get(name)
+
+    def render(self) -> str:
+        """
+        :return: All metrics in Prometheus text exposition format (version 0.0.4).
+        """
+        with self.__lock:
+            metrics: List[_Metric] = list(self.__metrics.values())
+        return "".join(metric.render() + "\n" for metric in metrics)
+
+
+# Registry used by the library
+REGISTRY = MetricsRegistry()
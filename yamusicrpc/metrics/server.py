@@ -0,0 +1,72 @@
+import asyncio
+from typing import Optional
+
+from ..data import METRICS_HOST, METRICS_PORT
+from .registry import MetricsRegistry, REGISTRY
+
+
+class MetricsServer:
+    """
+    Minimal HTTP endpoint (asyncio streams, without web framework), which serves metrics
+    in Prometheus text format on `GET /metrics`.
+
+    Correct using:
+    ```
+    server = MetricsServer(port=9464)
+    await server.start()
+    ...
+    await server.close()
+    ```
+    """
+    host: str
+    port: int
+
+    CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY, host: str = METRICS_HOST, port: int = METRICS_PORT):
+        """
+        :param registry: Metrics to serve.
+        :param host: Host to listen on (local only by default).
+        :param port: Port to listen on (`0` - any free port).
+        """
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.__server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self.__server = await asyncio.start_server(self.__handle, self.host, self.port)
+        # Real port, if any free port was requested
+        self.port = self.__server.sockets[0].getsockname()[1]
+        print(f"[MetricsServer] Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def close(self) -> None:
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+            self.__server = None
+
+    async def __handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line: bytes = await reader.readline()
+            # Skip headers
+            while (await reader.readline()).strip():
+                pass
+
+            parts = request_line.decode('latin-1').split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, content_type, body = "200 OK", self.CONTENT_TYPE, self.registry.render().encode('utf-8')
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", b"Not Found\n"
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n".encode('latin-1') + body
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,260 @@
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Optional, Deque, List, Tuple, Any
+
+from ..data import TRACING_MAX_SPANS
+
+
+class Span:
+    """
+    Stage of presence update (e.g. decoding of Ynison frame or writing to Discord IPC).
+    Base class is no-op span, which is returned when tracing is disabled.
+    """
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_exception(self, exception: BaseException) -> None:
+        pass
+
+    def end(self, end_time: Optional[float] = None) -> None:
+        """
+        :param end_time: Time (`time.time()`) when stage ended. Defaults to now.
+        """
+        pass
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc is not None:
+            self.record_exception(exc)
+        self.end()
+
+
+# Shared no-op span, so disabled tracing doesn't allocate anything per update
+NOOP_SPAN = Span()
+
+# Span of the current presence update (set while activity is sent to Discord)
+_current_span: ContextVar[Span] = ContextVar("yamusicrpc_current_span", default=NOOP_SPAN)
+
+
+class _UseSpan:
+    __slots__ = ("span", "token")
+
+    def __init__(self, span: Span) -> None:
+        self.span = span
+        self.token = None
+
+    def __enter__(self) -> Span:
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current_span.reset(self.token)
+
+
+class _NoopUseSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> Span:
+        return NOOP_SPAN
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_NOOP_USE_SPAN = _NoopUseSpan()
+
+
+def current_span() -> Span:
+    return _current_span.get()
+
+
+def use_span(span: Span):
+    """
+    Make `span` the parent of spans started inside `with` block (without ending it).
+    Needed when update is passed to another task (e.g. from listener to worker of `ActivityScheduler`).
+    """
+    if span is NOOP_SPAN:
+        return _NOOP_USE_SPAN
+    return _UseSpan(span)
+
+
+class Tracer:
+    """
+    Creates spans of presence update pipeline:
+    `presence_update` (root, from received Ynison frame to Discord ack) ->
+    `ynison.decode`, `ynison.from_ynison`, `yandex.fill_track_info`,
+    `discord.encode`, `discord.write`, `discord.ack`.
+
+    Base class is no-op tracer (used by default): it returns shared `NOOP_SPAN` without allocations,
+    and callers check `enabled` before collecting anything only needed by tracing.
+    Subclasses override `_start_span()` (e.g. `OpenTelemetryTracer`).
+    """
+    enabled: bool = False
+
+    def start_span(self, name: str, parent: Optional[Span] = None, start_time: Optional[float] = None) -> Span:
+        """
+        Start span, which must be ended with `Span.end()` (or used as context manager).
+
+        :param name: Name of stage.
+        :param parent: Parent span. Defaults to the current one (see `use_span()`), if any, else span is root.
+        :param start_time: Time (`time.time()`) when stage started. Defaults to now.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        if parent is None:
+            parent = _current_span.get()
+        return self._start_span(name, parent, start_time if start_time is not None else time.time())
+
+    def _start_span(self, name: str, parent: Span, start_time: float) -> Span:
+        return NOOP_SPAN
+
+
+class _RecordedSpan(Span):
+    __slots__ = ("tracer", "name", "parent", "start_time", "end_time", "attributes", "exception")
+
+    def __init__(self, tracer: "RecordingTracer", name: str, parent: Optional["_RecordedSpan"], start_time: float):
+        self.tracer = tracer
+        self.name = name
+        self.parent = parent
+        self.start_time = start_time
+        self.end_time: Optional[float] = None
+        self.attributes: Optional[dict] = None
+        self.exception: Optional[BaseException] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if self.attributes is None:
+            self.attributes = {}
+        self.attributes[key] = value
+
+    def record_exception(self, exception: BaseException) -> None:
+        self.exception = exception
+
+    def end(self, end_time: Optional[float] = None) -> None:
+        if self.end_time is None:
+            self.end_time = end_time if end_time is not None else time.time()
+            self.tracer._finish(self)
+
+    @property
+    def duration(self) -> float:
+        return (self.end_time or time.time()) - self.start_time
+
+    def __repr__(self) -> str:
+        return f"Span(name={self.name!r}, duration={self.duration * 1000:.3f}ms)"
+
+
+class RecordingTracer(Tracer):
+    """
+    Tracer which keeps the last finished spans in memory (without any external dependencies),
+    e.g. for benchmarks or to find out which stage takes the most time:
+    ```
+    tracer = RecordingTracer()
+    set_tracer(tracer)
+    ...
+    print(tracer.get_durations())
+    ```
+    """
+    enabled: bool = True
+
+    def __init__(self, max_spans: int = TRACING_MAX_SPANS) -> None:
+        """
+        :param max_spans: Max count of kept finished spans (the oldest ones are dropped).
+        """
+        self.__spans: Deque[_RecordedSpan] = deque(maxlen=max_spans)
+        self.__lock = threading.Lock()
+
+    def _start_span(self, name: str, parent: Span, start_time: float) -> Span:
+        return _RecordedSpan(self, name, parent if isinstance(parent, _RecordedSpan) else None, start_time)
+
+    def _finish(self, span: _RecordedSpan) -> None:
+        with self.__lock:
+            self.__spans.append(span)
+
+    @property
+    def spans(self) -> List[_RecordedSpan]:
+        """
+        :return: Finished spans in order of ending.
+        """
+        with self.__lock:
+            return list(self.__spans)
+
+    def get_durations(self, name: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        :param name: Return durations only of spans with this name.
+        :return: Pairs (name, duration in seconds) of finished spans.
+        """
+        return [(span.name, span.duration) for span in self.spans if name is None or span.name == name]
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__spans.clear()
+
+
+class _OpenTelemetrySpan(Span):
+    __slots__ = ("otel_span",)
+
+    def __init__(self, otel_span) -> None:
+        self.otel_span = otel_span
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.otel_span.set_attribute(key, value)
+
+    def record_exception(self, exception: BaseException) -> None:
+        self.otel_span.record_exception(exception)
+
+    def end(self, end_time: Optional[float] = None) -> None:
+        self.otel_span.end(end_time=int(end_time * 1e9) if end_time is not None else None)
+
+
+class OpenTelemetryTracer(Tracer):
+    """
+    Adapter, which exports spans to OpenTelemetry (requires `opentelemetry-api`, extra `otel`).
+    Spans are sent to configured tracer provider (global by default), e.g. with OTLP exporter.
+
+    Correct using:
+    ```
+    set_tracer(OpenTelemetryTracer())
+    ```
+    """
+    enabled: bool = True
+
+    def __init__(self, tracer_provider=None) -> None:
+        """
+        :param tracer_provider: OpenTelemetry tracer provider. Defaults to the global one.
+        """
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise ImportError("OpenTelemetryTracer requires 'opentelemetry-api' (pip install yamusicrpc[otel])")
+
+        self.__trace = trace
+        self.__tracer = trace.get_tracer("yamusicrpc", tracer_provider=tracer_provider)
+
+    def _start_span(self, name: str, parent: Span, start_time: float) -> Span:
+        context = None
+        if isinstance(parent, _OpenTelemetrySpan):
+            context = self.__trace.set_span_in_context(parent.otel_span)
+        return _OpenTelemetrySpan(
+            self.__tracer.start_span(name, context=context, start_time=int(start_time * 1e9))
+        )
+
+
+# Tracer used by the library (no-op until `set_tracer()` is called)
+_tracer: Tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def set_tracer(tracer: Optional[Tracer]) -> None:
+    """
+    Set tracer used by the library (`None` - disable tracing).
+    """
+    global _tracer
+    _tracer = tracer if tracer is not None else Tracer()
@@ -1,5 +1,11 @@
 from .track_info import TrackInfo
+from .track_metadata import TrackMetadata
+from .track_change import TrackEvent, TrackChange, TrackChangeDetector
 
 __all__ = [
     "TrackInfo",
+    "TrackMetadata",
+    "TrackEvent",
+    "TrackChange",
+    "TrackChangeDetector",
 ]
@@ -0,0 +1,104 @@
+import time
+from enum import Enum
+from typing import Optional, FrozenSet
+
+from yamusicrpc.data import SEEK_THRESHOLD
+from yamusicrpc.metrics.tracing import Span, NOOP_SPAN
+from .track_info import TrackInfo
+
+
+class TrackEvent(Enum):
+    TRACK_CHANGED = "track_changed"
+    PAUSED = "paused"
+    RESUMED = "resumed"
+    SEEKED = "seeked"
+    QUEUE_CHANGED = "queue_changed"
+
+
+class TrackChange:
+    """
+    Difference between two consecutive states from Ynison.
+    Empty change (no events) means that the state brings nothing new (e.g. progress ping).
+    """
+    __slots__ = ("track", "previous", "events", "span")
+
+    track: TrackInfo
+    previous: Optional[TrackInfo]
+    events: FrozenSet[TrackEvent]
+    # Root span of presence update (ended when activity is acknowledged by Discord), if tracing is enabled
+    span: Span
+
+    def __init__(
+            self,
+            track: TrackInfo,
+            previous: Optional[TrackInfo],
+            events: FrozenSet[TrackEvent],
+            span: Span = NOOP_SPAN,
+    ) -> None:
+        self.track = track
+        self.previous = previous
+        self.events = events
+        self.span = span
+
+    def __bool__(self) -> bool:
+        return bool(self.events)
+
+    def __contains__(self, event: TrackEvent) -> bool:
+        return event in self.events
+
+    def __repr__(self) -> str:
+        events = ", ".join(sorted(event.value for event in self.events))
+        return f"TrackChange(track_id={self.track.track_id!r}, events=[{events}])"
+
+
+class TrackChangeDetector:
+    """
+    Computes `TrackChange` by diffing each state against the previous one.
+    """
+    seek_threshold: int
+
+    def __init__(self, seek_threshold: int = SEEK_THRESHOLD) -> None:
+        """
+        :param seek_threshold: Min difference in seconds between expected and received progress to treat it as seek.
+        """
+        self.seek_threshold = seek_threshold
+        self.__previous: Optional[TrackInfo] = None
+        self.__previous_at: float = 0.0
+
+    def reset(self) -> None:
+        self.__previous = None
+
+    def update(self, track: TrackInfo, now: Optional[float] = None) -> TrackChange:
+        """
+        :param track: New state.
+        :param now: Time of receiving state (`time.monotonic()` by default).
+        """
+        now = time.monotonic() if now is None else now
+        previous, previous_at = self.__previous, self.__previous_at
+        self.__previous, self.__previous_at = track, now
+
+        if not track.is_same_track(previous):
+            events = {TrackEvent.TRACK_CHANGED}
+            if previous is not None and self.__is_queue_changed(previous, track):
+                events.add(TrackEvent.QUEUE_CHANGED)
+            return TrackChange(track, previous, frozenset(events))
+
+        events = set()
+        if previous.is_paused != track.is_paused:
+            events.add(TrackEvent.PAUSED if track.is_paused else TrackEvent.RESUMED)
+
+        if previous.progress is not None and track.progress is not None:
+            expected: float = previous.progress
+            if not previous.is_paused:
+                expected += now - previous_at
+            if abs(track.progress - expected) > self.seek_threshold:
+                events.add(TrackEvent.SEEKED)
+
+        if self.__is_queue_changed(previous, track) or previous.next_track_ids != track.next_track_ids:
+            events.add(TrackEvent.QUEUE_CHANGED)
+
+        return TrackChange(track, previous, frozenset(events))
+
+    @staticmethod
+    def __is_queue_changed(previous: TrackInfo, track: TrackInfo) -> bool:
+        return previous.entity_id != track.entity_id or previous.queue_length != track.queue_length
@@ -1,9 +1,16 @@
-from typing import Optional, Dict, Union
+from typing import Optional, Dict, Union, List, Tuple
 
 from yamusicrpc.data import YANDEX_COVER_DEFAULT_SIZE
 
 
 class TrackInfo:
+    # Instance is created for each Ynison state, so no per-instance __dict__
+    __slots__ = (
+        "track_id", "title", "artists",
+        "is_paused", "duration", "progress",
+        "album_id", "cover_url", "next_track_ids", "entity_id", "queue_length",
+    )
+
     # required
     track_id: str
     title: str
@@ -14,8 +21,11 @@ class TrackInfo:
     progress: Optional[int]
 
     # optional
-    album_id: Optional[str] = None
-    cover_url: Optional[str] = None
+    album_id: Optional[str]
+    cover_url: Optional[str]
+    next_track_ids: Tuple[str, ...]
+    entity_id: Optional[str]
+    queue_length: Optional[int]
 
     def __init__(
             self,
@@ -25,6 +35,11 @@ class TrackInfo:
             is_paused: Optional[bool] = None,
             duration: Optional[int] = None,
             progress: Optional[int] = None,
+            album_id: Optional[str] = None,
+            cover_url: Optional[str] = None,
+            next_track_ids: Tuple[str, ...] = (),
+            entity_id: Optional[str] = None,
+            queue_length: Optional[int] = None,
     ) -> None:
         self.track_id = track_id
         self.title = title
@@ -32,6 +47,32 @@ class TrackInfo:
         self.is_paused = is_paused
         self.duration = duration
         self.progress = progress
+        self.album_id = album_id
+        self.cover_url = cover_url
+        self.next_track_ids = next_track_ids
+        self.entity_id = entity_id
+        self.queue_length = queue_length
+
+    def __eq__(self, other: object) -> bool:
+        """
+        Structural equality (all fields), e.g. to detect that state has not changed.
+        """
+        if not isinstance(other, TrackInfo):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self) -> int:
+        # Only by identity of track: other fields can be filled later (e.g. artists)
+        return hash(self.track_id)
+
+    def __repr__(self) -> str:
+        return (
+            f"TrackInfo(track_id={self.track_id!r}, title={self.title!r}, "
+            f"is_paused={self.is_paused!r}, progress={self.progress!r}/{self.duration!r})"
+        )
+
+    def is_same_track(self, other: Optional['TrackInfo']) -> bool:
+        return other is not None and self.track_id == other.track_id
 
     def get_track_url(self) -> str:
         url: str = "https://music.yandex.ru"
@@ -42,9 +83,13 @@ class TrackInfo:
         return url
 
     @classmethod
-    def from_ynison(cls, ynison: dict) -> 'TrackInfo':
+    def from_ynison(cls, ynison: dict, queue_depth: int = 0) -> 'TrackInfo':
+        """
+        :param ynison: Decoded Ynison state.
+        :param queue_depth: Count of next tracks in queue to save in `next_track_ids` (e.g. for prefetching).
+        """
         # current track
-        current_list: Dict = ynison["player_state"]["player_queue"]["playable_list"]
+        current_list: List[Dict] = ynison["player_state"]["player_queue"]["playable_list"]
         current_index: int = ynison["player_state"]["player_queue"]["current_playable_index"]
         current_track: Dict = current_list[current_index]
 
@@ -59,14 +104,27 @@ class TrackInfo:
         duration: int = int(status["duration_ms"]) // 1000
         progress: int = int(status["progress_ms"]) // 1000
 
-        # [OPTIONAL] queue: entity id, entity type
-        """
+        # queue: entity id
         queue: Dict = ynison["player_state"]["player_queue"]
         entity_id: Optional[Union[int, str]] = queue.get("entity_id", None)
+
+        # [OPTIONAL] queue: entity type
+        """
         entity_type: Optional[Union[int, str]] = queue.get("entity_type", None)
         """
 
-        track_info: cls = cls(
+        # next tracks in queue (only music tracks, which can be requested from API)
+        next_track_ids: Tuple[str, ...] = ()
+        if queue_depth > 0:
+            next_tracks: List[Dict] = current_list[current_index + 1:current_index + 1 + queue_depth]
+            next_track_ids = tuple(
+                str(track["playable_id"])
+                for track in next_tracks
+                if track.get("playable_type", "TRACK") == "TRACK"
+            )
+
+        # Values are passed as is, without intermediate objects and later mutations
+        return cls(
             track_id=current_track_id,
             title=current_track_title,
             # We can't get info from ynison about artist
@@ -75,11 +133,13 @@ class TrackInfo:
             is_paused=is_paused,
             duration=duration,
             progress=progress,
-        )
-
-        if current_track_cover_url:
-            track_info.cover_url = f"https://{current_track_cover_url.strip('%')}{YANDEX_COVER_DEFAULT_SIZE}"
-        if current_track_album_id:
-            track_info.album_id = current_track_album_id
 
-        return track_info
+            album_id=current_track_album_id or None,
+            cover_url=(
+                f"https://{current_track_cover_url.strip('%')}{YANDEX_COVER_DEFAULT_SIZE}"
+                if current_track_cover_url else None
+            ),
+            next_track_ids=next_track_ids,
+            entity_id=str(entity_id) if entity_id else None,
+            queue_length=len(current_list),
+        )
@@ -0,0 +1,59 @@
+from typing import Optional, Dict, List, Union
+
+from yamusicrpc.data import YANDEX_COVER_DEFAULT_SIZE
+
+
+class TrackMetadata:
+    """
+    Parsed track info from Yandex Music API (`/tracks`), which can't be received from Ynison.
+    """
+    __slots__ = ("track_id", "artists", "album_id", "cover_url")
+
+    track_id: str
+    artists: str
+    album_id: Optional[str]
+    cover_url: Optional[str]
+
+    def __init__(
+            self,
+            track_id: str,
+            artists: str,
+            album_id: Optional[str] = None,
+            cover_url: Optional[str] = None,
+    ) -> None:
+        self.track_id = track_id
+        self.artists = artists
+        self.album_id = album_id
+        self.cover_url = cover_url
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TrackMetadata):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self) -> int:
+        return hash(self.track_id)
+
+    def __repr__(self) -> str:
+        return f"TrackMetadata(track_id={self.track_id!r}, artists={self.artists!r})"
+
+    @classmethod
+    def from_yandex(cls, track: Dict, track_id: Optional[Union[int, str]] = None) -> 'TrackMetadata':
+        artists: List[Dict] = track.get('artists', [{}])
+        albums: List[Dict] = track.get('albums', [])
+        cover_uri: Optional[str] = track.get('coverUri', None)
+
+        album_id: Optional[str] = None
+        if albums and albums[0].get('id') is not None:
+            album_id = str(albums[0]['id'])
+
+        cover_url: Optional[str] = None
+        if cover_uri:
+            cover_url = f"https://{cover_uri.strip('%')}{YANDEX_COVER_DEFAULT_SIZE}"
+
+        return cls(
+            track_id=str(track_id if track_id is not None else track.get('id')),
+            artists=", ".join(map(lambda artist: artist.get('name', '???'), artists)),
+            album_id=album_id,
+            cover_url=cover_url,
+        )
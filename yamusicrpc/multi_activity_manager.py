@@ -0,0 +1,244 @@
+import asyncio
+import random
+import time
+from ssl import SSLContext
+from typing import Optional, Dict, List, Iterable
+
+import aiohttp
+
+from .cache import TrackCache, TrackCacheBackend
+from .data import (
+    DISCORD_CLIENT_ID, PREFETCH_DEPTH, PREFETCH_CONCURRENCY, HTTP_POOL_LIMIT,
+    ACCOUNT_RESTART_BASE_DELAY, ACCOUNT_RESTART_MAX_DELAY,
+    YANDEX_API_URL, YANDEX_LOGIN_URL, YNISON_REDIRECTOR_URL, YNISON_STATE_SCHEME,
+)
+from .yandex import YandexListener, YandexClient, QueuePrefetcher
+from .discord import AsyncDiscordIPCClient, ActivityScheduler
+from .presence_pipeline import handle_track_change
+
+
+class Account:
+    """
+    Pair of Yandex account and Discord client, which receives its activity.
+    """
+    name: str
+    yandex_token: str
+    discord_ipc_client: AsyncDiscordIPCClient
+
+    # Runtime state (filled by `MultiActivityManager`)
+    restart_count: int
+    last_error: Optional[Exception]
+
+    def __init__(
+            self,
+            name: str,
+            yandex_token: str,
+            discord_ipc_client: Optional[AsyncDiscordIPCClient] = None,
+            discord_ipc_path: Optional[str] = None,
+    ):
+        """
+        :param name: Unique name of account (used in logs and to remove account).
+        :param yandex_token: OAuth token of Yandex account.
+        :param discord_ipc_client: Client of Discord target. Created for `discord_ipc_path` if not set.
+        :param discord_ipc_path: Path to IPC socket of Discord target (e.g. in runtime dir of another user).
+        """
+        self.name = name
+        self.yandex_token = yandex_token
+        self.discord_ipc_client = (
+            discord_ipc_client
+            if discord_ipc_client is not None
+            else AsyncDiscordIPCClient(DISCORD_CLIENT_ID, discord_ipc_path)
+        )
+        self.restart_count = 0
+        self.last_error = None
+
+
+class MultiActivityManager:
+    """
+    Hosts many accounts (Yandex token -> Discord target) in one event loop instead of process per account.
+
+    Accounts share HTTP connection pool (for API requests) and track metadata cache,
+    while each account runs in its own task: failure of one account (e.g. revoked token or closed Discord)
+    doesn't affect others, and the account is restarted with backoff.
+
+    Correct using:
+    ```
+    manager = MultiActivityManager([Account("first", token_1), Account("second", token_2, discord_ipc_path=...)])
+    await manager.run()  # until `stop()` is called
+    ```
+    """
+    ssl: Optional[SSLContext]
+    track_cache: TrackCache
+    restart_base_delay: float
+    restart_max_delay: float
+
+    __http_session: Optional[aiohttp.ClientSession] = None
+    __ws_session: Optional[aiohttp.ClientSession] = None
+
+    def __init__(
+            self,
+            accounts: Iterable[Account] = (),
+            ssl: Optional[SSLContext] = None,
+            track_cache: Optional[TrackCache] = None,
+            shared_cache: Optional[TrackCacheBackend] = None,
+            pool_limit: int = HTTP_POOL_LIMIT,
+            prefetch_depth: int = PREFETCH_DEPTH,
+            prefetch_concurrency: int = PREFETCH_CONCURRENCY,
+            restart_base_delay: float = ACCOUNT_RESTART_BASE_DELAY,
+            restart_max_delay: float = ACCOUNT_RESTART_MAX_DELAY,
+            api_url: str = YANDEX_API_URL,
+            login_url: str = YANDEX_LOGIN_URL,
+            redirector_url: str = YNISON_REDIRECTOR_URL,
+            state_scheme: str = YNISON_STATE_SCHEME,
+    ):
+        """
+        :param accounts: Accounts to run.
+        :param ssl: SSL context for connections.
+        :param track_cache: Cache of track metadata shared between accounts.
+        :param shared_cache: Cache backend shared with other processes (e.g. Redis), second level after `track_cache`.
+        :param pool_limit: Max count of simultaneous HTTP connections for all accounts.
+        :param prefetch_depth: Count of next tracks in queue to prefetch.
+        :param prefetch_concurrency: Max count of simultaneous prefetch requests of one account.
+        :param restart_base_delay: Delay in seconds before the first restart of failed account (doubled for each next one).
+        :param restart_max_delay: Max delay in seconds between restarts.
+        :param api_url: Base URL of Yandex Music API.
+        :param login_url: Base URL of Yandex profile API.
+        :param redirector_url: Base URL of Ynison redirector.
+        :param state_scheme: Scheme of Ynison host received from redirector.
+        """
+        self.ssl = ssl
+        self.track_cache = track_cache if track_cache is not None else TrackCache()
+        self.shared_cache = shared_cache
+        self.pool_limit = pool_limit
+        self.prefetch_depth = prefetch_depth
+        self.prefetch_concurrency = prefetch_concurrency
+        self.restart_base_delay = restart_base_delay
+        self.restart_max_delay = restart_max_delay
+        self.api_url = api_url
+        self.login_url = login_url
+        self.redirector_url = redirector_url
+        self.state_scheme = state_scheme
+
+        self.__accounts: Dict[str, Account] = {}
+        self.__tasks: Dict[str, asyncio.Task] = {}
+        self.__stop_event: Optional[asyncio.Event] = None
+
+        for account in accounts:
+            self.add_account(account)
+
+    @property
+    def accounts(self) -> List[Account]:
+        return list(self.__accounts.values())
+
+    @property
+    def is_running(self) -> bool:
+        return self.__stop_event is not None and not self.__stop_event.is_set()
+
+    # Accounts block
+    def add_account(self, account: Account) -> None:
+        """
+        Add account (it is started immediately, if manager is running).
+        """
+        if account.name in self.__accounts:
+            raise ValueError(f"Account '{account.name}' already exists")
+
+        self.__accounts[account.name] = account
+        if self.is_running:
+            self.__start_account(account)
+
+    async def remove_account(self, name: str) -> None:
+        account: Optional[Account] = self.__accounts.pop(name, None)
+        task: Optional[asyncio.Task] = self.__tasks.pop(name, None)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if account is not None:
+            await account.discord_ipc_client.close()
+
+    def __start_account(self, account: Account) -> None:
+        self.__tasks[account.name] = asyncio.create_task(self.__run_account(account), name=f"account-{account.name}")
+
+    # Main func
+    async def run(self) -> None:
+        """
+        Run all accounts until `stop()` is called (or task is cancelled).
+        """
+        self.__stop_event = asyncio.Event()
+        # HTTP requests of all accounts go through one limited pool.
+        # WebSockets hold their connection all the time, so they use separate session without limit
+        # (otherwise they would take all connections of the pool).
+        self.__http_session = YandexClient.create_session(self.ssl, self.pool_limit)
+        self.__ws_session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0, ssl=self.ssl or True))
+
+        try:
+            for account in self.__accounts.values():
+                self.__start_account(account)
+            await self.__stop_event.wait()
+        finally:
+            self.__stop_event.set()
+            tasks: List[asyncio.Task] = list(self.__tasks.values())
+            self.__tasks.clear()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+            for account in self.__accounts.values():
+                await account.discord_ipc_client.close()
+            await self.__http_session.close()
+            await self.__ws_session.close()
+            self.__http_session = None
+            self.__ws_session = None
+
+    def stop(self) -> None:
+        if self.__stop_event is not None:
+            self.__stop_event.set()
+
+    async def __run_account(self, account: Account) -> None:
+        """
+        Run account until it is removed, restarting it with backoff after failures.
+        """
+        failures: int = 0
+        while True:
+            started_at: float = time.monotonic()
+            try:
+                await self.__serve_account(account)
+                error: Optional[Exception] = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = e
+
+            account.last_error = error
+            account.restart_count += 1
+            # Account which worked long enough is not treated as failing
+            if time.monotonic() - started_at > self.restart_max_delay:
+                failures = 0
+
+            delay: float = min(self.restart_max_delay, self.restart_base_delay * 2 ** failures)
+            failures += 1
+            print(f"[MultiActivityManager] Account '{account.name}' stopped ({error!r}), restart in ~{delay:.1f}s")
+            await asyncio.sleep(random.uniform(delay / 2, delay))
+
+    async def __serve_account(self, account: Account) -> None:
+        client = YandexClient(
+            account.yandex_token, self.ssl,
+            track_cache=self.track_cache, session=self.__http_session, shared_cache=self.shared_cache,
+            api_url=self.api_url, login_url=self.login_url,
+        )
+        listener = YandexListener(
+            account.yandex_token, self.ssl, queue_depth=self.prefetch_depth, session=self.__ws_session,
+            redirector_url=self.redirector_url, state_scheme=self.state_scheme,
+        )
+        prefetcher = QueuePrefetcher(client, self.prefetch_depth, self.prefetch_concurrency)
+        # Without `on_error` scheduler raises error of sending by the next `submit`, so the account is restarted
+        scheduler = ActivityScheduler(account.discord_ipc_client)
+        await account.discord_ipc_client.connect()
+
+        try:
+            async with listener as l:
+                async for change in l.listen_changes():
+                    await handle_track_change(client, prefetcher, scheduler, change)
+        finally:
+            await prefetcher.close()
+            await scheduler.close()
+            await client.close()
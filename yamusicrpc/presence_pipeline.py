@@ -0,0 +1,40 @@
+import time
+
+from .models import TrackInfo, TrackChange
+from .yandex import YandexClient, QueuePrefetcher
+from .discord import ActivityScheduler
+from .metrics.tracing import get_tracer
+
+
+async def handle_track_change(
+        client: YandexClient,
+        prefetcher: QueuePrefetcher,
+        scheduler: ActivityScheduler,
+        change: TrackChange,
+) -> None:
+    """
+    Turn state change from Ynison into Discord activity: fill track metadata, prefetch the next tracks
+    of queue and schedule activity. Shared by `ActivityManager`, `MultiActivityManager` and the app.
+
+    :param client: Client to fill `change.track` metadata with.
+    :param prefetcher: Prefetcher of the next tracks (for the same client).
+    :param scheduler: Scheduler to submit activity to. Errors of sending are reported by scheduler itself
+        (to `on_error` or by the next submit), not raised here.
+    :param change: Change with new state (its span is ended by scheduler, when activity is acknowledged).
+    """
+    received_at: float = time.monotonic()
+    track: TrackInfo = change.track
+    start_time: int = int(time.time()) - track.progress
+    with get_tracer().start_span("yandex.fill_track_info", parent=change.span):
+        await client.fill_track_info(track)
+    prefetcher.schedule(track)
+    scheduler.submit_yandex_music_activity(
+        title=track.title,
+        artists=track.artists,
+        start=start_time,
+        end=start_time + track.duration,
+        url=track.get_track_url(),
+        image_url=track.cover_url,
+        received_at=received_at,
+        span=change.span,
+    )
@@ -0,0 +1,11 @@
+from .ynison_decoder import (
+    YnisonDecoder, OrjsonYnisonDecoder, MsgspecYnisonDecoder, LazyPlayableList, get_ynison_decoder
+)
+
+__all__ = [
+    "YnisonDecoder",
+    "OrjsonYnisonDecoder",
+    "MsgspecYnisonDecoder",
+    "LazyPlayableList",
+    "get_ynison_decoder",
+]
@@ -0,0 +1,143 @@
+import json
+from typing import Any, Dict, List, Optional, Union, Sequence
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+class YnisonDecoder:
+    """
+    Decoder of Ynison state frames (stdlib `json`, full decode).
+    Result is a dict, which can be passed to `TrackInfo.from_ynison`.
+    """
+    name: str = "json"
+
+    def decode(self, data: Union[str, bytes]) -> Dict:
+        return json.loads(data)
+
+
+class OrjsonYnisonDecoder(YnisonDecoder):
+    """
+    Full decode with `orjson` (several times faster than stdlib).
+    """
+    name: str = "orjson"
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise ImportError("orjson is not installed")
+
+    def decode(self, data: Union[str, bytes]) -> Dict:
+        return orjson.loads(data)
+
+
+if msgspec is not None:
+    class _YnisonPlayable(msgspec.Struct):
+        playable_id: Union[int, str]
+        title: Optional[str] = None
+        playable_type: str = "TRACK"
+        cover_url_optional: Optional[str] = None
+        album_id_optional: Optional[str] = None
+
+    class _YnisonQueue(msgspec.Struct):
+        current_playable_index: int
+        # Items are kept as raw JSON and decoded only on access
+        playable_list: List[msgspec.Raw]
+        entity_id: Optional[Union[int, str]] = None
+
+    class _YnisonStatus(msgspec.Struct):
+        paused: bool
+        duration_ms: Union[int, str]
+        progress_ms: Union[int, str]
+
+    class _YnisonPlayerState(msgspec.Struct):
+        player_queue: _YnisonQueue
+        status: _YnisonStatus
+
+    class _YnisonState(msgspec.Struct):
+        player_state: _YnisonPlayerState
+
+    _state_decoder = msgspec.json.Decoder(_YnisonState)
+    _playable_decoder = msgspec.json.Decoder(_YnisonPlayable)
+
+
+class LazyPlayableList(Sequence):
+    """
+    Queue (`playable_list`) of partially decoded Ynison state: items are decoded only when accessed.
+    """
+
+    def __init__(self, raw_items: List[Any]) -> None:
+        self.__raw_items = raw_items
+
+    def __len__(self) -> int:
+        return len(self.__raw_items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.__decode(raw) for raw in self.__raw_items[index]]
+        return self.__decode(self.__raw_items[index])
+
+    @staticmethod
+    def __decode(raw: Any) -> Dict:
+        return msgspec.structs.asdict(_playable_decoder.decode(raw))
+
+
+class MsgspecYnisonDecoder(YnisonDecoder):
+    """
+    Partial decode with `msgspec`: only fields used by `TrackInfo.from_ynison` are decoded,
+    other fields are skipped and queue items are decoded lazily (see `LazyPlayableList`).
+    """
+    name: str = "msgspec"
+
+    def __init__(self) -> None:
+        if msgspec is None:
+            raise ImportError("msgspec is not installed")
+
+    def decode(self, data: Union[str, bytes]) -> Dict:
+        try:
+            state = _state_decoder.decode(data)
+        except msgspec.ValidationError:
+            # Not a state frame (or unexpected schema), so decode it fully
+            return msgspec.json.decode(data)
+
+        queue = state.player_state.player_queue
+        status = state.player_state.status
+        return {
+            "player_state": {
+                "player_queue": {
+                    "current_playable_index": queue.current_playable_index,
+                    "entity_id": queue.entity_id,
+                    "playable_list": LazyPlayableList(queue.playable_list),
+                },
+                "status": {
+                    "paused": status.paused,
+                    "duration_ms": status.duration_ms,
+                    "progress_ms": status.progress_ms,
+                },
+            },
+        }
+
+
+def get_ynison_decoder(name: Optional[str] = None) -> YnisonDecoder:
+    """
+    Return decoder by name ('msgspec', 'orjson' or 'json') or the fastest available one.
+    """
+    decoders = {
+        MsgspecYnisonDecoder.name: MsgspecYnisonDecoder,
+        OrjsonYnisonDecoder.name: OrjsonYnisonDecoder,
+        YnisonDecoder.name: YnisonDecoder,
+    }
+    if name is not None:
+        return decoders[name]()
+
+    if msgspec is not None:
+        return MsgspecYnisonDecoder()
+    if orjson is not None:
+        return OrjsonYnisonDecoder()
+    return YnisonDecoder()
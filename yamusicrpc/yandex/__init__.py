@@ -1,9 +1,48 @@
-from .yandex_token_receiver import YandexTokenReceiver
-from .yandex_listener import YandexListener
-from .yandex_client import YandexClient
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .yandex_token_receiver import YandexTokenReceiver
+    from .yandex_listener import YandexListener
+    from .yandex_client import YandexClient
+    from .track_batcher import TrackBatcher
+    from .queue_prefetcher import QueuePrefetcher
+    from .ynison_recorder import YnisonRecorder, read_ynison_log
+    from .ynison_replay_listener import YnisonReplayListener
 
 __all__ = [
     "YandexTokenReceiver",
     "YandexListener",
     "YandexClient",
-]
\ No newline at end of file
+    "TrackBatcher",
+    "QueuePrefetcher",
+    "YnisonRecorder",
+    "read_ynison_log",
+    "YnisonReplayListener",
+]
+
+# Imported on first access (PEP 562): `YandexTokenReceiver` pulls requests, Flask and `yamusicrpc.server`,
+# which are only needed for device-flow login
+_LAZY_ATTRIBUTES = {
+    "YandexTokenReceiver": ".yandex_token_receiver",
+    "YandexListener": ".yandex_listener",
+    "YandexClient": ".yandex_client",
+    "TrackBatcher": ".track_batcher",
+    "QueuePrefetcher": ".queue_prefetcher",
+    "YnisonRecorder": ".ynison_recorder",
+    "read_ynison_log": ".ynison_recorder",
+    "YnisonReplayListener": ".ynison_replay_listener",
+}
+
+
+def __getattr__(name: str):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    # The next access doesn't call `__getattr__`
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *__all__})
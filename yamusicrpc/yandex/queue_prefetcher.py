@@ -0,0 +1,92 @@
+import asyncio
+from typing import Optional, List, Set
+
+from ..data import PREFETCH_DEPTH, PREFETCH_CONCURRENCY
+from ..models import TrackInfo
+from .yandex_client import YandexClient
+
+
+class QueuePrefetcher:
+    """
+    Prefetches metadata of the next tracks in queue in background,
+    so when track changes `YandexClient.fill_track_info` is served from cache.
+
+    Correct using:
+    ```
+    prefetcher = QueuePrefetcher(client, depth=3)
+    async with YandexListener(token, queue_depth=prefetcher.depth) as l:
+        async for track in l.listen():
+            await client.fill_track_info(track)
+            prefetcher.schedule(track)
+    ```
+    """
+    depth: int
+    concurrency: int
+
+    def __init__(
+            self,
+            client: YandexClient,
+            depth: int = PREFETCH_DEPTH,
+            concurrency: int = PREFETCH_CONCURRENCY,
+    ) -> None:
+        """
+        :param client: Client, which cache is filled.
+        :param depth: Count of next tracks in queue to prefetch.
+        :param concurrency: Max count of simultaneous prefetch requests.
+        """
+        self.__client = client
+        self.depth = depth
+        self.concurrency = concurrency
+        self.__task: Optional[asyncio.Task] = None
+        self.__track_ids: Set[str] = set()
+        self.__semaphore: Optional[asyncio.Semaphore] = None
+
+    def schedule(self, track_info: TrackInfo) -> None:
+        """
+        Start prefetching of `track_info.next_track_ids` (not blocking).
+        Previous prefetching is cancelled if queue has changed.
+        """
+        track_ids: List[str] = [
+            track_id
+            for track_id in track_info.next_track_ids[:self.depth]
+            if self.__client.track_cache.peek(track_id) is None
+        ]
+        if not track_ids:
+            return
+
+        if self.__task is not None and not self.__task.done():
+            if set(track_ids) <= self.__track_ids:
+                return
+            self.__task.cancel()
+
+        if self.__semaphore is None:
+            self.__semaphore = asyncio.Semaphore(self.concurrency)
+
+        self.__track_ids = set(track_ids)
+        self.__task = asyncio.create_task(self.__prefetch(track_ids))
+
+    async def __prefetch(self, track_ids: List[str]) -> None:
+        # Split into `concurrency` chunks, each one is a single batched request
+        chunk_size: int = max(1, -(-len(track_ids) // self.concurrency))
+        chunks = [track_ids[i:i + chunk_size] for i in range(0, len(track_ids), chunk_size)]
+
+        async def prefetch_chunk(chunk: List[str]) -> None:
+            async with self.__semaphore:
+                await self.__client.get_tracks_metadata(chunk)
+
+        try:
+            await asyncio.gather(*(prefetch_chunk(chunk) for chunk in chunks))
+            print(f'[QueuePrefetcher] Prefetched {len(track_ids)} tracks')
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f'[QueuePrefetcher] Failed to prefetch tracks: {e}')
+
+    async def close(self) -> None:
+        if self.__task is not None and not self.__task.done():
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+        self.__task = None
@@ -0,0 +1,111 @@
+import asyncio
+from typing import Callable, Awaitable, Dict, List, Optional, Union, Iterable
+
+from ..data import TRACK_BATCH_WINDOW, TRACK_BATCH_MAX_SIZE
+from ..models import TrackMetadata
+
+FetchFunc = Callable[[List[str]], Awaitable[Dict[str, TrackMetadata]]]
+
+
+class TrackBatcher:
+    """
+    Coalesces track metadata lookups made within a short time window into one multi-id request.
+    Lookups of the same track id share one in-flight future.
+
+    Batcher is bound to the loop where it was created.
+    """
+    window: float
+    max_batch_size: int
+
+    requests_count: int
+    coalesced_count: int
+
+    def __init__(
+            self,
+            fetch: FetchFunc,
+            window: float = TRACK_BATCH_WINDOW,
+            max_batch_size: int = TRACK_BATCH_MAX_SIZE,
+    ) -> None:
+        """
+        :param fetch: Coroutine function, which receives list of track ids and returns metadata by track id.
+        :param window: Time in seconds to wait for other lookups before sending request.
+        :param max_batch_size: Max count of track ids in one request (batch is sent immediately when reached).
+        """
+        self.__fetch = fetch
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.requests_count = 0
+        self.coalesced_count = 0
+
+        self.__loop = asyncio.get_running_loop()
+        self.__in_flight: Dict[str, asyncio.Future] = {}
+        self.__pending: List[str] = []
+        self.__flush_handle: Optional[asyncio.TimerHandle] = None
+        self.__tasks = set()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self.__loop
+
+    async def get(self, track_id: Union[str, int]) -> Optional[TrackMetadata]:
+        return await asyncio.shield(self.__enqueue(str(track_id)))
+
+    async def get_many(self, track_ids: Iterable[Union[str, int]]) -> Dict[str, Optional[TrackMetadata]]:
+        keys: List[str] = list(dict.fromkeys(map(str, track_ids)))
+        futures = [self.__enqueue(key) for key in keys]
+        results = await asyncio.shield(asyncio.gather(*futures))
+        return dict(zip(keys, results))
+
+    def __enqueue(self, key: str) -> asyncio.Future:
+        future: Optional[asyncio.Future] = self.__in_flight.get(key)
+        if future is not None:
+            self.coalesced_count += 1
+            return future
+
+        future = self.__loop.create_future()
+        # Mark exception as retrieved, even if all waiters were cancelled
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self.__in_flight[key] = future
+        self.__pending.append(key)
+
+        if len(self.__pending) >= self.max_batch_size:
+            self.__flush()
+        elif self.__flush_handle is None:
+            self.__flush_handle = self.__loop.call_later(self.window, self.__flush)
+
+        return future
+
+    def __flush(self) -> None:
+        if self.__flush_handle is not None:
+            self.__flush_handle.cancel()
+            self.__flush_handle = None
+
+        while self.__pending:
+            batch: List[str] = self.__pending[:self.max_batch_size]
+            del self.__pending[:self.max_batch_size]
+
+            task = self.__loop.create_task(self.__fetch_batch(batch))
+            self.__tasks.add(task)
+            task.add_done_callback(self.__tasks.discard)
+
+    async def __fetch_batch(self, batch: List[str]) -> None:
+        self.requests_count += 1
+        try:
+            result: Dict[str, TrackMetadata] = await self.__fetch(batch)
+        except asyncio.CancelledError:
+            for key in batch:
+                future = self.__in_flight.pop(key, None)
+                if future is not None and not future.done():
+                    future.cancel()
+            raise
+        except Exception as e:
+            for key in batch:
+                future = self.__in_flight.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+
+        for key in batch:
+            future = self.__in_flight.pop(key, None)
+            if future is not None and not future.done():
+                future.set_result(result.get(key))
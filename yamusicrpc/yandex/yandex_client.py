@@ -1,37 +1,166 @@
+import asyncio
+import time
 from ssl import SSLContext
-from typing import Union, Optional, Dict
+from typing import Union, Optional, Dict, List, Iterable
+from urllib.parse import urlparse
 
 import aiohttp
 
-from ..models import TrackInfo
+from ..cache import TrackCache, TrackCacheBackend
+from ..data import (
+    HTTP_POOL_LIMIT, HTTP_DNS_CACHE_TTL, HTTP_KEEPALIVE_TIMEOUT, TRACK_BATCH_WINDOW, TRACK_BATCH_MAX_SIZE,
+    SHARED_CACHE_LOCK_TTL, SHARED_CACHE_POLL_INTERVAL, YANDEX_API_URL, YANDEX_LOGIN_URL,
+)
+from ..exceptions import CacheBackendError
+from ..metrics.pipeline import HTTP_REQUESTS, HTTP_REQUEST_SECONDS, TRACK_CACHE_REQUESTS
+from ..models import TrackInfo, TrackMetadata
+from .track_batcher import TrackBatcher
 
 
 class YandexClient:
     yandex_token: str
     ssl: Optional[SSLContext]
+    api_url: str
+    login_url: str
     default_headers: Dict[str, str]
+    track_cache: TrackCache
+    shared_cache: Optional[TrackCacheBackend]
 
-    def __init__(self, yandex_token: str, ssl: Optional[SSLContext] = None):
+    __session: Optional[aiohttp.ClientSession] = None
+    __session_loop: Optional[asyncio.AbstractEventLoop] = None
+    __batcher: Optional[TrackBatcher] = None
+
+    def __init__(
+            self,
+            yandex_token: str,
+            ssl: Optional[SSLContext] = None,
+            pool_limit: int = HTTP_POOL_LIMIT,
+            dns_cache_ttl: int = HTTP_DNS_CACHE_TTL,
+            keepalive_timeout: float = HTTP_KEEPALIVE_TIMEOUT,
+            track_cache: Optional[TrackCache] = None,
+            batch_window: float = TRACK_BATCH_WINDOW,
+            max_batch_size: int = TRACK_BATCH_MAX_SIZE,
+            session: Optional[aiohttp.ClientSession] = None,
+            shared_cache: Optional[TrackCacheBackend] = None,
+            shared_lock_ttl: float = SHARED_CACHE_LOCK_TTL,
+            api_url: str = YANDEX_API_URL,
+            login_url: str = YANDEX_LOGIN_URL,
+    ):
+        """
+        :param yandex_token: OAuth token of Yandex account.
+        :param ssl: SSL context for connections.
+        :param pool_limit: Max count of simultaneous connections in own pool.
+        :param dns_cache_ttl: Time in seconds to cache DNS lookups.
+        :param keepalive_timeout: Time in seconds to keep idle connection alive.
+        :param track_cache: Cache of track metadata (can be shared between clients).
+        :param batch_window: Time in seconds to collect track lookups into one request.
+        :param max_batch_size: Max count of tracks in one request.
+        :param session: External session (e.g. shared between accounts), which is used instead of own pool
+            and is not closed by client.
+        :param shared_cache: Cache backend shared with other clients (second level after `track_cache`).
+        :param shared_lock_ttl: Max time in seconds to wait for track, which is requested by another client.
+        :param api_url: Base URL of Yandex Music API.
+        :param login_url: Base URL of Yandex profile API.
+        """
         self.yandex_token = yandex_token
         self.ssl = ssl
+        self.api_url = api_url.rstrip('/')
+        self.login_url = login_url.rstrip('/')
         self.default_headers = {
             "Authorization": f"OAuth {self.yandex_token}"
         }
+        self.pool_limit = pool_limit
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.track_cache = track_cache if track_cache is not None else TrackCache()
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.__external_session = session
+        self.shared_cache = shared_cache
+        self.shared_lock_ttl = shared_lock_ttl
+
+    # Session block
+    async def __aenter__(self) -> 'YandexClient':
+        self.__get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    def __get_session(self) -> aiohttp.ClientSession:
+        """
+        Return pooled session, bound to the running loop.
+        Session is created lazily and recreated if the client is used from another loop
+        (aiohttp sessions can't be shared between loops).
+        """
+        if self.__external_session is not None:
+            return self.__external_session
+
+        loop = asyncio.get_running_loop()
+
+        if self.__session is not None and not self.__session.closed and self.__session_loop is loop:
+            return self.__session
+
+        if self.__session is not None and not self.__session.closed:
+            # Close the old session in its own loop (if it is still alive)
+            if self.__session_loop is not None and self.__session_loop.is_running():
+                asyncio.run_coroutine_threadsafe(self.__session.close(), self.__session_loop)
+
+        self.__session = self.create_session(self.ssl, self.pool_limit, self.dns_cache_ttl, self.keepalive_timeout)
+        self.__session_loop = loop
+        return self.__session
+
+    @staticmethod
+    def create_session(
+            ssl: Optional[SSLContext] = None,
+            pool_limit: int = HTTP_POOL_LIMIT,
+            dns_cache_ttl: int = HTTP_DNS_CACHE_TTL,
+            keepalive_timeout: float = HTTP_KEEPALIVE_TIMEOUT,
+    ) -> aiohttp.ClientSession:
+        """
+        Create session with pooled connections (without auth headers, so it can be shared between accounts).
+        Must be called inside running loop.
+        """
+        connector = aiohttp.TCPConnector(
+            limit=pool_limit,
+            ttl_dns_cache=dns_cache_ttl,
+            keepalive_timeout=keepalive_timeout,
+            ssl=ssl if ssl is not None else True,
+        )
+        return aiohttp.ClientSession(connector=connector)
+
+    async def close(self) -> None:
+        # External session is closed by its owner
+        if self.__session is not None and not self.__session.closed:
+            if self.__session_loop is asyncio.get_running_loop():
+                await self.__session.close()
+            elif self.__session_loop is not None and self.__session_loop.is_running():
+                asyncio.run_coroutine_threadsafe(self.__session.close(), self.__session_loop)
+        self.__session = None
+        self.__session_loop = None
 
     async def do_request_async(self, url: str, headers: Dict[str, str], params: Dict) -> Dict:
-        headers.update(self.default_headers)
+        session: aiohttp.ClientSession = self.__get_session()
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers, params=params, ssl=self.ssl) as response:
+        endpoint: str = urlparse(url).path
+        status: Union[int, str] = "error"
+        start: float = time.perf_counter()
+        try:
+            # Auth headers are sent with each request, because session can be shared
+            async with session.get(url, headers={**self.default_headers, **headers}, params=params) as response:
+                status = response.status
                 if response.status == 200:
                     return await response.json()
                 else:
                     print(f"Request failed: {response.status} — {await response.text()}")
                     return {}
+        finally:
+            HTTP_REQUESTS.inc(endpoint=endpoint, status=status)
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
 
     # Profile utils
     async def get_profile_info(self) -> Dict:
-        url = "https://login.yandex.ru/info"
+        url = f"{self.login_url}/info"
         params = {
             "format": "json"
         }
@@ -44,15 +173,145 @@ class YandexClient:
 
     # Track utils
     async def get_track_info(self, track_id: Union[str, int]) -> Dict:
-        url = "https://api.music.yandex.net/tracks"
+        return await self.get_tracks_info([track_id])
+
+    async def get_tracks_info(self, track_ids: List[Union[str, int]]) -> Dict:
+        url = f"{self.api_url}/tracks"
         params = {
-            "track_ids": [track_id]
+            "track_ids": ",".join(map(str, track_ids))
         }
 
         return await self.do_request_async(url, {}, params)
 
+    def __get_batcher(self) -> TrackBatcher:
+        loop = asyncio.get_running_loop()
+        if self.__batcher is None or self.__batcher.loop is not loop:
+            self.__batcher = TrackBatcher(
+                self.__fetch_tracks_metadata,
+                window=self.batch_window,
+                max_batch_size=self.max_batch_size,
+            )
+        return self.__batcher
+
+    async def __fetch_tracks_metadata(self, track_ids: List[str]) -> Dict[str, TrackMetadata]:
+        if self.shared_cache is None:
+            return await self.__request_tracks_metadata(track_ids)
+        return await self.__fetch_shared_tracks_metadata(track_ids)
+
+    async def __request_tracks_metadata(self, track_ids: List[str]) -> Dict[str, TrackMetadata]:
+        result_json = await self.get_tracks_info(track_ids)
+        result: List[Dict] = result_json.get('result', [])
+
+        tracks: Dict[str, TrackMetadata] = {}
+        for index, track in enumerate(result):
+            track_id = track.get('id')
+            # Fallback to position if API hasn't returned id
+            if track_id is None and len(result) == len(track_ids):
+                track_id = track_ids[index]
+            if track_id is None:
+                continue
+
+            metadata = TrackMetadata.from_yandex(track, track_id)
+            tracks[metadata.track_id] = metadata
+
+        await self.track_cache.put_many_async(tracks.values())
+        return tracks
+
+    async def __fetch_shared_tracks_metadata(self, track_ids: List[str]) -> Dict[str, TrackMetadata]:
+        """
+        Take tracks from shared cache. Missing tracks are requested only by the client, which took fill lock,
+        other clients wait for them to appear in shared cache (so identical requests are not sent at once).
+        Shared cache failures are not fatal: tracks are requested directly.
+        """
+        shared: TrackCacheBackend = self.shared_cache
+        try:
+            tracks: Dict[str, TrackMetadata] = await shared.get_many(track_ids)
+            missing: List[str] = [track_id for track_id in track_ids if track_id not in tracks]
+            locked: List[str] = await shared.lock_many(missing, self.shared_lock_ttl) if missing else []
+        except CacheBackendError as e:
+            print(f"[YandexClient] Shared cache is not available: {e}")
+            return await self.__request_tracks_metadata(track_ids)
+
+        TRACK_CACHE_REQUESTS.inc(len(tracks), level="shared", result="hit")
+        TRACK_CACHE_REQUESTS.inc(len(missing), level="shared", result="miss")
+
+        await self.track_cache.put_many_async(tracks.values())
+
+        if locked:
+            try:
+                fetched: Dict[str, TrackMetadata] = await self.__request_tracks_metadata(locked)
+                tracks.update(fetched)
+                if fetched:
+                    await shared.put_many(fetched.values())
+            except CacheBackendError as e:
+                print(f"[YandexClient] Failed to update shared cache: {e}")
+            finally:
+                try:
+                    await shared.unlock_many(locked)
+                except CacheBackendError:
+                    # Lock expires by itself
+                    pass
+
+        waiting: List[str] = [track_id for track_id in missing if track_id not in locked]
+        if waiting:
+            tracks.update(await self.__wait_shared_tracks_metadata(waiting))
+        return tracks
+
+    async def __wait_shared_tracks_metadata(self, track_ids: List[str]) -> Dict[str, TrackMetadata]:
+        """
+        Wait for tracks, requested by another client. If they don't appear in time, they are requested directly.
+        """
+        loop = asyncio.get_running_loop()
+        deadline: float = loop.time() + self.shared_lock_ttl
+        tracks: Dict[str, TrackMetadata] = {}
+
+        while track_ids and loop.time() < deadline:
+            await asyncio.sleep(SHARED_CACHE_POLL_INTERVAL)
+            try:
+                found: Dict[str, TrackMetadata] = await self.shared_cache.get_many(track_ids)
+            except CacheBackendError:
+                break
+            await self.track_cache.put_many_async(found.values())
+            tracks.update(found)
+            track_ids = [track_id for track_id in track_ids if track_id not in found]
+
+        if track_ids:
+            tracks.update(await self.__request_tracks_metadata(track_ids))
+        return tracks
+
+    async def get_track_metadata(self, track_id: Union[str, int]) -> Optional[TrackMetadata]:
+        """
+        Return parsed track metadata, using cache before requesting the API.
+        Concurrent lookups are coalesced into one request by `TrackBatcher`.
+
+        :return: `TrackMetadata` or `None` if request failed (failed results are not cached).
+        """
+        metadata: Optional[TrackMetadata] = await self.track_cache.get_async(track_id)
+        if metadata is not None:
+            return metadata
+
+        return await self.__get_batcher().get(track_id)
+
+    async def get_tracks_metadata(self, track_ids: Iterable[Union[str, int]]) -> Dict[str, Optional[TrackMetadata]]:
+        """
+        Same as `get_track_metadata`, but for several tracks (missing ones are requested in batch).
+        """
+        tracks: Dict[str, Optional[TrackMetadata]] = await self.track_cache.get_many_async(track_ids)
+        missing: List[str] = [track_id for track_id, metadata in tracks.items() if metadata is None]
+
+        if missing:
+            tracks.update(await self.__get_batcher().get_many(missing))
+        return tracks
+
     async def fill_track_info(self, track_info: TrackInfo) -> None:
-        result_json = await self.get_track_info(track_info.track_id)
-        track_info_new = result_json.get('result', [{}])[0]
-        artists = track_info_new.get('artists', [{}])
-        track_info.artists = ", ".join(map(lambda artist: artist.get('name', '???'), artists))
+        metadata: Optional[TrackMetadata] = await self.get_track_metadata(track_info.track_id)
+        if metadata is None:
+            track_info.artists = '???'
+            return
+
+        track_info.artists = metadata.artists
+        # Ynison data has priority, API data is used only as fallback
+        if not track_info.album_id:
+            track_info.album_id = metadata.album_id
+        if not track_info.cover_url:
+            track_info.cover_url = metadata.cover_url
@@ -2,13 +2,32 @@ import asyncio
 import random
 import string
 import json
+import time
 from ssl import SSLContext
-from typing import Optional, AsyncIterator
+from typing import Optional, AsyncIterator, Callable
 
 import aiohttp
 from aiohttp import ClientWebSocketResponse
 
-from yamusicrpc.models import TrackInfo
+from yamusicrpc.data import (
+    SEEK_THRESHOLD, RECONNECT_BASE_DELAY, RECONNECT_MAX_DELAY, YNISON_REDIRECTOR_URL, YNISON_STATE_SCHEME,
+)
+from yamusicrpc.exceptions import YnisonConnectionError
+from yamusicrpc.metrics.pipeline import (
+    YNISON_FRAMES, YNISON_PARSE_SECONDS, TRACK_CHANGES, RECONNECTS, DOWNTIME_SECONDS,
+)
+from yamusicrpc.metrics.tracing import Span, Tracer, get_tracer
+from yamusicrpc.models import TrackInfo, TrackChange, TrackChangeDetector
+from yamusicrpc.utils import YnisonDecoder, get_ynison_decoder
+
+_DISCONNECT_TYPES = (
+    aiohttp.WSMsgType.CLOSE,
+    aiohttp.WSMsgType.CLOSING,
+    aiohttp.WSMsgType.CLOSED,
+    aiohttp.WSMsgType.ERROR,
+)
+# Token is invalid or revoked, so reconnecting doesn't help
+_AUTH_ERROR_STATUSES = (401, 403)
 
 
 class YandexListener:
@@ -18,10 +37,71 @@ class YandexListener:
     __ws_proto: dict
     __base_payload: dict
     __redirect_host: Optional[str] = None
+    __queue_depth: int
+    __decoder: YnisonDecoder
+    redirector_url: str
+    state_scheme: str
+    # Called with every raw state frame before parsing (e.g. `YnisonRecorder`)
+    frame_hook: Optional[Callable[[str], None]]
+
+    # Reconnect
+    auto_reconnect: bool
+    max_reconnect_attempts: Optional[int]
+    reconnect_base_delay: float
+    reconnect_max_delay: float
+
+    reconnect_count: int
+    redirect_count: int
+    last_reconnect_latency: Optional[float]
+    total_downtime: float
 
-    def __init__(self, yandex_token: str, ssl: Optional[SSLContext] = None) -> None:
+    def __init__(
+            self,
+            yandex_token: str,
+            ssl: Optional[SSLContext] = None,
+            queue_depth: int = 0,
+            decoder: Optional[YnisonDecoder] = None,
+            auto_reconnect: bool = True,
+            max_reconnect_attempts: Optional[int] = None,
+            reconnect_base_delay: float = RECONNECT_BASE_DELAY,
+            reconnect_max_delay: float = RECONNECT_MAX_DELAY,
+            session: Optional[aiohttp.ClientSession] = None,
+            frame_hook: Optional[Callable[[str], None]] = None,
+            redirector_url: str = YNISON_REDIRECTOR_URL,
+            state_scheme: str = YNISON_STATE_SCHEME,
+    ) -> None:
+        """
+        :param yandex_token: OAuth token of Yandex account.
+        :param ssl: SSL context for connections.
+        :param queue_depth: Count of next tracks in queue to save in `TrackInfo.next_track_ids`.
+        :param decoder: Decoder of state frames. Defaults to the fastest available one (msgspec, orjson or json).
+        :param auto_reconnect: Reconnect transparently when WebSocket is closed or broken.
+        :param max_reconnect_attempts: Max count of attempts in a row (`None` - without limit).
+            Rejected token (401/403) is not retried.
+        :param reconnect_base_delay: Delay in seconds before the first attempt (doubled for each next one).
+        :param reconnect_max_delay: Max delay in seconds between attempts.
+        :param session: External session (e.g. shared between accounts), which is not closed by listener.
+        :param frame_hook: Called with every raw state frame before parsing (e.g. `YnisonRecorder`).
+        :param redirector_url: Base URL of Ynison redirector.
+        :param state_scheme: Scheme of Ynison host received from redirector (`ws` for local stand-in).
+        """
         self.__yandex_token = yandex_token
         self.__ssl = ssl
+        self.__queue_depth = queue_depth
+        self.__decoder = decoder if decoder is not None else get_ynison_decoder()
+        self.__external_session = session
+        self.frame_hook = frame_hook
+        self.redirector_url = redirector_url.rstrip('/')
+        self.state_scheme = state_scheme
+
+        self.auto_reconnect = auto_reconnect
+        self.max_reconnect_attempts = max_reconnect_attempts
+        self.reconnect_base_delay = reconnect_base_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self.reconnect_count = 0
+        self.redirect_count = 0
+        self.last_reconnect_latency = None
+        self.total_downtime = 0.0
         self.__device_id = self.generate_device_id()
         self.__ws_proto = {
             "Ynison-Device-Id": self.__device_id,
@@ -82,20 +162,31 @@ class YandexListener:
     def generate_device_id(length: int = 16) -> str:
         return ''.join(random.choices(string.ascii_lowercase, k=length))
 
+    def __get_headers(self) -> dict:
+        return {
+            "Sec-WebSocket-Protocol": f"Bearer, v2, {json.dumps(self.__ws_proto)}",
+            "Origin": "https://music.yandex.ru",
+            "Authorization": f"OAuth {self.__yandex_token}",
+        }
+
     async def __get_redirect_to_ynison(self) -> dict:
-        async with aiohttp.ClientSession() as session:
-            async with session.ws_connect(
-                    "wss://ynison.music.yandex.ru/redirector.YnisonRedirectService/GetRedirectToYnison",
-                    headers={
-                        "Sec-WebSocket-Protocol": f"Bearer, v2, {json.dumps(self.__ws_proto)}",
-                        "Origin": "https://music.yandex.ru",
-                        "Authorization": f"OAuth {self.__yandex_token}",
-                    },
-                    ssl=self.__ssl,
-            ) as ws:
-                response = await ws.receive()
-                response_json = response.json()
-                return response_json
+        async with self.__session.ws_connect(
+                f"{self.redirector_url}/redirector.YnisonRedirectService/GetRedirectToYnison",
+                headers=self.__get_headers(),
+                ssl=self.__ssl,
+        ) as ws:
+            response = await ws.receive()
+
+        # Errors are `ClientError`, so reconnect retries them as other connection errors
+        if response.type != aiohttp.WSMsgType.TEXT:
+            raise aiohttp.ClientError(f"Unexpected response of redirector: {response.type.name}")
+        try:
+            response_json = json.loads(response.data)
+        except ValueError as e:
+            raise aiohttp.ClientError(f"Invalid response of redirector: {e}") from e
+        if not isinstance(response_json, dict):
+            raise aiohttp.ClientError(f"Invalid response of redirector: {response.data[:100]!r}")
+        return response_json
 
     async def __update_redirect_ynison(self) -> None:
         ynison_data: dict = await self.__get_redirect_to_ynison()
@@ -109,32 +200,152 @@ class YandexListener:
 
         self.__ws_proto["Ynison-Redirect-Ticket"] = redirect_ticket
         self.__redirect_host = host
+        self.redirect_count += 1
 
     # Async generator block
-    __session: aiohttp.ClientSession
-    __ws: ClientWebSocketResponse
+    __session: Optional[aiohttp.ClientSession] = None
+    __ws: Optional[ClientWebSocketResponse] = None
+    # Root span of the last parsed frame, until it is taken by `listen_changes()` (only if tracing is enabled)
+    __frame_span: Optional[Span] = None
+
+    async def __connect(self, refresh_redirect: bool = False) -> None:
+        """
+        Connect to Ynison, reusing received redirect host and ticket (if any and not `refresh_redirect`).
+        """
+        if refresh_redirect or self.__redirect_host is None:
+            await self.__update_redirect_ynison()
 
-    async def __aenter__(self):
-        await self.__update_redirect_ynison()
-        self.__session = aiohttp.ClientSession()
         self.__ws = await self.__session.ws_connect(
-            f"wss://{self.__redirect_host}/ynison_state.YnisonStateService/PutYnisonState",
-            headers={
-                "Sec-WebSocket-Protocol": f"Bearer, v2, {json.dumps(self.__ws_proto)}",
-                "Origin": "https://music.yandex.ru",
-                "Authorization": f"OAuth {self.__yandex_token}",
-            },
+            f"{self.state_scheme}://{self.__redirect_host}/ynison_state.YnisonStateService/PutYnisonState",
+            headers=self.__get_headers(),
             ssl=self.__ssl,
         )
         await self.__ws.send_str(json.dumps(self.__base_payload))
+
+    async def __reconnect(self) -> None:
+        """
+        Reconnect with exponential backoff and jitter.
+        Redirect is requested again only if the cached ticket was rejected.
+
+        :raises YnisonConnectionError: If all attempts failed or token was rejected (401/403).
+        """
+        if self.__ws is not None and not self.__ws.closed:
+            await self.__ws.close()
+
+        disconnected_at: float = time.monotonic()
+        refresh_redirect: bool = False
+        attempt: int = 0
+
+        while True:
+            delay: float = min(self.reconnect_max_delay, self.reconnect_base_delay * 2 ** attempt)
+            await asyncio.sleep(random.uniform(delay / 2, delay))
+            attempt += 1
+
+            try:
+                await self.__connect(refresh_redirect)
+                break
+            except aiohttp.WSServerHandshakeError as e:
+                print(f'[YandexListener] Reconnect attempt {attempt} failed: {e.status} {e.message}')
+                if e.status in _AUTH_ERROR_STATUSES:
+                    raise YnisonConnectionError(attempt) from e
+                # Ticket is expired or host is not available anymore, so take new redirect
+                refresh_redirect = True
+                error: Exception = e
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                print(f'[YandexListener] Reconnect attempt {attempt} failed: {e!r}')
+                error = e
+
+            if self.max_reconnect_attempts is not None and attempt >= self.max_reconnect_attempts:
+                raise YnisonConnectionError(attempt) from error
+
+        self.reconnect_count += 1
+        self.last_reconnect_latency = time.monotonic() - disconnected_at
+        self.total_downtime += self.last_reconnect_latency
+        RECONNECTS.inc(target="ynison")
+        DOWNTIME_SECONDS.observe(self.last_reconnect_latency, target="ynison")
+        print(
+            f'[YandexListener] Reconnected after {attempt} attempt(s) in {self.last_reconnect_latency:.2f}s '
+            f'(total reconnects: {self.reconnect_count})'
+        )
+
+    async def __aenter__(self):
+        self.__session = self.__external_session or aiohttp.ClientSession()
+        try:
+            await self.__connect()
+        except BaseException:
+            await self.__close_session()
+            raise
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
+        self.__end_frame_span()
         if self.__ws is not None:
             await self.__ws.close()
-        if self.__session is not None:
+        await self.__close_session()
+
+    async def __close_session(self) -> None:
+        # External session is closed by its owner
+        if self.__session is not None and self.__session is not self.__external_session:
             await self.__session.close()
 
+    def _parse(self, data: str) -> TrackInfo:
+        """
+        Parse raw state frame (also used by `YnisonReplayListener` to feed recorded frames).
+        """
+        if self.frame_hook is not None:
+            self.frame_hook(data)
+        YNISON_FRAMES.inc()
+        tracer: Tracer = get_tracer()
+        if tracer.enabled:
+            return self.__parse_traced(data, tracer)
+
+        start: float = time.perf_counter()
+        ynison_data = self.__decoder.decode(data)
+        state: TrackInfo = TrackInfo.from_ynison(ynison_data, self.__queue_depth)
+        YNISON_PARSE_SECONDS.observe(time.perf_counter() - start)
+        print(f'[YandexListener] Received state about track: {state.track_id} (progress: {state.progress})')
+        return state
+
+    def __parse_traced(self, data: str, tracer: Tracer) -> TrackInfo:
+        """
+        Same as `_parse()`, but also starts root span of presence update for the frame.
+        """
+        # Span of previous frame wasn't taken (e.g. it has no changes or `listen()` is used)
+        self.__end_frame_span()
+        span: Span = tracer.start_span("presence_update")
+        span.set_attribute("ynison.frame_size", len(data))
+
+        start: float = time.perf_counter()
+        with tracer.start_span("ynison.decode", parent=span):
+            ynison_data = self.__decoder.decode(data)
+        with tracer.start_span("ynison.from_ynison", parent=span):
+            state: TrackInfo = TrackInfo.from_ynison(ynison_data, self.__queue_depth)
+        YNISON_PARSE_SECONDS.observe(time.perf_counter() - start)
+
+        span.set_attribute("track_id", str(state.track_id))
+        self.__frame_span = span
+        print(f'[YandexListener] Received state about track: {state.track_id} (progress: {state.progress})')
+        return state
+
+    def __end_frame_span(self) -> None:
+        if self.__frame_span is not None:
+            self.__frame_span.end()
+            self.__frame_span = None
+
+    async def __handle_disconnect(self, msg: Optional[aiohttp.WSMessage]) -> bool:
+        """
+        :return: `True` if reconnected and listening can be continued.
+        """
+        if not self.auto_reconnect:
+            if msg is not None and msg.type == aiohttp.WSMsgType.ERROR:
+                raise msg.data
+            return False
+
+        reason = msg.data if msg is not None and msg.type == aiohttp.WSMsgType.ERROR else self.__ws.close_code
+        print(f'[YandexListener] Connection lost ({reason}), reconnecting...')
+        await self.__reconnect()
+        return True
+
     # Main methods
     async def listen(self) -> AsyncIterator[TrackInfo]:
         """
@@ -151,23 +362,30 @@ class YandexListener:
 
         :return: An async iterator yielding `CurrentState` instances from the Yandex Music service.
         """
-        async for msg in self.__ws:
+        while True:
+            try:
+                msg = await self.__ws.receive()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if not self.auto_reconnect:
+                    raise
+                msg = aiohttp.WSMessage(aiohttp.WSMsgType.ERROR, e, None)
+
             if msg.type == aiohttp.WSMsgType.TEXT:
-                ynison_data = msg.json()
-                state: TrackInfo = TrackInfo.from_ynison(ynison_data)
-                print(f'[YandexListener] Received state about track: {state.track_id} (progress: {state.progress})')
-                yield state
-            elif msg.type == aiohttp.WSMsgType.CLOSED:
-                break
-            elif msg.type == aiohttp.WSMsgType.ERROR:
-                raise msg.data
+                yield self._parse(msg.data)
+            elif msg.type in _DISCONNECT_TYPES:
+                if not await self.__handle_disconnect(msg):
+                    break
 
-    async def listen_with_event(self, stop_event: asyncio.Event, check_after: int = 5) -> AsyncIterator[TrackInfo]:
+    async def listen_with_event(
+            self,
+            stop_event: asyncio.Event,
+            check_after: Optional[int] = None,
+    ) -> AsyncIterator[TrackInfo]:
         """
         This method functions similarly to `listen()`, but allows early cancellation
-        by periodically checking the provided `stop_event`. It uses a timeout (`check_after`)
-        when waiting for each incoming message, so that it can detect the stop signal
-        without having to wait for the next WebSocket message.
+        with the provided `stop_event`. The stop event and the next WebSocket message
+        are awaited together, so the loop is interrupted immediately after the event is set
+        (also during reconnect) and there are no wakeups while nothing happens.
 
         This is useful in scenarios where the listening loop should be interruptible
         without having to wait for the next message from the WebSocket, such as when
@@ -177,28 +395,95 @@ class YandexListener:
         ```python
         stop_event = asyncio.Event()
         async with YandexListener(...) as listener:
-            async for state in listener.listen_with_event(stop_event, check_after=5):
+            async for state in listener.listen_with_event(stop_event):
                 ...
         ```
 
         :param stop_event: An `asyncio.Event` that, when set, will interrupt the listening loop.
-        :param check_after: Timeout in seconds to wait for the next message before checking the stop event again. Defaults to 5 seconds.
+        :param check_after: Deprecated and ignored (the stop event is not polled anymore).
         :return: An async iterator yielding `CurrentState` instances from the Yandex Music service.
         """
-        while not (stop_event and stop_event.is_set()):
-            try:
-                msg = await asyncio.wait_for(self.__ws.receive(), timeout=check_after)
-            except asyncio.TimeoutError:
-                continue
-            except asyncio.CancelledError:
-                break
+        stop_task: asyncio.Task = asyncio.ensure_future(stop_event.wait())
 
-            if msg.type == aiohttp.WSMsgType.TEXT:
-                ynison_data = msg.json()
-                state = TrackInfo.from_ynison(ynison_data)
-                print(f'[YandexListener] Received state about track: {state.track_id} (progress: {state.progress})')
-                yield state
-            elif msg.type == aiohttp.WSMsgType.CLOSED:
-                break
-            elif msg.type == aiohttp.WSMsgType.ERROR:
-                raise msg.data
+        try:
+            while not stop_event.is_set():
+                try:
+                    msg = await self.__until_stopped(self.__ws.receive(), stop_task)
+                except asyncio.CancelledError:
+                    break
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    if not self.auto_reconnect:
+                        raise
+                    msg = aiohttp.WSMessage(aiohttp.WSMsgType.ERROR, e, None)
+
+                if msg is None:
+                    break
+
+                if msg.type == aiohttp.WSMsgType.TEXT:
+                    yield self._parse(msg.data)
+                elif msg.type in _DISCONNECT_TYPES:
+                    reconnected = await self.__until_stopped(self.__handle_disconnect(msg), stop_task)
+                    if not reconnected:
+                        break
+        finally:
+            stop_task.cancel()
+
+    @staticmethod
+    async def __until_stopped(coro, stop_task: asyncio.Task):
+        """
+        Await `coro` until `stop_task` is done.
+
+        :return: Result of `coro` or `None` if stopped before.
+        """
+        task: asyncio.Task = asyncio.ensure_future(coro)
+        try:
+            await asyncio.wait((task, stop_task), return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+
+        if not task.done():
+            task.cancel()
+            return None
+        return task.result()
+
+    async def listen_changes(
+            self,
+            stop_event: Optional[asyncio.Event] = None,
+            seek_threshold: int = SEEK_THRESHOLD,
+    ) -> AsyncIterator[TrackChange]:
+        """
+        This method functions similarly to `listen()` (or `listen_with_event()`, if `stop_event` is set),
+        but yields only states which differ from the previous one, as `TrackChange` with typed events
+        (track changed, paused/resumed, seek, queue changed). States without changes (e.g. progress pings)
+        are skipped, so consumers don't do any work for them.
+        If tracing is enabled, `TrackChange.span` is root span of the update, which is ended by `ActivityScheduler`.
+
+        Example usage:
+        ```python
+        async with YandexListener(...) as listener:
+            async for change in listener.listen_changes():
+                if TrackEvent.TRACK_CHANGED in change:
+                    ...
+        ```
+
+        :param stop_event: An `asyncio.Event` that, when set, will interrupt the listening loop.
+        :param seek_threshold: Min jump of progress in seconds to treat it as seek.
+        :return: An async iterator yielding `TrackChange` instances.
+        """
+        detector = TrackChangeDetector(seek_threshold)
+        states = self.listen_with_event(stop_event) if stop_event is not None else self.listen()
+
+        async for state in states:
+            change: TrackChange = detector.update(state)
+            if self.__frame_span is not None:
+                if change:
+                    # The consumer continues the span (see `ActivityScheduler`)
+                    change.span, self.__frame_span = self.__frame_span, None
+                else:
+                    self.__frame_span.set_attribute("skipped", True)
+                    self.__end_frame_span()
+            if change:
+                for event in change.events:
+                    TRACK_CHANGES.inc(event=event.value)
+                yield change
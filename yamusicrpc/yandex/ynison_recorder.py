@@ -0,0 +1,74 @@
+import gzip
+import json
+import time
+from typing import Optional, Iterator, Tuple, TextIO
+
+from yamusicrpc.data import YNISON_LOG_COMPRESS_LEVEL
+
+
+class YnisonRecorder:
+    """
+    Writes raw Ynison state frames with receive time to compressed log (gzip, one JSON per line:
+    `{"t": <seconds since the first frame>, "d": <raw frame>}`), so a real listening session
+    can be replayed offline with `YnisonReplayListener`.
+
+    Correct using:
+    ```
+    with YnisonRecorder("session.jsonl.gz") as recorder:
+        async with YandexListener(token, frame_hook=recorder) as listener:
+            async for state in listener.listen():
+                ...
+    ```
+    """
+    path: str
+    frame_count: int
+
+    def __init__(self, path: str, compress_level: int = YNISON_LOG_COMPRESS_LEVEL) -> None:
+        """
+        :param path: Path to log file (overwritten, if exists).
+        :param compress_level: Gzip compression level (1 - fastest, 9 - smallest).
+        """
+        self.path = path
+        self.frame_count = 0
+        self.__file: Optional[TextIO] = gzip.open(path, "wt", encoding="utf-8", compresslevel=compress_level)
+        self.__started_at: Optional[float] = None
+
+    def __call__(self, data: str) -> None:
+        """
+        Write frame (signature of `YandexListener.frame_hook`).
+        Frames are buffered by gzip, so writing doesn't block event loop noticeably.
+        """
+        if self.__file is None:
+            return
+
+        now: float = time.monotonic()
+        if self.__started_at is None:
+            self.__started_at = now
+        self.__file.write(json.dumps({"t": round(now - self.__started_at, 6), "d": data}, ensure_ascii=False))
+        self.__file.write("\n")
+        self.frame_count += 1
+
+    def close(self) -> None:
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+            print(f"[YnisonRecorder] Recorded {self.frame_count} frame(s) to {self.path}")
+
+    def __enter__(self) -> "YnisonRecorder":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def read_ynison_log(path: str) -> Iterator[Tuple[float, str]]:
+    """
+    Read log written by `YnisonRecorder`.
+
+    :return: Iterator of pairs (seconds since the first frame, raw frame).
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                record: dict = json.loads(line)
+                yield record["t"], record["d"]
@@ -0,0 +1,93 @@
+import asyncio
+from typing import Optional, AsyncIterator, Callable
+
+from yamusicrpc.models import TrackInfo
+from yamusicrpc.utils import YnisonDecoder
+from .yandex_listener import YandexListener
+from .ynison_recorder import read_ynison_log
+
+
+class YnisonReplayListener(YandexListener):
+    """
+    Replays Ynison session recorded by `YnisonRecorder` instead of connecting to Ynison,
+    so parsing and presence updates (e.g. `ActivityManager`) can be profiled offline on real traffic.
+    Frames go through the same parsing, change detection, metrics and tracing as live ones.
+
+    Correct using:
+    ```
+    listener = YnisonReplayListener("session.jsonl.gz", speed=None)  # as fast as possible
+    async with listener as l:
+        async for change in l.listen_changes():
+            ...
+    ```
+    """
+    path: str
+    speed: Optional[float]
+    frame_count: int
+
+    def __init__(
+            self,
+            path: str,
+            speed: Optional[float] = 1.0,
+            queue_depth: int = 0,
+            decoder: Optional[YnisonDecoder] = None,
+            frame_hook: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        """
+        :param path: Path to log written by `YnisonRecorder`.
+        :param speed: Multiplier of recorded pace (`1.0` - real time, `None` - as fast as possible).
+        :param queue_depth: Count of next tracks in queue to save in `TrackInfo.next_track_ids`.
+        :param decoder: Decoder of state frames. Defaults to the fastest available one (msgspec, orjson or json).
+        :param frame_hook: Called with every raw state frame before parsing.
+        """
+        super().__init__("", queue_depth=queue_depth, decoder=decoder, auto_reconnect=False, frame_hook=frame_hook)
+        self.path = path
+        self.speed = speed
+        self.frame_count = 0
+
+    async def __aenter__(self):
+        # Nothing to connect to
+        return self
+
+    async def __replay(self, stop_event: Optional[asyncio.Event]) -> AsyncIterator[TrackInfo]:
+        loop = asyncio.get_running_loop()
+        started_at: float = loop.time()
+
+        for offset, data in read_ynison_log(self.path):
+            delay: float = started_at + offset / self.speed - loop.time() if self.speed else 0.0
+            if stop_event is None:
+                # Also at max speed control is returned to loop after each frame, as with real socket
+                await asyncio.sleep(max(delay, 0))
+            elif delay > 0:
+                try:
+                    await asyncio.wait_for(stop_event.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(0)
+
+            if stop_event is not None and stop_event.is_set():
+                break
+
+            self.frame_count += 1
+            yield self._parse(data)
+
+        print(f"[YnisonReplayListener] Replayed {self.frame_count} frame(s) from {self.path}")
+
+    async def listen(self) -> AsyncIterator[TrackInfo]:
+        """
+        Yield recorded states (until the end of log).
+        """
+        async for state in self.__replay(None):
+            yield state
+
+    async def listen_with_event(
+            self,
+            stop_event: asyncio.Event,
+            check_after: Optional[int] = None,
+    ) -> AsyncIterator[TrackInfo]:
+        """
+        Same as `listen()`, but stops as soon as `stop_event` is set.
+        """
+        async for state in self.__replay(stop_event):
+            yield state